@@ -5,18 +5,26 @@ import os
 import sys
 import json
 import asyncio
+import contextlib
+import multiprocessing
 import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import httpx
 from datetime import datetime
 
-# Add current directory to Python path for imports
+# Add current directory and src/ to Python path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.dirname(os.path.dirname(current_dir)))
+
+from mcp_servers.stdio_transport import StdioTransport
 
 # Import the nesting functionality
-from webdemo.docker.nesting.nest import DXFNester
+from webdemo.docker.nesting.nest import DXFNester, profiled
 
 async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
     """Handle MCP protocol requests."""
@@ -70,6 +78,26 @@ async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
                                     "type": "number",
                                     "description": "Minimum spacing between parts in mm (default: 2)",
                                     "default": 2.0
+                                },
+                                "stock_sheets": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "name": {"type": "string"},
+                                            "width": {"type": "number"},
+                                            "height": {"type": "number"},
+                                            "cost": {"type": "number"},
+                                            "priority": {"type": "number"}
+                                        },
+                                        "required": ["width", "height"]
+                                    },
+                                    "description": "Available stock sheets. When given, the cheapest combination of sheets that places all parts is chosen instead of sheet_width/sheet_height."
+                                },
+                                "wait": {
+                                    "type": "boolean",
+                                    "description": "Wait for the nesting result (default: true). When false, returns a job_id to poll with get_nesting_status.",
+                                    "default": True
                                 }
                             },
                             "required": ["dxf_urls"]
@@ -77,10 +105,15 @@ async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
                     },
                     {
                         "name": "get_nesting_status",
-                        "description": "Get the current status of the nesting service",
+                        "description": "Get the status of one nesting job, or of all queued and running jobs",
                         "inputSchema": {
                             "type": "object",
-                            "properties": {}
+                            "properties": {
+                                "job_id": {
+                                    "type": "string",
+                                    "description": "Job id returned by nest_parts. Omit for a summary of all jobs."
+                                }
+                            }
                         }
                     }
                 ]
@@ -121,148 +154,251 @@ async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
             }
         }
 
-# Global state for tracking nesting operations
-nesting_status = {
-    "is_running": False,
-    "message": "Ready"
-}
+# Nesting jobs run in a bounded process pool so the CPU-bound placement search
+# never blocks the event loop, and several workflows can nest at the same time
+MAX_WORKERS = int(os.environ.get('NESTING_MAX_WORKERS', min(4, os.cpu_count() or 1)))
+# Finished jobs kept around for get_nesting_status
+MAX_FINISHED_JOBS = 100
 
-async def nest_parts(
-    dxf_urls: List[str],
-    sheet_width: float = 1000.0,
-    sheet_height: float = 500.0,
-    spacing: float = 2.0
+jobs: Dict[str, Dict[str, Any]] = {}
+job_queue: Optional[asyncio.Queue] = None
+executor: Optional[ProcessPoolExecutor] = None
+base_output_dir: Optional[str] = None
+
+def run_nesting_job(
+    dxf_files: List[str],
+    sheet_width: float,
+    sheet_height: float,
+    spacing: float,
+    stock_sheets: Optional[List[Dict]],
+    output_dir: str
 ) -> Dict:
-    """Nest DXF parts on a sheet."""
-    global nesting_status
+    """Run one nesting job (executes in a worker process)."""
+    nester = DXFNester(sheet_width, sheet_height, spacing, output_dir=output_dir, output_name='nested_layout')
+    os.makedirs(output_dir, exist_ok=True)
     
-    if nesting_status["is_running"]:
-        return {
-            "error": "Nesting operation already in progress",
-            "message": nesting_status["message"]
-        }
+    # Progress prints go to stderr; stdout carries the JSON-RPC stream.
+    # Profiled into the job's output_dir (or NESTING_PROFILE_DIR) when NESTING_PROFILE is set
+    with contextlib.redirect_stdout(sys.stderr), profiled(output_dir):
+        if stock_sheets:
+            result = nester.nest_parts_on_stock(dxf_files, stock_sheets)
+        else:
+            result = nester.nest_parts(dxf_files)
+    result['metrics'] = nester.metrics.as_dict()
+    return result
+
+def ensure_scheduler():
+    """Start the process pool and queue workers on first use."""
+    global job_queue, executor, base_output_dir
     
-    nesting_status["is_running"] = True
-    nesting_status["message"] = "Starting nesting operation..."
+    if job_queue is None:
+        base_output_dir = os.environ.get('OUTPUT_DIR') or tempfile.mkdtemp(prefix='nesting_')
+        job_queue = asyncio.Queue()
+        # Spawn rather than fork: forking while the stdin reader and httpx
+        # threads hold locks can deadlock the workers
+        executor = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        for _ in range(MAX_WORKERS):
+            asyncio.create_task(job_worker())
+
+async def job_worker():
+    """Take queued jobs one at a time and run them."""
+    while True:
+        job = await job_queue.get()
+        try:
+            job["result"] = await run_job(job)
+            job["status"] = "failed" if "error" in job["result"] else "completed"
+            job["message"] = job["result"]["message"]
+        except Exception as e:
+            job["status"] = "failed"
+            job["message"] = f"Error: {str(e)}"
+            job["result"] = {
+                "error": f"Nesting operation failed: {str(e)}",
+                "utilization_percent": 0.0,
+                "placed_count": 0,
+                "total_parts": len(job["dxf_urls"]),
+                "message": job["message"]
+            }
+        finally:
+            job["finished_at"] = datetime.now().isoformat()
+            job["future"].set_result(job["result"])
+            job_queue.task_done()
+            prune_finished_jobs()
+
+def prune_finished_jobs():
+    """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS."""
+    finished = [job_id for job_id, job in jobs.items() if job["status"] in ("completed", "failed")]
+    for job_id in finished[:-MAX_FINISHED_JOBS]:
+        del jobs[job_id]
+
+async def run_job(job: Dict[str, Any]) -> Dict:
+    """Download a job's DXF files and nest them in the process pool."""
+    args = job["arguments"]
+    dxf_urls = job["dxf_urls"]
+    job["started_at"] = datetime.now().isoformat()
+    job["status"] = "downloading"
     
-    try:
-        # Create temporary directory for DXF files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Download all DXF files
-            downloaded_files = []
-            url_to_file_map = {}
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for i, url in enumerate(dxf_urls):
-                    nesting_status["message"] = f"Downloading file {i+1}/{len(dxf_urls)}..."
+    # Create temporary directory for DXF files
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Download all DXF files
+        downloaded_files = []
+        url_to_file_map = {}
+        download_start = time.perf_counter()
+        
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            for i, url in enumerate(dxf_urls):
+                job["message"] = f"Downloading file {i+1}/{len(dxf_urls)}..."
+                
+                try:
+                    filename = f"part_{i}_{Path(url).name}"
+                    if not filename.endswith('.dxf'):
+                        filename += '.dxf'
                     
-                    try:
-                        filename = f"part_{i}_{Path(url).name}"
-                        if not filename.endswith('.dxf'):
-                            filename += '.dxf'
-                        
-                        filepath = os.path.join(temp_dir, filename)
-                        response = await client.get(url)
-                        response.raise_for_status()
-                        
-                        with open(filepath, 'wb') as f:
-                            f.write(response.content)
-                        
-                        downloaded_files.append(filepath)
-                        url_to_file_map[filepath] = url
-                        
-                    except Exception as e:
-                        print(f"Error downloading {url}: {e}", file=sys.stderr)
-                        continue
-            
-            if not downloaded_files:
-                return {
-                    "error": "No DXF files could be downloaded",
-                    "utilization_percent": 0.0,
-                    "placed_count": 0,
-                    "total_parts": len(dxf_urls),
-                    "message": "Failed to download any DXF files"
-                }
-            
-            # Perform nesting
-            nesting_status["message"] = "Running nesting algorithm..."
-            nester = DXFNester(sheet_width, sheet_height, spacing)
-            
-            # Set output directory environment variable
-            output_dir = os.environ.get('OUTPUT_DIR', tempfile.mkdtemp())
-            os.environ['OUTPUT_DIR'] = output_dir
-            os.environ['OUTPUT_NAME'] = 'nested_layout'
-            
-            # Create output directory if it doesn't exist
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Run nesting
-            result = nester.nest_parts(downloaded_files)
-            
-            # Map unfittable files back to URLs
-            unfittable_urls = []
-            for filepath in result.get('unfittable_parts', []):
-                if filepath in url_to_file_map:
-                    unfittable_urls.append(url_to_file_map[filepath])
-            
-            # Prepare response
-            response = {
-                "utilization_percent": result['utilization'],
-                "placed_count": result.get('placed_count', 0),
+                    filepath = os.path.join(temp_dir, filename)
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    
+                    with open(filepath, 'wb') as f:
+                        f.write(response.content)
+                    
+                    downloaded_files.append(filepath)
+                    url_to_file_map[filepath] = url
+                    
+                except Exception as e:
+                    print(f"Error downloading {url}: {e}", file=sys.stderr)
+                    continue
+        download_time = time.perf_counter() - download_start
+        
+        if not downloaded_files:
+            return {
+                "error": "No DXF files could be downloaded",
+                "utilization_percent": 0.0,
+                "placed_count": 0,
                 "total_parts": len(dxf_urls),
-                "unfittable_urls": unfittable_urls,
-                "nested_dxf_path": result.get('nested_dxf'),
-                "message": result['message']
+                "message": "Failed to download any DXF files"
             }
-            
-            return response
-            
-    except Exception as e:
-        return {
-            "error": f"Nesting operation failed: {str(e)}",
-            "utilization_percent": 0.0,
-            "placed_count": 0,
+        
+        # Perform nesting in the process pool; every job writes to its own directory
+        job["status"] = "running"
+        job["message"] = "Running nesting algorithm..."
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            executor,
+            run_nesting_job,
+            downloaded_files,
+            args["sheet_width"],
+            args["sheet_height"],
+            args["spacing"],
+            args["stock_sheets"],
+            job["output_dir"]
+        )
+        metrics = result['metrics']
+        metrics['timings_s']['download'] = round(download_time, 4)
+        
+        # Map unfittable files back to URLs
+        unfittable_urls = []
+        for filepath in result.get('unfittable_parts', []):
+            if filepath in url_to_file_map:
+                unfittable_urls.append(url_to_file_map[filepath])
+        
+        # Prepare response
+        response = {
+            "job_id": job["job_id"],
+            "utilization_percent": result['utilization'],
+            "placed_count": result.get('placed_count', 0),
             "total_parts": len(dxf_urls),
-            "message": f"Error: {str(e)}"
+            "unfittable_urls": unfittable_urls,
+            "nested_dxf_path": result.get('nested_dxf'),
+            "message": result['message'],
+            "metrics": metrics
         }
+        if 'sheets' in result:
+            response["nested_dxf_paths"] = result['nested_dxfs']
+            response["sheets"] = result['sheets']
+            response["total_cost"] = result['total_cost']
+        
+        return response
+
+def job_summary(job: Dict[str, Any]) -> Dict:
+    """Public view of a job record."""
+    summary = {
+        key: job[key]
+        for key in ("job_id", "status", "message", "submitted_at", "started_at", "finished_at", "output_dir")
+    }
+    summary["total_parts"] = len(job["dxf_urls"])
+    if job["result"] is not None:
+        summary["result"] = job["result"]
+    return summary
+
+async def nest_parts(
+    dxf_urls: List[str],
+    sheet_width: float = 1000.0,
+    sheet_height: float = 500.0,
+    spacing: float = 2.0,
+    stock_sheets: Optional[List[Dict]] = None,
+    wait: bool = True
+) -> Dict:
+    """Queue a nesting job; return its result, or just the job id if wait is False."""
+    ensure_scheduler()
     
-    finally:
-        nesting_status["is_running"] = False
-        nesting_status["message"] = "Ready"
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "message": f"Queued behind {job_queue.qsize()} jobs",
+        "submitted_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "output_dir": os.path.join(base_output_dir, job_id),
+        "dxf_urls": dxf_urls,
+        "arguments": {
+            "sheet_width": sheet_width,
+            "sheet_height": sheet_height,
+            "spacing": spacing,
+            "stock_sheets": stock_sheets
+        },
+        "result": None,
+        "future": asyncio.get_running_loop().create_future()
+    }
+    jobs[job_id] = job
+    await job_queue.put(job)
+    
+    if not wait:
+        return job_summary(job)
+    return await asyncio.shield(job["future"])
 
-async def get_nesting_status() -> Dict:
-    """Check if a nesting operation is currently running."""
-    return nesting_status
+async def get_nesting_status(job_id: Optional[str] = None) -> Dict:
+    """Status of one job, or a summary of all jobs when no job_id is given."""
+    if job_id is not None:
+        if job_id not in jobs:
+            return {"error": f"Unknown job: {job_id}"}
+        return job_summary(jobs[job_id])
+    
+    active = [job for job in jobs.values() if job["status"] in ("downloading", "running")]
+    queued = [job for job in jobs.values() if job["status"] == "queued"]
+    if active or queued:
+        message = f"{len(active)} jobs running, {len(queued)} queued"
+    else:
+        message = "Ready"
+    return {
+        "is_running": bool(active),
+        "message": message,
+        "max_workers": MAX_WORKERS,
+        "running": len(active),
+        "queued": len(queued),
+        "jobs": [
+            {key: job[key] for key in ("job_id", "status", "message", "submitted_at")}
+            for job in jobs.values()
+        ]
+    }
 
 async def main():
     """Main MCP server loop."""
-    while True:
-        try:
-            # Read JSON-RPC request from stdin
-            line = sys.stdin.readline()
-            if not line:
-                break
-                
-            request = json.loads(line.strip())
-            response = await handle_mcp_request(request)
-            
-            # Write JSON-RPC response to stdout
-            print(json.dumps(response), flush=True)
-            
-        except json.JSONDecodeError:
-            # Invalid JSON, ignore
-            continue
-        except Exception as e:
-            # Send error response
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
-                }
-            }
-            print(json.dumps(error_response), flush=True)
+    await StdioTransport(handle_mcp_request).serve()
+    if executor is not None:
+        executor.shutdown()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
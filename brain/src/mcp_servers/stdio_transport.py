@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Asyncio JSON-RPC transport over stdin/stdout shared by the Python MCP servers.
+
+Requests are read without blocking the event loop and each one is handled as
+its own task, so a slow tool call does not hold up tools/list or status polls.
+Responses are written as soon as they are ready and carry the request id, so
+they may come back out of order. A `$/cancelRequest` notification cancels the
+matching in-flight request, and `$/metrics` returns request latency statistics.
+
+Malformed input never stops the transport: unparsable or oversized lines get
+a parse error, and messages that are not valid requests (params that are not
+an object, an id already in flight, ...) get an invalid request error.
+"""
+
+import sys
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Largest single JSON-RPC message accepted on stdin
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# Latency samples kept per method for the percentiles
+LATENCY_WINDOW = 1000
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+INTERNAL_ERROR = -32603
+# Error code used by LSP/MCP clients for cancelled requests
+REQUEST_CANCELLED = -32800
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+class MessageTooLarge(Exception):
+    """A line on stdin was longer than the reader's limit and was skipped."""
+
+async def read_message(reader: asyncio.StreamReader) -> bytes:
+    """Read one line from reader, or b"" at the end of the stream.
+
+    A line longer than the reader's limit is read to its end and dropped,
+    then MessageTooLarge is raised, so the next call starts at the next line.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        # Last line without a newline, or nothing at the end of the stream
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+
+    while True:
+        # LimitOverrunError leaves the data in the buffer: drop what was scanned
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            break
+        except asyncio.IncompleteReadError:
+            break
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+    raise MessageTooLarge()
+
+class RequestMetrics:
+    """Latency statistics of the requests handled by a transport."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.methods: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, method: str, seconds: float, outcome: str):
+        stats = self.methods.setdefault(method, {
+            "count": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "total_s": 0.0,
+            "max_s": 0.0,
+            "recent": deque(maxlen=LATENCY_WINDOW)
+        })
+        stats["count"] += 1
+        if outcome == "error":
+            stats["errors"] += 1
+        elif outcome == "cancelled":
+            stats["cancelled"] += 1
+        stats["total_s"] += seconds
+        stats["max_s"] = max(stats["max_s"], seconds)
+        stats["recent"].append(seconds)
+
+    def as_dict(self, in_flight: int = 0) -> Dict[str, Any]:
+        methods = {}
+        for method, stats in self.methods.items():
+            recent = sorted(stats["recent"])
+            methods[method] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "cancelled": stats["cancelled"],
+                "mean_s": round(stats["total_s"] / stats["count"], 4),
+                "p50_s": round(recent[len(recent) // 2], 4),
+                "p95_s": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 4),
+                "max_s": round(stats["max_s"], 4)
+            }
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "in_flight": in_flight,
+            "methods": methods
+        }
+
+class StdioTransport:
+    """Serve a JSON-RPC request handler over stdin/stdout.
+
+    The handler receives the decoded request and returns the full response
+    dict (or None). Messages without an id are notifications: the handler
+    still sees them, but nothing is written back.
+    """
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+        self.in_flight: Dict[Any, asyncio.Task] = {}
+        self.metrics = RequestMetrics()
+
+    async def serve(self):
+        """Read requests until stdin closes, then wait for in-flight requests."""
+        reader = await self._open_stdin()
+        while True:
+            try:
+                line = await reader()
+            except MessageTooLarge:
+                self.send(self._error(None, PARSE_ERROR, f"Message larger than {MAX_MESSAGE_SIZE} bytes"))
+                continue
+            if not line:
+                break
+            try:
+                self._dispatch(line)
+            except Exception as e:
+                self.send(self._error(None, INTERNAL_ERROR, f"Internal error: {str(e)}"))
+
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight.values(), return_exceptions=True)
+
+    async def _open_stdin(self) -> Callable[[], Awaitable[bytes]]:
+        """Return a coroutine function reading one line from stdin."""
+        loop = asyncio.get_running_loop()
+        try:
+            reader = asyncio.StreamReader(limit=MAX_MESSAGE_SIZE)
+            await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer
+            )
+            return lambda: read_message(reader)
+        except (ValueError, OSError):
+            # Regular files cannot be registered with the event loop;
+            # read them from a thread instead
+            async def read_line() -> bytes:
+                return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+            return read_line
+
+    def _dispatch(self, line: bytes):
+        try:
+            request = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.send(self._error(None, PARSE_ERROR, "Parse error"))
+            return
+        if not isinstance(request, dict):
+            self.send(self._error(None, INVALID_REQUEST, "Invalid request: expected an object"))
+            return
+
+        error = self._invalid(request)
+        if error:
+            # Only requests get an answer; a malformed notification is dropped
+            if "id" in request:
+                request_id = request["id"] if isinstance(request["id"], (str, int, float)) else None
+                self.send(self._error(request_id, INVALID_REQUEST, f"Invalid request: {error}"))
+            return
+
+        method = request["method"]
+        if method == "$/cancelRequest":
+            self.cancel(request.get("params", {}).get("id"))
+            return
+        if method == "$/metrics" and "id" in request:
+            self.send({
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "result": self.metrics.as_dict(len(self.in_flight))
+            })
+            return
+
+        task = asyncio.create_task(self._handle(request))
+        # Keep a reference to notification tasks until they finish
+        key = request["id"] if "id" in request else ("notification", id(task))
+        self.in_flight[key] = task
+        task.add_done_callback(lambda task: self._finished(key, request, task))
+
+    def _invalid(self, request: Dict[str, Any]) -> Optional[str]:
+        """Why a decoded message is not a valid request, or None if it is."""
+        if not isinstance(request.get("method"), str):
+            return "'method' must be a string"
+        if "params" in request and not isinstance(request["params"], dict):
+            return "'params' must be an object"
+        if "id" in request:
+            request_id = request["id"]
+            if request_id is not None and not isinstance(request_id, (str, int, float)):
+                return "'id' must be a string or a number"
+            if request_id in self.in_flight:
+                # Its response could not be told apart from the running one's
+                return f"id {request_id!r} is already in flight"
+        return None
+
+    def cancel(self, request_id: Any):
+        """Cancel an in-flight request; unknown or finished ids are ignored."""
+        try:
+            task = self.in_flight.get(request_id)
+        except TypeError:
+            # Unhashable id
+            return
+        if task is not None:
+            task.cancel()
+
+    def _finished(self, key: Any, request: Dict[str, Any], task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            self.in_flight.pop(key)
+        if task.cancelled():
+            # Cancelled before it started, so _handle never ran to answer it
+            self.metrics.record(self._label(request), 0.0, "cancelled")
+            if "id" in request:
+                self.send(self._error(request["id"], REQUEST_CANCELLED, "Request cancelled"))
+
+    def _label(self, request: Dict[str, Any]) -> str:
+        """Name a request's latency is recorded under."""
+        label = request.get("method") or "unknown"
+        if label == "tools/call":
+            label = f"tools/call:{request.get('params', {}).get('name')}"
+        return label
+
+    async def _handle(self, request: Dict[str, Any]):
+        request_id = request.get("id")
+        is_notification = "id" not in request
+        label = "unknown"
+
+        start = time.perf_counter()
+        outcome = "ok"
+        response = None
+        try:
+            label = self._label(request)
+            response = await self.handler(request)
+            if response is not None and "error" in response:
+                outcome = "error"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            response = self._error(request_id, REQUEST_CANCELLED, "Request cancelled")
+        except Exception as e:
+            outcome = "error"
+            response = self._error(request_id, INTERNAL_ERROR, f"Internal error: {str(e)}")
+        finally:
+            self.metrics.record(label, time.perf_counter() - start, outcome)
+
+        if response is not None and not is_notification:
+            try:
+                self.send(response)
+            except (TypeError, ValueError) as e:
+                # The handler returned something that is not JSON
+                self.send(self._error(request_id, INTERNAL_ERROR, f"Internal error: {str(e)}"))
+
+    def _error(self, request_id: Any, code: int, message: str) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": code,
+                "message": message
+            }
+        }
+
+    def send(self, message: Dict[str, Any]):
+        """Write one JSON-RPC message as a line on stdout."""
+        # Responses are written from the event loop thread only, so lines never interleave
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
@@ -0,0 +1,99 @@
+import pytest
+import os
+import sys
+import asyncio
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import ezdxf
+
+# Add brain/src and the repository root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
+
+from mcp_servers.nesting import server
+
+
+def make_rectangle_dxf(path, width, height):
+    """Write a DXF containing a single closed rectangle"""
+    doc = ezdxf.new('R2010')
+    doc.modelspace().add_lwpolyline(
+        [(0, 0), (width, 0), (width, height), (0, height)], close=True
+    )
+    doc.saveas(path)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def dxf_server(tmp_path):
+    """Serve DXF files from a directory over HTTP; yields a URL maker"""
+    parts = tmp_path / 'parts'
+    parts.mkdir()
+    make_rectangle_dxf(parts / 'plate.dxf', 40, 30)
+    make_rectangle_dxf(parts / 'tab.dxf', 20, 10)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(parts)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield lambda name: f"http://127.0.0.1:{httpd.server_address[1]}/{name}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    """A fresh job queue and process pool writing under tmp_path"""
+    monkeypatch.setenv('OUTPUT_DIR', str(tmp_path / 'output'))
+    monkeypatch.delenv('NESTING_PROFILE', raising=False)
+    monkeypatch.setattr(server, 'MAX_WORKERS', 2)
+    monkeypatch.setattr(server, 'jobs', {})
+    monkeypatch.setattr(server, 'job_queue', None)
+    monkeypatch.setattr(server, 'executor', None)
+    monkeypatch.setattr(server, 'base_output_dir', None)
+    yield tmp_path / 'output'
+    if server.executor is not None:
+        server.executor.shutdown(wait=True)
+
+
+def test_concurrent_jobs_polled_to_completion(scheduler, dxf_server):
+    """Test two jobs submitted at once both finish, one polled with get_nesting_status"""
+    async def run():
+        polled = await server.nest_parts(
+            [dxf_server('plate.dxf'), dxf_server('plate.dxf')], sheet_width=200, sheet_height=100, wait=False
+        )
+        waited = asyncio.create_task(
+            server.nest_parts([dxf_server('tab.dxf')], sheet_width=200, sheet_height=100)
+        )
+        statuses = [polled["status"]]
+        while statuses[-1] not in ("completed", "failed"):
+            await asyncio.sleep(0.05)
+            status = await server.get_nesting_status(polled["job_id"])
+            statuses.append(status["status"])
+        return polled, status, statuses, await waited, await server.get_nesting_status()
+
+    polled, status, statuses, waited, summary = asyncio.run(asyncio.wait_for(run(), 120))
+
+    assert statuses[0] == "queued"
+    assert statuses[-1] == "completed"
+    assert status["job_id"] == polled["job_id"]
+    assert status["result"]["placed_count"] == 2
+    assert status["result"]["total_parts"] == 2
+    assert os.path.exists(status["result"]["nested_dxf_path"])
+    assert status["result"]["nested_dxf_path"].startswith(str(scheduler / polled["job_id"]))
+
+    assert waited["job_id"] != polled["job_id"]
+    assert waited["placed_count"] == 1
+    assert waited["nested_dxf_path"].startswith(str(scheduler / waited["job_id"]))
+
+    assert summary["message"] == "Ready"
+    assert (summary["running"], summary["queued"]) == (0, 0)
+    assert {job["status"] for job in summary["jobs"]} == {"completed"}
+
+
+def test_unknown_job_status():
+    """Test polling a job id that was never submitted"""
+    assert "error" in asyncio.run(server.get_nesting_status("missing"))
@@ -0,0 +1,171 @@
+import pytest
+import os
+import sys
+import json
+import asyncio
+
+# Add brain/src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from mcp_servers import stdio_transport
+from mcp_servers.stdio_transport import (
+    INVALID_REQUEST, PARSE_ERROR, REQUEST_CANCELLED, MessageTooLarge, StdioTransport, read_message
+)
+
+
+async def echo_handler(request):
+    """Answers after params.delay seconds; fails for the 'fail' method"""
+    params = request.get("params", {})
+    await asyncio.sleep(params.get("delay", 0))
+    if request["method"] == "fail":
+        raise RuntimeError("handler failed")
+    return {"jsonrpc": "2.0", "id": request.get("id"), "result": params}
+
+
+def line(message):
+    if not isinstance(message, (str, bytes)):
+        message = json.dumps(message)
+    if isinstance(message, str):
+        message = message.encode("utf-8")
+    return message + b"\n"
+
+
+def serve(capsys, *messages, handler=echo_handler, limit=stdio_transport.MAX_MESSAGE_SIZE):
+    """Serve messages as stdin lines and return the transport and the decoded responses"""
+    transport = StdioTransport(handler)
+
+    async def open_stdin():
+        reader = asyncio.StreamReader(limit=limit)
+        for message in messages:
+            reader.feed_data(line(message))
+        reader.feed_eof()
+        return lambda: read_message(reader)
+
+    transport._open_stdin = open_stdin
+    asyncio.run(transport.serve())
+    responses = [json.loads(out) for out in capsys.readouterr().out.splitlines()]
+    return transport, responses
+
+
+def test_responses_come_back_as_requests_finish(capsys):
+    """Test a slow request does not hold up a fast one behind it"""
+    _, responses = serve(
+        capsys,
+        {"jsonrpc": "2.0", "id": 1, "method": "slow", "params": {"delay": 0.2}},
+        {"jsonrpc": "2.0", "id": 2, "method": "fast", "params": {}},
+    )
+
+    assert [response["id"] for response in responses] == [2, 1]
+    assert responses[1]["result"] == {"delay": 0.2}
+
+
+def test_cancel_request(capsys):
+    """Test $/cancelRequest answers the request as cancelled and frees its id"""
+    transport, responses = serve(
+        capsys,
+        {"jsonrpc": "2.0", "id": 1, "method": "slow", "params": {"delay": 5}},
+        {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 1}},
+        {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": "unknown"}},
+    )
+
+    assert responses == [{"jsonrpc": "2.0", "id": 1, "error": {"code": REQUEST_CANCELLED, "message": "Request cancelled"}}]
+    assert transport.in_flight == {}
+    assert transport.metrics.as_dict()["methods"]["slow"]["cancelled"] == 1
+
+
+def test_cancel_request_while_running(capsys):
+    """Test a request cancelled after it started is answered once"""
+    async def handler(request):
+        if request["method"] == "slow":
+            await asyncio.sleep(0.5)
+        return {"jsonrpc": "2.0", "id": request["id"], "result": {}}
+
+    transport = StdioTransport(handler)
+
+    async def run():
+        transport._dispatch(line({"jsonrpc": "2.0", "id": 7, "method": "slow"}))
+        await asyncio.sleep(0.05)
+        transport._dispatch(line({"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 7}}))
+        await asyncio.gather(*transport.in_flight.values(), return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    responses = [json.loads(out) for out in capsys.readouterr().out.splitlines()]
+
+    assert [response["error"]["code"] for response in responses] == [REQUEST_CANCELLED]
+    assert transport.in_flight == {}
+
+
+@pytest.mark.parametrize("message, code", [
+    ('{"jsonrpc": "2.0", "id": 1, "method": ', PARSE_ERROR),
+    (b'\xff\xfe', PARSE_ERROR),
+    ('[1, 2]', INVALID_REQUEST),
+    ({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": "oops"}, INVALID_REQUEST),
+    ({"jsonrpc": "2.0", "id": 1, "method": 5}, INVALID_REQUEST),
+    ({"jsonrpc": "2.0", "id": [1], "method": "ping"}, INVALID_REQUEST),
+])
+def test_malformed_input_is_answered(capsys, message, code):
+    """Test malformed messages get an error and the transport keeps serving"""
+    transport, responses = serve(capsys, message, {"jsonrpc": "2.0", "id": 2, "method": "ping", "params": {}})
+
+    assert responses[0]["error"]["code"] == code
+    assert responses[1] == {"jsonrpc": "2.0", "id": 2, "result": {}}
+    assert transport.in_flight == {}
+
+
+def test_malformed_notifications_are_dropped(capsys):
+    """Test notifications with bad params are not answered and do not stop the transport"""
+    _, responses = serve(
+        capsys,
+        {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": None},
+        {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": [1]}},
+        {"jsonrpc": "2.0", "id": 2, "method": "ping", "params": {}},
+    )
+
+    assert responses == [{"jsonrpc": "2.0", "id": 2, "result": {}}]
+
+
+def test_handler_errors_are_answered(capsys):
+    """Test a failing handler gets an internal error with the request's id"""
+    transport, responses = serve(capsys, {"jsonrpc": "2.0", "id": "a", "method": "fail"})
+
+    assert responses[0]["id"] == "a"
+    assert responses[0]["error"]["code"] == -32603
+    assert transport.metrics.as_dict()["methods"]["fail"]["errors"] == 1
+
+
+def test_duplicate_id_is_rejected(capsys):
+    """Test a second request with an id in flight is refused instead of replacing the first"""
+    transport, responses = serve(
+        capsys,
+        {"jsonrpc": "2.0", "id": 1, "method": "slow", "params": {"delay": 0.1}},
+        {"jsonrpc": "2.0", "id": 1, "method": "fast", "params": {}},
+    )
+
+    assert responses[0]["error"]["code"] == INVALID_REQUEST
+    assert responses[1] == {"jsonrpc": "2.0", "id": 1, "result": {"delay": 0.1}}
+    assert transport.in_flight == {}
+
+
+def test_oversized_message_is_skipped(capsys):
+    """Test a line over the size limit gets a parse error and the next line is served"""
+    big = {"jsonrpc": "2.0", "id": 1, "method": "ping", "params": {"data": "x" * 500}}
+    _, responses = serve(capsys, big, {"jsonrpc": "2.0", "id": 2, "method": "ping", "params": {}}, limit=64)
+
+    assert responses[0]["id"] is None
+    assert responses[0]["error"]["code"] == PARSE_ERROR
+    assert responses[1] == {"jsonrpc": "2.0", "id": 2, "result": {}}
+
+
+def test_read_message_skips_to_next_line():
+    """Test read_message drops the whole oversized line, arriving in pieces or not"""
+    async def run():
+        reader = asyncio.StreamReader(limit=16)
+        reader.feed_data(b"x" * 40)
+        reader.feed_data(b"y" * 40 + b"\nshort\nlast")
+        reader.feed_eof()
+        with pytest.raises(MessageTooLarge):
+            await read_message(reader)
+        return [await read_message(reader) for _ in range(3)]
+
+    assert asyncio.run(run()) == [b"short\n", b"last", b""]
@@ -5,16 +5,46 @@ import os
 import sys
 import json
 import asyncio
+import shutil
 import tempfile
-import subprocess
+import time
+import uuid
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import httpx
 from datetime import datetime
 
+# Add src/ to Python path for the shared transport
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from mcp_servers.stdio_transport import StdioTransport
+
+# The unfolder scripts sit next to this server in Docker, or under webdemo/ in the monorepo
+UNFOLDER_SRC_CANDIDATES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'unfolder'),
+    '/app/src/mcp_servers/unfolder/src/unfolder',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..',
+                 'webdemo', 'docker', 'unfolder', 'src', 'unfolder'),
+]
+UNFOLDER_SRC_DIR = next(
+    (path for path in UNFOLDER_SRC_CANDIDATES if os.path.exists(os.path.join(path, 'unfold.py'))),
+    UNFOLDER_SRC_CANDIDATES[0]
+)
+sys.path.insert(0, UNFOLDER_SRC_DIR)
+
+from worker_pool import get_pool, UnfoldError
+from result_cache import get_cache
+from metrics import read_metrics
+from unfold_outputs import DEFAULT_OUTPUTS
+from materials import material_path
+
+# Warm FreeCAD workers; UNFOLD_WORKERS=0 starts FreeCAD per request instead
+USE_WORKER_POOL = os.environ.get('UNFOLD_WORKERS', '2') != '0'
+
 # Global state for tracking unfolding operations
 unfolder_status = {
     "is_running": False,
+    "active_jobs": 0,
     "message": "Ready"
 }
 
@@ -59,6 +89,57 @@ async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
                                     "type": "number",
                                     "description": "K-factor for bend calculations (default: 0.38)",
                                     "default": 0.38
+                                },
+                                "material": {
+                                    "type": "string",
+                                    "description": "Name of a .json/.csv material file in UNFOLD_MATERIAL_DIR whose k-factor table replaces k_factor (default: UNFOLD_MATERIAL)"
+                                }
+                            },
+                            "required": ["step_url"]
+                        }
+                    },
+                    {
+                        "name": "unfold_step_files",
+                        "description": "Convert several STEP files to DXF in one batch",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "step_urls": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "URLs of the STEP files to unfold"
+                                },
+                                "k_factor": {
+                                    "type": "number",
+                                    "description": "K-factor for bend calculations (default: 0.38)",
+                                    "default": 0.38
+                                },
+                                "material": {
+                                    "type": "string",
+                                    "description": "Name of a .json/.csv material file in UNFOLD_MATERIAL_DIR whose k-factor table replaces k_factor (default: UNFOLD_MATERIAL)"
+                                }
+                            },
+                            "required": ["step_urls"]
+                        }
+                    },
+                    {
+                        "name": "unfold_assembly",
+                        "description": "Convert every sheet metal part of a STEP assembly to DXF, one file per distinct part",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "step_url": {
+                                    "type": "string",
+                                    "description": "URL to the STEP assembly to unfold"
+                                },
+                                "k_factor": {
+                                    "type": "number",
+                                    "description": "K-factor for bend calculations (default: 0.38)",
+                                    "default": 0.38
+                                },
+                                "material": {
+                                    "type": "string",
+                                    "description": "Name of a .json/.csv material file in UNFOLD_MATERIAL_DIR whose k-factor table replaces k_factor (default: UNFOLD_MATERIAL)"
                                 }
                             },
                             "required": ["step_url"]
@@ -128,6 +209,10 @@ async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
         
         if tool_name == "unfold_step_file":
             result = await unfold_step_file(**arguments)
+        elif tool_name == "unfold_step_files":
+            result = await unfold_step_files(**arguments)
+        elif tool_name == "unfold_assembly":
+            result = await unfold_assembly(**arguments)
         elif tool_name == "get_unfolder_status":
             result = await get_unfolder_status(**arguments)
         elif tool_name == "upload_unfolded_result":
@@ -160,9 +245,175 @@ async def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any]:
             }
         }
 
+async def run_unfold_subprocess(step_path: str, k_factor: float, output_dir: str, assembly: bool = False,
+                                material: Optional[str] = None) -> Dict:
+    """Unfold in a fresh FreeCAD process (used when the worker pool is off)."""
+    env = os.environ.copy()
+    env['K_FACTOR'] = str(k_factor)
+    env['OUTPUT_DIR'] = output_dir
+    env['UNFOLD_OUTPUTS'] = DEFAULT_OUTPUTS
+    if material:
+        env['UNFOLD_MATERIAL'] = material
+    if assembly:
+        env['UNFOLD_ASSEMBLY'] = '1'
+    
+    unfold_script = os.path.join(UNFOLDER_SRC_DIR, 'unfold.py')
+    print(f"Using unfold script: {unfold_script}", file=sys.stderr)
+    print(f"Script exists: {os.path.exists(unfold_script)}", file=sys.stderr)
+    
+    # Use FreeCADCmd for true headless operation
+    cmd = ['freecadcmd', '-c', unfold_script, step_path]
+    
+    print(f"Running command: {' '.join(cmd)}", file=sys.stderr)
+    
+    # Run as an asyncio subprocess so other requests are served meanwhile
+    process = None
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=env,
+            cwd=os.path.dirname(step_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=120)
+        stdout = stdout.decode(errors='replace')
+        stderr = stderr.decode(errors='replace')
+        
+        print(f"FreeCAD exit code: {process.returncode}", file=sys.stderr)
+        if stdout:
+            print(f"FreeCAD stdout: {stdout}", file=sys.stderr)
+        if stderr:
+            print(f"FreeCAD stderr: {stderr}", file=sys.stderr)
+        
+        if process.returncode != 0:
+            raise UnfoldError(f"FreeCAD exited with code {process.returncode}", stderr)
+        if assembly:
+            # unfold.py lists the parts it wrote in assembly.json
+            with open(os.path.join(output_dir, 'assembly.json')) as f:
+                return json.load(f)
+        return {
+            "dxf_path": os.path.join(output_dir, 'largest_face.dxf'),
+            "step_path": os.path.join(output_dir, 'unbend_model.step'),
+            "metrics": read_metrics(output_dir)
+        }
+    
+    except asyncio.TimeoutError:
+        raise UnfoldError("FreeCAD conversion timed out after 120 seconds")
+    finally:
+        # Timed out or cancelled: do not leave FreeCAD running
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+async def download_step(client: httpx.AsyncClient, step_url: str, directory: str) -> str:
+    """Download a STEP file into directory and return its path."""
+    filename = Path(step_url).name
+    if not filename.endswith(('.step', '.stp')):
+        filename = 'input.step'
+    
+    step_path = os.path.join(directory, filename)
+    
+    response = await client.get(step_url)
+    response.raise_for_status()
+    
+    with open(step_path, 'wb') as f:
+        f.write(response.content)
+    
+    print(f"Downloaded STEP file: {filename}", file=sys.stderr)
+    return step_path
+
+async def convert_step(step_path: str, k_factor: float, job_output_dir: str, source: str,
+                       material: Optional[str] = None) -> Dict:
+    """
+    Unfold a downloaded STEP file and move its DXF into OUTPUT_DIR.
+    
+    Uses the result cache, then the worker pool or a fresh FreeCAD process.
+    material is the path of a material file replacing k_factor.
+    Returns the same dictionary as unfold_step_file.
+    """
+    # Identical STEP bytes and settings were unfolded before: skip FreeCAD
+    cache = get_cache()
+    cache_key = None
+    result = None
+    if cache:
+        cache_key = await asyncio.to_thread(
+            cache.key, step_path, k_factor, outputs=DEFAULT_OUTPUTS, material_path=material
+        )
+        result = await asyncio.to_thread(cache.get, cache_key, job_output_dir)
+    
+    try:
+        if result is not None:
+            print(f"Unfold cache hit: {cache_key}", file=sys.stderr)
+        elif USE_WORKER_POOL:
+            result = await asyncio.to_thread(
+                get_pool().unfold, step_path, k_factor, job_output_dir, outputs=DEFAULT_OUTPUTS,
+                material_path=material
+            )
+            print(f"Unfolded in {result['elapsed_s']:.2f}s", file=sys.stderr)
+        else:
+            result = await run_unfold_subprocess(step_path, k_factor, job_output_dir, material=material)
+    except UnfoldError as e:
+        return {
+            "success": False,
+            "error": f"FreeCAD conversion failed: {e}",
+            "details": e.details,
+            "message": "Conversion failed"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"FreeCAD execution error: {str(e)}",
+            "message": "Execution failed"
+        }
+    
+    dxf_path = result.get("dxf_path")
+    if not dxf_path or not os.path.exists(dxf_path):
+        return {
+            "success": False,
+            "error": "FreeCAD conversion failed: No DXF output generated",
+            "message": "Conversion failed"
+        }
+    cached = result.get("cached", False)
+    if cache and not cached:
+        await asyncio.to_thread(cache.put, cache_key, result, {"k_factor": k_factor, "source": source})
+    
+    unique_dxf_path = move_to_output(dxf_path)
+    
+    return {
+        "success": True,
+        "dxf_path": unique_dxf_path,
+        "filename": os.path.basename(unique_dxf_path),
+        "k_factor": k_factor,
+        "cached": cached,
+        "metrics": result.get("metrics"),
+        "message": f"Successfully unfolded STEP file to DXF"
+    }
+
+def move_to_output(dxf_path: str) -> str:
+    """Move a DXF out of a temporary job directory under a unique name in OUTPUT_DIR."""
+    output_dir = os.environ.get('OUTPUT_DIR', '/tmp/unfolder_output')
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    unique_dxf_path = os.path.join(output_dir, f"unfolded_{timestamp}_{uuid.uuid4().hex[:6]}.dxf")
+    shutil.move(dxf_path, unique_dxf_path)
+    return unique_dxf_path
+
+def start_job(message: str):
+    unfolder_status["active_jobs"] += 1
+    unfolder_status["is_running"] = True
+    unfolder_status["message"] = message
+
+def finish_job():
+    unfolder_status["active_jobs"] -= 1
+    unfolder_status["is_running"] = unfolder_status["active_jobs"] > 0
+    if not unfolder_status["is_running"]:
+        unfolder_status["message"] = "Ready"
+
 async def unfold_step_file(
     step_url: str,
-    k_factor: float = 0.38
+    k_factor: float = 0.38,
+    material: Optional[str] = None
 ) -> Dict:
     """
     Convert STEP file to DXF for sheet metal fabrication.
@@ -170,25 +421,23 @@ async def unfold_step_file(
     Args:
         step_url: URL to the STEP file
         k_factor: K-factor for bend calculations (default: 0.38)
+        material: Material file in UNFOLD_MATERIAL_DIR replacing k_factor
+                  (default: UNFOLD_MATERIAL)
         
     Returns:
         Dictionary containing:
         - success: Boolean indicating if conversion succeeded
         - dxf_path: Path to the generated DXF file
+        - metrics: Timings of each unfold phase and counts of faces, edges, bends
         - message: Status message
         - error: Error message if failed
     """
-    global unfolder_status
-    
-    if unfolder_status["is_running"]:
-        return {
-            "success": False,
-            "error": "Unfolding operation already in progress",
-            "message": unfolder_status["message"]
-        }
+    try:
+        material = material_path(material)
+    except ValueError as e:
+        return {"success": False, "error": str(e), "message": "Invalid material"}
     
-    unfolder_status["is_running"] = True
-    unfolder_status["message"] = "Starting unfolding operation..."
+    start_job("Starting unfolding operation...")
     
     try:
         # Create temporary directory for files
@@ -198,20 +447,7 @@ async def unfold_step_file(
             
             async with httpx.AsyncClient(timeout=60.0) as client:
                 try:
-                    filename = Path(step_url).name
-                    if not filename.endswith(('.step', '.stp')):
-                        filename = 'input.step'
-                    
-                    step_path = os.path.join(temp_dir, filename)
-                    
-                    response = await client.get(step_url)
-                    response.raise_for_status()
-                    
-                    with open(step_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    print(f"Downloaded STEP file: {filename}", file=sys.stderr)
-                    
+                    step_path = await download_step(client, step_url, temp_dir)
                 except Exception as e:
                     return {
                         "success": False,
@@ -219,108 +455,231 @@ async def unfold_step_file(
                         "message": "Download failed"
                     }
             
-            # Create output directory
-            output_dir = os.environ.get('OUTPUT_DIR', '/tmp/unfolder_output')
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Set environment variables for the unfold script
-            env = os.environ.copy()
-            env['K_FACTOR'] = str(k_factor)
-            env['OUTPUT_DIR'] = output_dir
-            
-            # Path to the unfold script
-            unfold_script = os.path.abspath(os.path.join(
-                os.path.dirname(__file__), 
-                'src', 'unfolder', 'unfold.py'
-            ))
-            
-            if not os.path.exists(unfold_script):
-                # Try alternative path for Docker container
-                unfold_script = '/app/src/mcp_servers/unfolder/src/unfolder/unfold.py'
-            
-            print(f"Using unfold script: {unfold_script}", file=sys.stderr)
-            print(f"Script exists: {os.path.exists(unfold_script)}", file=sys.stderr)
-            
-            # Run FreeCAD in headless mode
             unfolder_status["message"] = "Running FreeCAD conversion..."
+            # Each job writes into its own directory so concurrent jobs cannot clobber each other
+            return await convert_step(step_path, k_factor, os.path.join(temp_dir, 'output'), step_url,
+                                      material)
             
-            # Use FreeCADCmd for true headless operation
-            cmd = ['freecadcmd', '-c', unfold_script, step_path]
-            
-            print(f"Running command: {' '.join(cmd)}", file=sys.stderr)
-            
-            try:
-                result = subprocess.run(
-                    cmd,
-                    env=env,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=120
-                )
-                
-                print(f"FreeCAD exit code: {result.returncode}", file=sys.stderr)
-                if result.stdout:
-                    print(f"FreeCAD stdout: {result.stdout}", file=sys.stderr)
-                if result.stderr:
-                    print(f"FreeCAD stderr: {result.stderr}", file=sys.stderr)
-                
-                # Check for output DXF file
-                dxf_filename = 'largest_face.dxf'
-                dxf_path = os.path.join(output_dir, dxf_filename)
-                
-                if result.returncode == 0 and os.path.exists(dxf_path):
-                    # Generate unique filename with timestamp
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    unique_dxf_filename = f"unfolded_{timestamp}.dxf"
-                    unique_dxf_path = os.path.join(output_dir, unique_dxf_filename)
-                    
-                    # Rename to unique filename
-                    os.rename(dxf_path, unique_dxf_path)
-                    
-                    return {
-                        "success": True,
-                        "dxf_path": unique_dxf_path,
-                        "filename": unique_dxf_filename,
-                        "k_factor": k_factor,
-                        "message": f"Successfully unfolded STEP file to DXF"
-                    }
-                else:
-                    error_msg = result.stderr if result.stderr else "No DXF output generated"
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Unfolding operation failed: {str(e)}",
+            "message": f"Error: {str(e)}"
+        }
+    
+    finally:
+        finish_job()
+
+async def unfold_step_files(
+    step_urls: List[str],
+    k_factor: float = 0.38,
+    material: Optional[str] = None
+) -> Dict:
+    """
+    Convert several STEP files to DXF in one call.
+    
+    All files are downloaded concurrently, then unfolded concurrently; the
+    worker pool bounds how many FreeCAD runs happen at once.
+    
+    Args:
+        step_urls: URLs of the STEP files
+        k_factor: K-factor for bend calculations (default: 0.38)
+        material: Material file in UNFOLD_MATERIAL_DIR replacing k_factor
+                  (default: UNFOLD_MATERIAL)
+        
+    Returns:
+        Dictionary containing:
+        - success: True if every file was unfolded
+        - files: One entry per URL, in order, with status, dxf_path and timings
+        - succeeded / failed: Counts of files
+        - total_s: Wall time of the whole batch
+    """
+    if not step_urls:
+        return {
+            "success": False,
+            "error": "No STEP URLs given",
+            "message": "Nothing to unfold"
+        }
+    try:
+        material = material_path(material)
+    except ValueError as e:
+        return {"success": False, "error": str(e), "message": "Invalid material"}
+    
+    start_job(f"Unfolding {len(step_urls)} STEP files...")
+    batch_start = time.monotonic()
+    
+    async def process(client: httpx.AsyncClient, index: int, step_url: str, temp_dir: str) -> Dict:
+        # A directory per file keeps equal file names apart
+        file_dir = os.path.join(temp_dir, str(index))
+        os.makedirs(file_dir)
+        entry = {"url": step_url, "timings": {}}
+        
+        start = time.monotonic()
+        try:
+            step_path = await download_step(client, step_url, file_dir)
+        except Exception as e:
+            entry["timings"]["download_s"] = round(time.monotonic() - start, 3)
+            entry.update(status="download_failed", error=f"Failed to download STEP file: {str(e)}")
+            return entry
+        entry["timings"]["download_s"] = round(time.monotonic() - start, 3)
+        
+        start = time.monotonic()
+        result = await convert_step(step_path, k_factor, os.path.join(file_dir, 'output'), step_url, material)
+        entry["timings"]["unfold_s"] = round(time.monotonic() - start, 3)
+        
+        if result["success"]:
+            entry.update(status="ok", dxf_path=result["dxf_path"],
+                         filename=result["filename"], cached=result["cached"],
+                         metrics=result["metrics"])
+        else:
+            entry.update(status="failed", error=result["error"])
+            if result.get("details"):
+                entry["details"] = result["details"]
+        return entry
+    
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                files = await asyncio.gather(*(
+                    process(client, index, step_url, temp_dir)
+                    for index, step_url in enumerate(step_urls)
+                ))
+        
+        succeeded = sum(1 for entry in files if entry["status"] == "ok")
+        return {
+            "success": succeeded == len(files),
+            "files": files,
+            "k_factor": k_factor,
+            "total": len(files),
+            "succeeded": succeeded,
+            "failed": len(files) - succeeded,
+            "total_s": round(time.monotonic() - batch_start, 3),
+            "message": f"Unfolded {succeeded} of {len(files)} STEP files"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Batch unfolding failed: {str(e)}",
+            "message": f"Error: {str(e)}"
+        }
+    
+    finally:
+        finish_job()
+
+async def unfold_assembly(
+    step_url: str,
+    k_factor: float = 0.38,
+    material: Optional[str] = None
+) -> Dict:
+    """
+    Convert every sheet metal part of a STEP assembly to DXF.
+    
+    Solids that are not sheet metal are skipped and identical solids are
+    unfolded once; the distinct parts are unfolded in parallel on the
+    worker pool.
+    
+    Args:
+        step_url: URL to the STEP assembly
+        k_factor: K-factor for bend calculations (default: 0.38)
+        material: Material file in UNFOLD_MATERIAL_DIR replacing k_factor
+                  (default: UNFOLD_MATERIAL)
+        
+    Returns:
+        Dictionary containing:
+        - success: True if every part was unfolded
+        - parts: One entry per distinct part with its dxf_path, the labels
+          of all its instances and their quantity
+        - skipped: Solids that are not sheet metal
+    """
+    try:
+        material = material_path(material)
+    except ValueError as e:
+        return {"success": False, "error": str(e), "message": "Invalid material"}
+    
+    start_job("Unfolding STEP assembly...")
+    start = time.monotonic()
+    
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            unfolder_status["message"] = "Downloading STEP file..."
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                try:
+                    step_path = await download_step(client, step_url, temp_dir)
+                except Exception as e:
                     return {
                         "success": False,
-                        "error": f"FreeCAD conversion failed: {error_msg}",
-                        "message": "Conversion failed",
-                        "exit_code": result.returncode
+                        "error": f"Failed to download STEP file: {str(e)}",
+                        "message": "Download failed"
                     }
-                    
-            except subprocess.TimeoutExpired:
-                return {
-                    "success": False,
-                    "error": "FreeCAD conversion timed out after 120 seconds",
-                    "message": "Conversion timeout"
-                }
-            except Exception as e:
+            
+            unfolder_status["message"] = "Running FreeCAD conversion..."
+            job_output_dir = os.path.join(temp_dir, 'output')
+            try:
+                if USE_WORKER_POOL:
+                    assembly = await asyncio.to_thread(
+                        get_pool().unfold_assembly, step_path, k_factor, job_output_dir,
+                        material_path=material, outputs=DEFAULT_OUTPUTS
+                    )
+                else:
+                    assembly = await run_unfold_subprocess(step_path, k_factor, job_output_dir, assembly=True,
+                                                           material=material)
+            except UnfoldError as e:
                 return {
                     "success": False,
-                    "error": f"FreeCAD execution error: {str(e)}",
-                    "message": "Execution failed"
+                    "error": f"FreeCAD conversion failed: {e}",
+                    "details": e.details,
+                    "message": "Conversion failed"
                 }
             
+            parts = []
+            for part in assembly["parts"]:
+                entry = {
+                    "name": part["name"],
+                    "instances": part["instances"],
+                    "quantity": len(part["instances"]),
+                    "thickness": part.get("thickness"),
+                    "status": "failed"
+                }
+                dxf_path = part.get("dxf_path")
+                if part.get("error"):
+                    entry["error"] = part["error"]
+                elif not dxf_path or not os.path.exists(dxf_path):
+                    entry["error"] = "No output DXF generated"
+                else:
+                    entry["status"] = "ok"
+                    entry["dxf_path"] = move_to_output(dxf_path)
+                    entry["filename"] = os.path.basename(entry["dxf_path"])
+                parts.append(entry)
+        
+        succeeded = sum(1 for entry in parts if entry["status"] == "ok")
+        return {
+            "success": bool(parts) and succeeded == len(parts),
+            "parts": parts,
+            "skipped": assembly["skipped"],
+            "k_factor": k_factor,
+            "succeeded": succeeded,
+            "failed": len(parts) - succeeded,
+            "total_s": round(time.monotonic() - start, 3),
+            "message": f"Unfolded {succeeded} of {len(parts)} sheet metal parts"
+        }
+    
     except Exception as e:
         return {
             "success": False,
-            "error": f"Unfolding operation failed: {str(e)}",
+            "error": f"Assembly unfolding failed: {str(e)}",
             "message": f"Error: {str(e)}"
         }
     
     finally:
-        unfolder_status["is_running"] = False
-        unfolder_status["message"] = "Ready"
+        finish_job()
 
 async def get_unfolder_status() -> Dict:
     """Check if an unfolding operation is currently running."""
-    return unfolder_status
+    status = dict(unfolder_status)
+    if USE_WORKER_POOL:
+        status["worker_pool"] = get_pool().status()
+    return status
 
 async def upload_unfolded_result(
     dxf_path: str,
@@ -461,33 +820,7 @@ async def upload_to_supabase_storage(
 
 async def main():
     """Main MCP server loop."""
-    while True:
-        try:
-            # Read JSON-RPC request from stdin
-            line = sys.stdin.readline()
-            if not line:
-                break
-                
-            request = json.loads(line.strip())
-            response = await handle_mcp_request(request)
-            
-            # Write JSON-RPC response to stdout
-            print(json.dumps(response), flush=True)
-            
-        except json.JSONDecodeError:
-            # Invalid JSON, ignore
-            continue
-        except Exception as e:
-            # Send error response
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
-                }
-            }
-            print(json.dumps(error_response), flush=True)
+    await StdioTransport(handle_mcp_request).serve()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
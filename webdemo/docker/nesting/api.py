@@ -2,11 +2,13 @@
 import os
 import sys
 import tempfile
+import time
 import urllib.request
 import json
 from flask import Flask, request, send_file, jsonify
 import subprocess
 import logging
+import zipfile
 from pathlib import Path
 
 # Configure logging
@@ -15,6 +17,10 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Where nest.py writes its profiles when NESTING_PROFILE is set; each
+# request's own directory is deleted once the request is answered
+PROFILE_DIR = os.environ.get('NESTING_PROFILE_DIR', '/tmp/nesting_profiles')
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -30,7 +36,13 @@ def nest_dxf_files():
     - sheet_width: Width of the sheet (default: 1000)
     - sheet_height: Height of the sheet (default: 500)
     - spacing: Spacing between parts (default: 2.0)
-    Returns the nested DXF file.
+    - stock_sheets: JSON list of available sheets, e.g.
+      [{"name": "4x8", "width": 2440, "height": 1220, "cost": 95}].
+      When given, the cheapest combination of sheets is chosen instead of
+      using sheet_width/sheet_height.
+    Returns the nested DXF file, or a zip of DXF files when the parts
+    need more than one sheet. Per-phase timings and counters are sent in
+    the X-Nesting-Metrics header.
     """
     try:
         # Get DXF URLs from query parameters
@@ -49,6 +61,12 @@ os.environ.get('SHEET_WIDTH', '1000'))
 os.environ.get('SHEET_HEIGHT', '500'))
         spacing = request.args.get('spacing', os.environ.get('PART_SPACING',
 '2.0'))
+        stock_sheets = request.args.get('stock_sheets', os.environ.get('STOCK_SHEETS'))
+        if stock_sheets:
+            try:
+                json.loads(stock_sheets)
+            except ValueError:
+                return jsonify({"error": "'stock_sheets' must be a JSON list"}), 400
 
         logger.info(f"Processing {len(dxf_urls)} DXF files for nesting")
         logger.info(f"Sheet size: {sheet_width}x{sheet_height}, spacing: {spacing}")
@@ -57,6 +75,7 @@ os.environ.get('SHEET_HEIGHT', '500'))
         with tempfile.TemporaryDirectory() as temp_dir:
             # Download all DXF files
             downloaded_files = []
+            download_start = time.perf_counter()
             for i, url in enumerate(dxf_urls):
                 try:
                     filename = f'input_{i}.dxf'
@@ -66,6 +85,7 @@ os.environ.get('SHEET_HEIGHT', '500'))
                     logger.info(f"Downloaded: {filename}")
                 except Exception as e:
                     logger.error(f"Failed to download {url}: {e}")
+            download_time = time.perf_counter() - download_start
 
             if not downloaded_files:
                 return jsonify({"error": "No files could be downloaded"}), 400
@@ -77,6 +97,10 @@ os.environ.get('SHEET_HEIGHT', '500'))
             env['PART_SPACING'] = str(spacing)
             env['OUTPUT_DIR'] = temp_dir
             env['OUTPUT_NAME'] = 'nested_result'
+            if stock_sheets:
+                env['STOCK_SHEETS'] = stock_sheets
+            if os.environ.get('NESTING_PROFILE'):
+                env['NESTING_PROFILE_DIR'] = PROFILE_DIR
 
             # Run nesting script
             cmd = ['python3', '/app/nest.py'] + downloaded_files
@@ -91,6 +115,10 @@ os.environ.get('SHEET_HEIGHT', '500'))
                 cwd=temp_dir
             )
 
+            for line in result.stdout.splitlines():
+                if line.startswith('Profile saved to:'):
+                    logger.info(line)
+
             if result.returncode != 0:
                 logger.error(f"Nesting process failed: {result.stderr}")
                 return jsonify({
@@ -103,10 +131,39 @@ os.environ.get('SHEET_HEIGHT', '500'))
             results_json_path = os.path.join(temp_dir, 'nesting_results.json')
 
             # Read results
+            nesting_info = {}
             if os.path.exists(results_json_path):
                 with open(results_json_path, 'r') as f:
                     nesting_info = json.load(f)
+                # Download happens here, not in nest.py, so add its timing
+                metrics = nesting_info.setdefault('metrics', {'timings_s': {}, 'counters': {}})
+                metrics['timings_s']['download'] = round(download_time, 4)
+                with open(results_json_path, 'w') as f:
+                    json.dump(nesting_info, f, indent=2)
                 logger.info(f"Nesting results: {nesting_info}")
+            metrics_header = {'X-Nesting-Metrics': json.dumps(nesting_info.get('metrics', {}))}
+
+            # Parts spread over several stock sheets come back as a zip
+            nested_dxfs = nesting_info.get('nested_dxfs', [])
+            if len(nested_dxfs) > 1:
+                zip_path = os.path.join(temp_dir, 'nested_result.zip')
+                with zipfile.ZipFile(zip_path, 'w') as archive:
+                    for dxf_path in nested_dxfs:
+                        archive.write(dxf_path, os.path.basename(dxf_path))
+                    archive.write(results_json_path, 'nesting_results.json')
+
+                logger.info(f"Returning {len(nested_dxfs)} nested sheets")
+
+                response = send_file(
+                    zip_path,
+                    mimetype='application/zip',
+                    as_attachment=True,
+                    download_name='nested.zip'
+                )
+                response.headers.update(metrics_header)
+                return response
+            if nested_dxfs:
+                nested_dxf_path = nested_dxfs[0]
 
             if not os.path.exists(nested_dxf_path):
                 logger.error("No nested DXF file generated")
@@ -115,12 +172,14 @@ os.environ.get('SHEET_HEIGHT', '500'))
             # Return the nested DXF file
             logger.info(f"Returning nested DXF file")
 
-            return send_file(
+            response = send_file(
                 nested_dxf_path,
                 mimetype='application/dxf',
                 as_attachment=True,
                 download_name='nested.dxf'
             )
+            response.headers.update(metrics_header)
+            return response
 
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
@@ -139,7 +198,8 @@ def index():
                     "urls": "Comma-separated URLs to DXF files (required)",
                     "sheet_width": "Width of the sheet (optional, default: 1000)",
                     "sheet_height": "Height of the sheet (optional, default: 500)",
-                    "spacing": "Spacing between parts (optional, default: 2.0)"
+                    "spacing": "Spacing between parts (optional, default: 2.0)",
+                    "stock_sheets": "JSON list of stock sheets with width, height and cost or priority (optional)"
                 },
                 "example": "/nest?urls=https://example.com/part1.dxf,https://example.com/part2.dxf&sheet_width=1200&sheet_height=600"
             },
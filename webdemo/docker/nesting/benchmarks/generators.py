@@ -0,0 +1,120 @@
+"""Synthetic DXF part generators for nesting benchmarks.
+
+Every generator draws its dimensions from the ``random.Random`` instance it
+is given, so a fixed seed always produces the same set of parts.
+"""
+
+import math
+import os
+import random
+from typing import Dict, List
+
+import ezdxf
+
+
+def _new_drawing():
+    doc = ezdxf.new('R2010')
+    return doc, doc.modelspace()
+
+
+def rectangle(rng, min_size=20.0, max_size=150.0):
+    """Plain rectangular blank as one closed LWPOLYLINE"""
+    width = rng.uniform(min_size, max_size)
+    height = rng.uniform(min_size, max_size)
+    doc, msp = _new_drawing()
+    msp.add_lwpolyline([(0, 0), (width, 0), (width, height), (0, height)], close=True)
+    return doc
+
+
+def l_bracket(rng, min_size=40.0, max_size=150.0):
+    """L-shaped bracket as one closed LWPOLYLINE"""
+    width = rng.uniform(min_size, max_size)
+    height = rng.uniform(min_size, max_size)
+    leg = rng.uniform(0.2, 0.5) * min(width, height)
+    doc, msp = _new_drawing()
+    msp.add_lwpolyline([
+        (0, 0), (width, 0), (width, leg), (leg, leg), (leg, height), (0, height)
+    ], close=True)
+    return doc
+
+
+def plate_with_holes(rng, min_size=40.0, max_size=150.0, max_holes=6):
+    """Rectangular plate with a few round holes (CIRCLE entities)"""
+    width = rng.uniform(min_size, max_size)
+    height = rng.uniform(min_size, max_size)
+    doc, msp = _new_drawing()
+    msp.add_lwpolyline([(0, 0), (width, 0), (width, height), (0, height)], close=True)
+    radius = 0.08 * min(width, height)
+    for _ in range(rng.randint(1, max_holes)):
+        cx = rng.uniform(2 * radius, width - 2 * radius)
+        cy = rng.uniform(2 * radius, height - 2 * radius)
+        msp.add_circle((cx, cy), radius)
+    return doc
+
+
+def slot_with_arcs(rng, min_size=30.0, max_size=150.0):
+    """Obround slot built from LINE and ARC entities (no polylines)"""
+    length = rng.uniform(min_size, max_size)
+    radius = rng.uniform(0.1, 0.3) * length
+    doc, msp = _new_drawing()
+    msp.add_line((radius, 0), (length - radius, 0))
+    msp.add_line((length - radius, 2 * radius), (radius, 2 * radius))
+    msp.add_arc((length - radius, radius), radius, 270, 90)
+    msp.add_arc((radius, radius), radius, 90, 270)
+    return doc
+
+
+def concave_star(rng, min_size=30.0, max_size=150.0, points=5):
+    """Star-shaped concave outline as one closed LWPOLYLINE"""
+    outer = rng.uniform(min_size, max_size) / 2
+    inner = outer * rng.uniform(0.35, 0.6)
+    vertices = []
+    for i in range(2 * points):
+        radius = outer if i % 2 == 0 else inner
+        angle = math.pi * i / points
+        vertices.append((outer + radius * math.cos(angle), outer + radius * math.sin(angle)))
+    doc, msp = _new_drawing()
+    msp.add_lwpolyline(vertices, close=True)
+    return doc
+
+
+GENERATORS = {
+    'rectangle': rectangle,
+    'l_bracket': l_bracket,
+    'holes': plate_with_holes,
+    'arcs': slot_with_arcs,
+    'concave': concave_star,
+}
+
+
+def generate_parts(output_dir: str, counts: Dict[str, int], seed: int = 0) -> List[str]:
+    """Write ``counts[kind]`` DXF files of each part kind to output_dir.
+
+    Returns the file paths in a stable, interleaved order so that every part
+    kind is represented no matter how many files a caller uses.
+    """
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    queues = {kind: count for kind, count in counts.items() if count > 0}
+    paths = []
+    index = 0
+    while queues:
+        for kind in sorted(queues):
+            doc = GENERATORS[kind](rng)
+            path = os.path.join(output_dir, f'{index:04d}_{kind}.dxf')
+            doc.saveas(path)
+            paths.append(path)
+            index += 1
+            queues[kind] -= 1
+        queues = {kind: count for kind, count in queues.items() if count > 0}
+    return paths
+
+
+def mixed_counts(total: int) -> Dict[str, int]:
+    """Split a part count evenly across all generator kinds"""
+    kinds = sorted(GENERATORS)
+    counts = {kind: total // len(kinds) for kind in kinds}
+    for kind in kinds[:total % len(kinds)]:
+        counts[kind] += 1
+    return counts
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Nesting benchmark harness.
+
+Generates synthetic DXF parts with fixed seeds, nests them with every
+algorithm mode and records wall time, peak memory, placement evaluations
+and utilization as JSON. Each run happens in a fresh process so memory
+numbers are not polluted by earlier runs.
+
+Usage:
+    python benchmarks/run_benchmarks.py --tier quick --output results.json
+    python benchmarks/run_benchmarks.py --tier quick --compare benchmarks/baselines/quick.json
+
+Baselines are plain result files committed under benchmarks/baselines/.
+Placement evaluations are deterministic for a given seed, so a change in
+that column shows up in review even when wall times are noisy.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from generators import generate_parts, mixed_counts
+
+SHEET_SIZES = {
+    'small': (1000.0, 500.0),
+    'medium': (2000.0, 1000.0),
+    'large': (3000.0, 1500.0),
+}
+
+PART_COUNTS = (10, 50, 200, 1000)
+
+TIERS = {
+    'quick': (10,),
+    'standard': (10, 50),
+    'full': PART_COUNTS,
+}
+
+# Stock used by the stock_sheets mode; cost is proportional to area with a
+# small premium on the smaller sheets, like real price lists
+STOCK_SHEETS = [
+    {'name': name, 'width': w, 'height': h, 'cost': round(w * h / 1e6 * (1.2 if name == 'small' else 1.0), 3)}
+    for name, (w, h) in SHEET_SIZES.items()
+]
+
+MODES = ('single_sheet', 'stock_sheets', 'stock_sheets_parallel')
+
+# Workers of the stock_sheets_parallel mode: one per stock size, so every
+# candidate size is nested at once
+PARALLEL_WORKERS = len(STOCK_SHEETS)
+
+DEFAULT_SEED = 42
+
+
+def build_scenarios(tier, modes):
+    """Scenarios of a tier: every sheet size for single_sheet mode, and the
+    whole stock list once per part count for the stock_sheets modes, in one
+    process or on PARALLEL_WORKERS worker processes"""
+    scenarios = []
+    for count in TIERS[tier]:
+        if 'single_sheet' in modes:
+            for sheet_name, (width, height) in SHEET_SIZES.items():
+                scenarios.append({
+                    'name': f'mixed_{count}_{sheet_name}',
+                    'mode': 'single_sheet',
+                    'part_count': count,
+                    'sheet': sheet_name,
+                    'sheet_width': width,
+                    'sheet_height': height,
+                })
+        if 'stock_sheets' in modes:
+            scenarios.append({
+                'name': f'mixed_{count}_stock',
+                'mode': 'stock_sheets',
+                'part_count': count,
+                'sheet': 'stock',
+                'sheet_width': None,
+                'sheet_height': None,
+                'workers': 1,
+            })
+        if 'stock_sheets_parallel' in modes:
+            scenarios.append({
+                'name': f'mixed_{count}_stock_parallel',
+                'mode': 'stock_sheets_parallel',
+                'part_count': count,
+                'sheet': 'stock',
+                'sheet_width': None,
+                'sheet_height': None,
+                'workers': PARALLEL_WORKERS,
+            })
+    return scenarios
+
+
+@contextlib.contextmanager
+def quiet_stdout():
+    """Silence stdout of this process and of the worker processes it starts"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def run_case(case):
+    """Nest one scenario in one mode and measure it (runs in a child process)"""
+    from nest import DXFNester
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.environ['OUTPUT_DIR'] = os.path.join(temp_dir, 'output')
+        os.environ['OUTPUT_NAME'] = 'benchmark'
+        dxf_files = generate_parts(
+            os.path.join(temp_dir, 'parts'),
+            mixed_counts(case['part_count']),
+            seed=case['seed']
+        )
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with quiet_stdout():
+            if case['mode'] in ('stock_sheets', 'stock_sheets_parallel'):
+                nester = DXFNester(spacing=case['spacing'])
+                result = nester.nest_parts_on_stock(dxf_files, STOCK_SHEETS, max_workers=case['workers'])
+            else:
+                nester = DXFNester(case['sheet_width'], case['sheet_height'], case['spacing'])
+                result = nester.nest_parts(dxf_files)
+        wall_time = time.perf_counter() - start
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'wall_time_s': round(wall_time, 4),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        'peak_python_alloc_mb': round(traced_peak / (1024 * 1024), 2),
+        # the largest worker process of the parallel mode
+        'peak_worker_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 2),
+        'placement_evaluations': nester.placement_evaluations,
+        'utilization_percent': round(result['utilization'], 3),
+        'placed_count': result.get('placed_count', 0),
+        'sheets_used': len(result.get('sheets', [])) or (1 if result.get('nested_dxf') else 0),
+        'status': 'ok',
+    }
+
+
+def _case_entry(case, connection):
+    try:
+        connection.send(run_case(case))
+    except Exception as e:
+        connection.send({'status': 'error', 'error': str(e)})
+    finally:
+        connection.close()
+
+
+def run_isolated(case, timeout):
+    """Run a case in a fresh spawned process, killing it after timeout seconds"""
+    context = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_case_entry, args=(case, child_conn))
+    process.start()
+    child_conn.close()
+
+    result = None
+    if parent_conn.poll(timeout):
+        result = parent_conn.recv()
+    process.join(5)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    if result is None:
+        result = {'status': 'timeout', 'timeout_s': timeout}
+    return result
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return human readable regressions of results against a baseline file"""
+    baseline_runs = {(r['scenario'], r['mode']): r for r in baseline['results']}
+    regressions = []
+    for run in results:
+        reference = baseline_runs.get((run['scenario'], run['mode']))
+        if reference is None or run['status'] != 'ok' or reference['status'] != 'ok':
+            continue
+        label = f"{run['scenario']} [{run['mode']}]"
+        if run['placement_evaluations'] > reference['placement_evaluations'] * (1 + threshold):
+            regressions.append(
+                f"{label}: placement evaluations {reference['placement_evaluations']} -> {run['placement_evaluations']}"
+            )
+        if run['wall_time_s'] > reference['wall_time_s'] * (1 + threshold):
+            regressions.append(
+                f"{label}: wall time {reference['wall_time_s']:.3f}s -> {run['wall_time_s']:.3f}s"
+            )
+        if run['utilization_percent'] < reference['utilization_percent'] - 0.01:
+            regressions.append(
+                f"{label}: utilization {reference['utilization_percent']:.2f}% -> {run['utilization_percent']:.2f}%"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DXFNester on synthetic parts')
+    parser.add_argument('--tier', choices=sorted(TIERS), default='quick',
+                        help='Part counts to run: quick=10, standard=10/50, full=10/50/200/1000')
+    parser.add_argument('--scenario', action='append',
+                        help='Only run scenarios with this name (repeatable)')
+    parser.add_argument('--mode', action='append', choices=MODES,
+                        help='Only run this algorithm mode (repeatable)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--spacing', type=float, default=2.0)
+    parser.add_argument('--timeout', type=float, default=900.0,
+                        help='Seconds before a single run is abandoned')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative slowdown before a run counts as a regression')
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.tier, args.mode or MODES)
+    if args.scenario:
+        scenarios = [s for s in scenarios if s['name'] in args.scenario]
+
+    results = []
+    for scenario in scenarios:
+        case = {**scenario, 'seed': args.seed, 'spacing': args.spacing}
+        print(f"Running {scenario['name']} [{scenario['mode']}]...", flush=True)
+        measurement = run_isolated(case, args.timeout)
+        run = {'scenario': scenario['name'], **scenario, **measurement}
+        del run['name']
+        results.append(run)
+        if measurement['status'] == 'ok':
+            print(f"  {measurement['wall_time_s']:.3f}s, "
+                  f"{measurement['placement_evaluations']} evaluations, "
+                  f"{measurement['utilization_percent']:.1f}% utilization, "
+                  f"{measurement['peak_rss_mb']:.1f} MB peak RSS")
+        else:
+            print(f"  {measurement['status']}: {measurement.get('error', '')}")
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'tier': args.tier,
+            'seed': args.seed,
+            'spacing': args.spacing,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,33 +2,198 @@ import ezdxf
 import numpy as np
 from shapely.geometry import Polygon, Point, MultiPolygon
 from shapely.affinity import translate, rotate
+from shapely.prepared import prep
 import sys
 import os
 from pathlib import Path
 import json
 import math
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from typing import List, Tuple, Dict, Optional
 
+
+class NestingMetrics:
+    """Per-phase wall time and event counters for one nesting run.
+
+    Phases are timed with a context manager and counters are plain integers,
+    so instrumenting a stage costs about as much as one function call. The
+    phases and counters of the nesting pipeline are always reported, as zero
+    when a run never reached them, so every result has the same keys.
+    """
+
+    PHASES = ('dxf_parse', 'polygon_extraction', 'rotation_prep', 'placement_search', 'dxf_write')
+    COUNTERS = ('candidates_tried', 'intersect_calls', 'buffer_cache_hits', 'buffer_cache_misses')
+
+    def __init__(self):
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, other):
+        """Add the timings and counters of another run (or its as_dict())"""
+        if isinstance(other, NestingMetrics):
+            other = other.as_dict()
+        for name, seconds in other.get('timings_s', {}).items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        for name, amount in other.get('counters', {}).items():
+            self.count(name, amount)
+
+    def as_dict(self):
+        return {
+            'timings_s': {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            'counters': dict(self.counters)
+        }
+
+
+@contextmanager
+def profiled(output_dir, name='nesting_profile'):
+    """Profile the enclosed block when NESTING_PROFILE is set.
+
+    NESTING_PROFILE=cprofile writes <name>.prof (open with snakeviz or pstats),
+    NESTING_PROFILE=pyinstrument writes <name>.html. Unset, this does nothing.
+
+    The profile goes to NESTING_PROFILE_DIR when it is set, under a name made
+    unique per run, so it outlives an output_dir that is deleted afterwards.
+    """
+    mode = os.environ.get('NESTING_PROFILE', '').lower()
+    if not mode:
+        yield
+        return
+
+    profile_dir = os.environ.get('NESTING_PROFILE_DIR')
+    if profile_dir:
+        output_dir = profile_dir
+        name = f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    os.makedirs(output_dir, exist_ok=True)
+    if mode == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed, falling back to cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                profile_path = os.path.join(output_dir, f'{name}.html')
+                with open(profile_path, 'w') as f:
+                    f.write(profiler.output_html())
+                print(f"Profile saved to: {profile_path}")
+            return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profile_path = os.path.join(output_dir, f'{name}.prof')
+        profiler.dump_stats(profile_path)
+        print(f"Profile saved to: {profile_path}")
+
+
+def parse_stock_sheets(stock_sheets):
+    """Normalize a stock sheet list (JSON string or list of dicts).
+
+    Each sheet needs a width and height. Its cost defaults to its priority,
+    or to its area when neither is given, so that without explicit pricing
+    the nester simply minimizes the amount of material used.
+    """
+    if isinstance(stock_sheets, str):
+        stock_sheets = json.loads(stock_sheets)
+    
+    normalized = []
+    for i, sheet in enumerate(stock_sheets):
+        width = float(sheet['width'])
+        height = float(sheet['height'])
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Stock sheet {i} has invalid dimensions {width}x{height}")
+        cost = sheet.get('cost', sheet.get('priority', width * height))
+        normalized.append({
+            'name': str(sheet.get('name', f'{width:g}x{height:g}')),
+            'width': width,
+            'height': height,
+            'cost': float(cost)
+        })
+    return normalized
+
+
+def _nest_on_stock_sheet(sheet, parts, spacing):
+    """Fill sheets of one stock size until every part is placed.
+
+    Runs in a worker process, so it only receives the collision data of the
+    parts and returns placements as plain tuples.
+    """
+    nester = DXFNester(sheet['width'], sheet['height'], spacing)
+    remaining = parts
+    layouts = []
+    while remaining:
+        placed, remaining = nester.bottom_left_fill(remaining)
+        if not placed:
+            return {
+                'sheet': sheet,
+                'layouts': None,
+                'cost': float('inf'),
+                'metrics': nester.metrics.as_dict()
+            }
+        layouts.append([(p['id'], p['x'], p['y'], p['rotation']) for p in placed])
+    return {
+        'sheet': sheet,
+        'layouts': layouts,
+        'cost': len(layouts) * sheet['cost'],
+        'metrics': nester.metrics.as_dict()
+    }
+
+
 class DXFNester:
-    def __init__(self, sheet_width=1000, sheet_height=500, spacing=2.0):
+    def __init__(self, sheet_width=1000, sheet_height=500, spacing=2.0, output_dir=None, output_name=None):
         self.sheet_width = sheet_width
         self.sheet_height = sheet_height
         self.spacing = spacing
-        
+        # Where nested DXFs are written; falls back to OUTPUT_DIR/OUTPUT_NAME
+        self.output_dir = output_dir
+        self.output_name = output_name
+        self.metrics = NestingMetrics()
+        # Spacing-buffered, prepared copies of placed polygons, keyed by id()
+        self._buffer_cache = {}
+
+    @property
+    def placement_evaluations(self):
+        """Number of candidate positions tested by the placement search"""
+        return self.metrics.counters.get('candidates_tried', 0)
+
     def extract_polygon_from_dxf(self, dxf_path):
         """Extract dual polygon data: collision polygon + original entities"""
         try:
-            doc = ezdxf.readfile(dxf_path)
-            msp = doc.modelspace()
-            
-            # Extract original entities for output preservation
-            original_entities = []
-            for entity in msp:
-                if entity.dxftype() in ['LINE', 'ARC', 'LWPOLYLINE', 'POLYLINE', 'CIRCLE', 'ELLIPSE', 'SPLINE']:
-                    original_entities.append(entity)
-            
-            # Extract collision polygon (existing proven approach)
-            collision_polygon = self._extract_collision_polygon(doc, msp)
+            with self.metrics.phase('dxf_parse'):
+                doc = ezdxf.readfile(dxf_path)
+                msp = doc.modelspace()
+
+            with self.metrics.phase('polygon_extraction'):
+                # Extract original entities for output preservation
+                original_entities = []
+                for entity in msp:
+                    if entity.dxftype() in ['LINE', 'ARC', 'LWPOLYLINE', 'POLYLINE', 'CIRCLE', 'ELLIPSE', 'SPLINE']:
+                        original_entities.append(entity)
+
+                # Extract collision polygon (existing proven approach)
+                collision_polygon = self._extract_collision_polygon(doc, msp)
             
             if collision_polygon is None:
                 return None
@@ -211,8 +376,8 @@ class DXFNester:
         min_x, min_y = bounds[0], bounds[1]
         return translate(polygon, -min_x, -min_y)
     
-    def nest_parts(self, dxf_files):
-        """Main nesting function using bottom-left fill algorithm"""
+    def load_parts(self, dxf_files):
+        """Extract and normalize the collision polygons of all DXF files"""
         print(f"Processing {len(dxf_files)} DXF files...")
         
         # Extract and prepare polygons
@@ -255,17 +420,25 @@ class DXFNester:
                 print(f"No valid geometry found in {dxf_file}")
                 unfittable_parts.append(dxf_file)
         
+        # Sort parts by area (largest first)
+        parts.sort(key=lambda p: p['area'], reverse=True)
+        
+        return parts, unfittable_parts
+    
+    def nest_parts(self, dxf_files):
+        """Main nesting function using bottom-left fill algorithm"""
+        parts, unfittable_parts = self.load_parts(dxf_files)
+        
         if not parts:
             return {
                 'nested_dxf': None,
                 'utilization': 0.0,
                 'unfittable_parts': dxf_files,
-                'message': 'No valid parts to nest'
+                'placed_count': 0,
+                'message': 'No valid parts to nest',
+                'metrics': self.metrics.as_dict()
             }
         
-        # Sort parts by area (largest first)
-        parts.sort(key=lambda p: p['area'], reverse=True)
-        
         print(f"Nesting {len(parts)} parts on {self.sheet_width}x{self.sheet_height}mm sheet...")
         
         # Perform bottom-left fill nesting
@@ -276,6 +449,281 @@ class DXFNester:
         
         return self.process_nesting_result_simple(placed_parts, unfittable_parts)
     
+    def nest_parts_on_stock(self, dxf_files, stock_sheets, max_workers=None):
+        """Nest parts onto the cheapest combination of available stock sheets.
+        
+        Every stock size that holds all parts is evaluated by filling sheets of
+        that size until all parts are placed. Candidates run in parallel,
+        cheapest area lower bound first, and a candidate is skipped once its
+        lower bound can no longer beat the best complete plan. The last sheet
+        of the winning plan is then moved to a cheaper stock size if its parts
+        fit there.
+        
+        Parts are also grouped by the stock size that is cheapest per area
+        among those they fit, and each group is nested on its own size. This
+        mixed-size plan is used when it costs less, and is the only plan when
+        no single size can hold every part.
+        """
+        stock_sheets = parse_stock_sheets(stock_sheets)
+        parts, unfittable_parts = self.load_parts(dxf_files)
+        
+        if not parts:
+            return {
+                'nested_dxf': None,
+                'nested_dxfs': [],
+                'utilization': 0.0,
+                'unfittable_parts': unfittable_parts,
+                'placed_count': 0,
+                'message': 'No valid parts to nest',
+                'metrics': self.metrics.as_dict()
+            }
+        
+        # Parts that fit on no stock sheet at all can never be placed
+        fitting_parts = []
+        for part in parts:
+            if any(self._part_fits_sheet(part, sheet) for sheet in stock_sheets):
+                fitting_parts.append(part)
+            else:
+                unfittable_parts.append(part['file'])
+        parts = fitting_parts
+        if not parts:
+            return {
+                'nested_dxf': None,
+                'nested_dxfs': [],
+                'utilization': 0.0,
+                'unfittable_parts': unfittable_parts,
+                'placed_count': 0,
+                'message': 'No parts fit on any stock sheet',
+                'metrics': self.metrics.as_dict()
+            }
+        
+        print(f"Selecting stock for {len(parts)} parts from {len(stock_sheets)} sheet sizes...")
+        best, stats = self.select_stock_sheet(parts, stock_sheets, max_workers)
+        parts_by_id = {p['id']: p for p in parts}
+        
+        sheet_plan = None
+        if best is not None:
+            sheet_plan = [(best['sheet'], layout) for layout in best['layouts']]
+            # Try to move the parts of the final (least full) sheet to cheaper stock
+            sheet_plan[-1:] = self._downsize_plan(sheet_plan[-1:], parts_by_id, stock_sheets)
+        
+        mixed_plan = self.plan_mixed_stock(parts, stock_sheets, max_workers)
+        if mixed_plan is not None:
+            mixed_cost = sum(sheet['cost'] for sheet, _ in mixed_plan)
+            stats['mixed_plan_cost'] = mixed_cost
+            if sheet_plan is None or mixed_cost < sum(sheet['cost'] for sheet, _ in sheet_plan):
+                print(f"Using mixed stock sizes, cost {mixed_cost:g}")
+                sheet_plan = mixed_plan
+        
+        if sheet_plan is None:
+            unfittable_parts.extend([p['file'] for p in parts])
+            return {
+                'nested_dxf': None,
+                'nested_dxfs': [],
+                'utilization': 0.0,
+                'unfittable_parts': unfittable_parts,
+                'placed_count': 0,
+                'message': 'Parts could not be nested on the stock sheets',
+                'metrics': self.metrics.as_dict(),
+                **stats
+            }
+        
+        return self.process_stock_result(sheet_plan, parts_by_id, unfittable_parts, stats)
+    
+    def select_stock_sheet(self, parts, stock_sheets, max_workers=None):
+        """Find the stock size whose full nest of all parts costs the least"""
+        total_area = sum(p['area'] for p in parts)
+        
+        candidates = []
+        for sheet in stock_sheets:
+            if not all(self._part_fits_sheet(p, sheet) for p in parts):
+                continue
+            min_sheets = math.ceil(total_area / (sheet['width'] * sheet['height']))
+            candidates.append((min_sheets * sheet['cost'], sheet))
+        candidates.sort(key=lambda c: c[0])
+        
+        stats = {
+            'candidates_evaluated': 0,
+            'candidates_pruned': len(stock_sheets) - len(candidates)
+        }
+        if not candidates:
+            return None, stats
+        
+        # Worker processes only need the picklable collision data
+        collision_parts = [self._collision_data(p) for p in parts]
+        
+        if max_workers is None:
+            max_workers = int(os.environ.get('NESTING_WORKERS', os.cpu_count() or 1))
+        max_workers = max(1, min(max_workers, len(candidates)))
+        
+        best = None
+        if max_workers == 1:
+            for lower_bound, sheet in candidates:
+                if best is not None and lower_bound >= best['cost']:
+                    stats['candidates_pruned'] += 1
+                    continue
+                result = _nest_on_stock_sheet(sheet, collision_parts, self.spacing)
+                stats['candidates_evaluated'] += 1
+                self.metrics.merge(result['metrics'])
+                if result['layouts'] is not None and (best is None or result['cost'] < best['cost']):
+                    best = result
+            return best, stats
+        
+        pending = list(candidates)
+        running = set()
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                # Keep the pool busy with candidates that can still win
+                while pending and len(running) < max_workers:
+                    lower_bound, sheet = pending.pop(0)
+                    if best is not None and lower_bound >= best['cost']:
+                        stats['candidates_pruned'] += 1
+                        continue
+                    running.add(pool.submit(_nest_on_stock_sheet, sheet, collision_parts, self.spacing))
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    stats['candidates_evaluated'] += 1
+                    self.metrics.merge(result['metrics'])
+                    print(f"Stock {result['sheet']['name']}: cost {result['cost']}")
+                    if result['layouts'] is not None and (best is None or result['cost'] < best['cost']):
+                        best = result
+        return best, stats
+    
+    def plan_mixed_stock(self, parts, stock_sheets, max_workers=None):
+        """Nest each part on the stock size cheapest per area that it fits.
+        
+        Returns a list of (sheet, layout) pairs, or None when every part goes
+        to the same size (that plan is one of the single-size candidates) or a
+        group could not be nested. The last sheet of every group is moved to
+        cheaper stock if its parts fit there.
+        """
+        groups = {}
+        for part in parts:
+            index, _ = min(
+                ((i, s) for i, s in enumerate(stock_sheets) if self._part_fits_sheet(part, s)),
+                key=lambda item: (item[1]['cost'] / (item[1]['width'] * item[1]['height']), item[1]['cost'])
+            )
+            groups.setdefault(index, []).append(part)
+        if len(groups) < 2:
+            return None
+        
+        sheets = [stock_sheets[index] for index in groups]
+        collision_groups = [[self._collision_data(p) for p in group] for group in groups.values()]
+        if max_workers is None:
+            max_workers = int(os.environ.get('NESTING_WORKERS', os.cpu_count() or 1))
+        max_workers = max(1, min(max_workers, len(groups)))
+        if max_workers == 1:
+            results = [
+                _nest_on_stock_sheet(sheet, group, self.spacing)
+                for sheet, group in zip(sheets, collision_groups)
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(
+                    _nest_on_stock_sheet, sheets, collision_groups, [self.spacing] * len(sheets)
+                ))
+        
+        parts_by_id = {p['id']: p for p in parts}
+        sheet_plan = []
+        for result in results:
+            self.metrics.merge(result['metrics'])
+            if result['layouts'] is None:
+                return None
+            group_plan = [(result['sheet'], layout) for layout in result['layouts']]
+            group_plan[-1:] = self._downsize_plan(group_plan[-1:], parts_by_id, stock_sheets)
+            sheet_plan.extend(group_plan)
+        return sheet_plan
+    
+    def _downsize_plan(self, sheet_plan, parts_by_id, stock_sheets):
+        """Move each sheet of a plan to cheaper stock where its parts fit"""
+        downsized_plan = []
+        for sheet, layout in sheet_plan:
+            sheet_parts = [parts_by_id[part_id] for part_id, _, _, _ in layout]
+            downsized = self._downsize_sheet(sheet_parts, sheet, stock_sheets)
+            downsized_plan.append(downsized if downsized is not None else (sheet, layout))
+        return downsized_plan
+    
+    def _downsize_sheet(self, parts, sheet, stock_sheets):
+        """Re-nest one sheet's parts on the cheapest smaller stock that holds them"""
+        total_area = sum(p['area'] for p in parts)
+        cheaper = sorted(
+            (s for s in stock_sheets if s['cost'] < sheet['cost']),
+            key=lambda s: s['cost']
+        )
+        for candidate in cheaper:
+            if total_area > candidate['width'] * candidate['height']:
+                continue
+            if not all(self._part_fits_sheet(p, candidate) for p in parts):
+                continue
+            result = _nest_on_stock_sheet(candidate, [self._collision_data(p) for p in parts], self.spacing)
+            self.metrics.merge(result['metrics'])
+            if result['layouts'] is not None and len(result['layouts']) == 1:
+                print(f"Moved last sheet from {sheet['name']} to {candidate['name']}")
+                return candidate, result['layouts'][0]
+        return None
+    
+    def _part_fits_sheet(self, part, sheet):
+        """Check the part bounding box against the sheet in either orientation"""
+        short_side = min(part['width'], part['height']) + self.spacing
+        long_side = max(part['width'], part['height']) + self.spacing
+        return (short_side <= min(sheet['width'], sheet['height']) and
+                long_side <= max(sheet['width'], sheet['height']))
+    
+    def _collision_data(self, part):
+        """Strip a part down to what the placement search needs"""
+        return {
+            key: part[key]
+            for key in ('id', 'file', 'polygon', 'collision_centroid', 'width', 'height', 'area')
+        }
+    
+    def process_stock_result(self, sheet_plan, parts_by_id, unfittable_parts, stats):
+        """Write one nested DXF per sheet and summarize the stock plan"""
+        output_name = self.output_name or os.environ.get('OUTPUT_NAME', 'nested_layout')
+        
+        sheets = []
+        total_part_area = 0.0
+        total_sheet_area = 0.0
+        for index, (sheet, layout) in enumerate(sheet_plan):
+            placed_parts = [
+                self._place_part(parts_by_id[part_id], x, y, rotation, None)
+                for part_id, x, y, rotation in layout
+            ]
+            sheet_nester = DXFNester(sheet['width'], sheet['height'], self.spacing, self.output_dir)
+            sheet_name = output_name if len(sheet_plan) == 1 else f'{output_name}_sheet{index + 1}'
+            with self.metrics.phase('dxf_write'):
+                nested_dxf_path = sheet_nester.generate_nested_dxf(placed_parts, sheet_name)
+            
+            part_area = sum(p['area'] for p in placed_parts)
+            sheet_area = sheet['width'] * sheet['height']
+            total_part_area += part_area
+            total_sheet_area += sheet_area
+            sheets.append({
+                **sheet,
+                'nested_dxf': nested_dxf_path,
+                'placed_count': len(placed_parts),
+                'utilization': (part_area / sheet_area) * 100
+            })
+        
+        placed_count = sum(s['placed_count'] for s in sheets)
+        total_cost = sum(s['cost'] for s in sheets)
+        print(f"Nested {placed_count} parts on {len(sheets)} sheets, total cost: {total_cost:g}")
+        
+        return {
+            'nested_dxf': sheets[0]['nested_dxf'],
+            'nested_dxfs': [s['nested_dxf'] for s in sheets],
+            'utilization': (total_part_area / total_sheet_area) * 100,
+            'unfittable_parts': unfittable_parts,
+            'placed_count': placed_count,
+            'sheets': sheets,
+            'total_cost': total_cost,
+            'message': f'Successfully nested {placed_count} parts on {len(sheets)} sheets',
+            'metrics': self.metrics.as_dict(),
+            **stats
+        }
+    
     def bottom_left_fill(self, parts):
         """Bottom-left fill nesting algorithm with rotation"""
         placed_parts = []
@@ -283,6 +731,7 @@ class DXFNester:
         
         # Track occupied regions
         occupied_polygons = []
+        self._buffer_cache.clear()
         
         for part in parts:
             best_position = self.find_best_position_with_rotation(part, occupied_polygons)
@@ -291,19 +740,7 @@ class DXFNester:
                 x, y, rotation, rotated_polygon = best_position
                 placed_polygon = translate(rotated_polygon, x, y)
                 
-                placed_parts.append({
-                    'id': part['id'],
-                    'file': part['file'],
-                    'polygon': placed_polygon,
-                    'original_polygon': part['polygon'],
-                    'original_entities': part['original_entities'],
-                    'dxf_path': part['dxf_path'],
-                    'normalization_offset': part['normalization_offset'],
-                    'collision_centroid': part['collision_centroid'],
-                    'x': x,
-                    'y': y,
-                    'rotation': rotation
-                })
+                placed_parts.append(self._place_part(part, x, y, rotation, placed_polygon))
                 
                 occupied_polygons.append(placed_polygon)
                 print(f"Placed part {part['id']} at ({x:.1f}, {y:.1f}) with {rotation}° rotation")
@@ -313,6 +750,17 @@ class DXFNester:
         
         return placed_parts, remaining_parts
     
+    def _place_part(self, part, x, y, rotation, placed_polygon):
+        """Copy a part record with its final position on the sheet"""
+        return {
+            **part,
+            'polygon': placed_polygon,
+            'original_polygon': part['polygon'],
+            'x': x,
+            'y': y,
+            'rotation': rotation
+        }
+    
     def find_best_position_with_rotation(self, part, occupied_polygons):
         """Find the best bottom-left position for a part with rotation"""
         rotation_angles = [0, 90, 180, 270]
@@ -320,15 +768,16 @@ class DXFNester:
         best_area_used = float('inf')  # Prefer positions that use less sheet area
         
         for angle in rotation_angles:
-            # Rotate the polygon using EXACT same centroid as stored
-            collision_centroid = part['collision_centroid']
-            rotated_polygon = rotate(part['polygon'], angle, origin=collision_centroid)
-            rotated_polygon = self.normalize_polygon(rotated_polygon)  # Re-normalize after rotation
-            
-            # Get new dimensions
-            bounds = rotated_polygon.bounds
-            rotated_width = bounds[2] - bounds[0]
-            rotated_height = bounds[3] - bounds[1]
+            with self.metrics.phase('rotation_prep'):
+                # Rotate the polygon using EXACT same centroid as stored
+                collision_centroid = part['collision_centroid']
+                rotated_polygon = rotate(part['polygon'], angle, origin=collision_centroid)
+                rotated_polygon = self.normalize_polygon(rotated_polygon)  # Re-normalize after rotation
+                
+                # Get new dimensions
+                bounds = rotated_polygon.bounds
+                rotated_width = bounds[2] - bounds[0]
+                rotated_height = bounds[3] - bounds[1]
             
             # Check if rotated part fits in sheet at all
             if (rotated_width + self.spacing > self.sheet_width or 
@@ -336,7 +785,8 @@ class DXFNester:
                 continue
             
             # Find best position for this rotation
-            position = self.find_position_for_polygon(rotated_polygon, rotated_width, rotated_height, occupied_polygons)
+            with self.metrics.phase('placement_search'):
+                position = self.find_position_for_polygon(rotated_polygon, rotated_width, rotated_height, occupied_polygons)
             
             if position:
                 x, y = position
@@ -353,30 +803,55 @@ class DXFNester:
         """Find position for a specific polygon (used by rotation logic)"""
         # Try positions from bottom-left
         step_size = max(1.0, min(part_width, part_height) / 10)  # Adaptive step size
+        buffered_polygons = [self._buffered(occupied) for occupied in occupied_polygons]
+        candidates_tried = 0
+        intersect_calls = 0
         
-        for y in np.arange(0, self.sheet_height - part_height + 1, step_size):
-            for x in np.arange(0, self.sheet_width - part_width + 1, step_size):
-                # Create candidate polygon
-                candidate = translate(polygon, x, y)
-                
-                # Check if it fits in sheet
-                bounds = candidate.bounds
-                if (bounds[2] > self.sheet_width or bounds[3] > self.sheet_height):
-                    continue
-                
-                # Check collision with existing parts
-                collision = False
-                for occupied in occupied_polygons:
-                    # Add spacing buffer
-                    buffered_occupied = occupied.buffer(self.spacing)
-                    if candidate.intersects(buffered_occupied):
-                        collision = True
-                        break
-                
-                if not collision:
-                    return (x, y)
+        try:
+            for y in np.arange(0, self.sheet_height - part_height + 1, step_size):
+                for x in np.arange(0, self.sheet_width - part_width + 1, step_size):
+                    # Create candidate polygon
+                    candidates_tried += 1
+                    candidate = translate(polygon, x, y)
+                    
+                    # Check if it fits in sheet
+                    bounds = candidate.bounds
+                    if (bounds[2] > self.sheet_width or bounds[3] > self.sheet_height):
+                        continue
+                    
+                    # Check collision with existing parts (already spacing-buffered)
+                    collision = False
+                    for buffered_occupied in buffered_polygons:
+                        intersect_calls += 1
+                        if buffered_occupied.intersects(candidate):
+                            collision = True
+                            break
+                    
+                    if not collision:
+                        return (x, y)
+            
+            return None
+        finally:
+            self.metrics.count('candidates_tried', candidates_tried)
+            self.metrics.count('intersect_calls', intersect_calls)
+    
+    def _buffered(self, occupied):
+        """Spacing-buffered, prepared copy of a placed polygon.
         
-        return None
+        Placed polygons never move, so the buffer is computed once per polygon
+        instead of once per candidate position.
+        """
+        key = id(occupied)
+        cached = self._buffer_cache.get(key)
+        if cached is not None and cached[0] is occupied:
+            self.metrics.count('buffer_cache_hits')
+            return cached[1]
+        
+        self.metrics.count('buffer_cache_misses')
+        buffered = prep(occupied.buffer(self.spacing))
+        # Keep a reference to the source polygon so its id() cannot be reused
+        self._buffer_cache[key] = (occupied, buffered)
+        return buffered
     
     def process_nesting_result_simple(self, placed_parts, unfittable_parts):
         """Process nesting results for simple algorithm"""
@@ -385,7 +860,9 @@ class DXFNester:
                 'nested_dxf': None,
                 'utilization': 0.0,
                 'unfittable_parts': unfittable_parts,
-                'message': 'No parts could be placed'
+                'placed_count': 0,
+                'message': 'No parts could be placed',
+                'metrics': self.metrics.as_dict()
             }
         
         # Calculate utilization
@@ -394,7 +871,8 @@ class DXFNester:
         utilization = (total_part_area / sheet_area) * 100 if sheet_area > 0 else 0
         
         # Generate nested DXF
-        nested_dxf_path = self.generate_nested_dxf(placed_parts)
+        with self.metrics.phase('dxf_write'):
+            nested_dxf_path = self.generate_nested_dxf(placed_parts)
         
         print(f"Nested {len(placed_parts)} parts, utilization: {utilization:.1f}%")
         if unfittable_parts:
@@ -405,10 +883,11 @@ class DXFNester:
             'utilization': utilization,
             'unfittable_parts': unfittable_parts,
             'placed_count': len(placed_parts),
-            'message': f'Successfully nested {len(placed_parts)} parts'
+            'message': f'Successfully nested {len(placed_parts)} parts',
+            'metrics': self.metrics.as_dict()
         }
     
-    def generate_nested_dxf(self, placed_items):
+    def generate_nested_dxf(self, placed_items, output_name=None):
         """Generate DXF file with nested layout preserving original geometry"""
         doc = ezdxf.new('R2010')
         msp = doc.modelspace()
@@ -428,8 +907,9 @@ class DXFNester:
             self._add_transformed_entities(msp, item)
         
         # Save nested DXF with custom name if specified
-        output_name = os.environ.get('OUTPUT_NAME', 'nested_layout')
-        output_dir = os.environ.get('OUTPUT_DIR', '/tmp/nesting_output')
+        if output_name is None:
+            output_name = self.output_name or os.environ.get('OUTPUT_NAME', 'nested_layout')
+        output_dir = self.output_dir or os.environ.get('OUTPUT_DIR', '/tmp/nesting_output')
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, f'{output_name}.dxf')
         doc.saveas(output_path)
@@ -661,8 +1141,15 @@ def main():
         print("No DXF files found")
         sys.exit(1)
     
-    # Perform nesting
-    result = nester.nest_parts(dxf_files)
+    output_dir = os.environ.get('OUTPUT_DIR', '/app/output')
+    
+    # Perform nesting, choosing between stock sheet sizes if any are given
+    stock_sheets = os.environ.get('STOCK_SHEETS')
+    with profiled(output_dir):
+        if stock_sheets:
+            result = nester.nest_parts_on_stock(dxf_files, stock_sheets)
+        else:
+            result = nester.nest_parts(dxf_files)
     
     # Save results as JSON
     output_info = {
@@ -673,12 +1160,19 @@ def main():
         'total_parts': len(dxf_files),
         'message': result['message']
     }
+    if 'sheets' in result:
+        output_info['nested_dxfs'] = result['nested_dxfs']
+        output_info['sheets'] = result['sheets']
+        output_info['total_cost'] = result['total_cost']
+    output_info['metrics'] = nester.metrics.as_dict()
     
-    with open('/app/output/nesting_results.json', 'w') as f:
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, 'nesting_results.json')
+    with open(results_path, 'w') as f:
         json.dump(output_info, f, indent=2)
     
     print(f"\nNesting complete!")
-    print(f"Results saved to: /app/output/nesting_results.json")
+    print(f"Results saved to: {results_path}")
     if result['nested_dxf']:
         print(f"Nested DXF saved to: {result['nested_dxf']}")
 
@@ -0,0 +1,161 @@
+import pytest
+import os
+import sys
+
+import ezdxf
+
+# Add the nesting directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from nest import DXFNester, parse_stock_sheets, profiled
+
+
+def make_rectangle_dxf(path, width, height):
+    """Write a DXF containing a single closed rectangle"""
+    doc = ezdxf.new('R2010')
+    doc.modelspace().add_lwpolyline(
+        [(0, 0), (width, 0), (width, height), (0, height)], close=True
+    )
+    doc.saveas(path)
+    return str(path)
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    out = tmp_path / 'output'
+    monkeypatch.setenv('OUTPUT_DIR', str(out))
+    monkeypatch.setenv('OUTPUT_NAME', 'nested')
+    return out
+
+
+def test_parse_stock_sheets_defaults():
+    """Test stock sheet cost falls back to priority, then area"""
+    sheets = parse_stock_sheets('[{"width": 100, "height": 50}, '
+                                '{"width": 200, "height": 100, "priority": 3}]')
+    assert sheets[0]['cost'] == 5000
+    assert sheets[0]['name'] == '100x50'
+    assert sheets[1]['cost'] == 3
+
+    with pytest.raises(ValueError):
+        parse_stock_sheets([{'width': 0, 'height': 10}])
+
+
+def test_nest_on_cheapest_stock(tmp_path, output_dir):
+    """Test the cheapest stock size that holds every part is selected"""
+    files = [make_rectangle_dxf(tmp_path / f'part_{i}.dxf', 40, 30) for i in range(2)]
+    stock = [
+        {'name': 'large', 'width': 400, 'height': 400, 'cost': 10},
+        {'name': 'small', 'width': 100, 'height': 60, 'cost': 2},
+        {'name': 'tiny', 'width': 20, 'height': 20, 'cost': 1},
+    ]
+
+    nester = DXFNester(spacing=2.0)
+    result = nester.nest_parts_on_stock(files, stock, max_workers=1)
+
+    assert result['placed_count'] == 2
+    assert result['unfittable_parts'] == []
+    assert [s['name'] for s in result['sheets']] == ['small']
+    assert result['total_cost'] == 2
+    # 'tiny' cannot hold the parts and 'large' cannot beat the first plan
+    assert result['candidates_pruned'] == 2
+    assert os.path.exists(result['nested_dxf'])
+
+
+def test_nest_on_stock_downsizes_last_sheet(tmp_path, output_dir):
+    """Test overflow parts are moved from a full sheet to cheaper stock"""
+    files = [make_rectangle_dxf(tmp_path / f'part_{i}.dxf', 40, 40) for i in range(3)]
+    stock = [
+        {'name': 'double', 'width': 90, 'height': 45, 'cost': 3},
+        {'name': 'single', 'width': 45, 'height': 45, 'cost': 2},
+    ]
+
+    nester = DXFNester(spacing=2.0)
+    result = nester.nest_parts_on_stock(files, stock, max_workers=1)
+
+    assert result['placed_count'] == 3
+    assert [s['name'] for s in result['sheets']] == ['double', 'single']
+    assert result['total_cost'] == 5
+    assert len(result['nested_dxfs']) == 2
+    assert all(os.path.exists(path) for path in result['nested_dxfs'])
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_nest_on_mixed_stock_sizes(tmp_path, output_dir, max_workers):
+    """Test parts that no single stock size holds are nested on one sheet of each size"""
+    strip = make_rectangle_dxf(tmp_path / 'strip.dxf', 280, 40)
+    square = make_rectangle_dxf(tmp_path / 'square.dxf', 140, 140)
+    stock = [
+        {'name': 'long', 'width': 300, 'height': 50},
+        {'name': 'square', 'width': 150, 'height': 150},
+    ]
+
+    nester = DXFNester(spacing=2.0)
+    result = nester.nest_parts_on_stock([strip, square], stock, max_workers=max_workers)
+
+    assert result['placed_count'] == 2
+    assert result['unfittable_parts'] == []
+    assert sorted(s['name'] for s in result['sheets']) == ['long', 'square']
+    assert result['total_cost'] == 300 * 50 + 150 * 150
+    assert all(os.path.exists(path) for path in result['nested_dxfs'])
+
+
+def test_nest_on_stock_reports_oversized_parts(tmp_path, output_dir):
+    """Test parts larger than every stock sheet are reported as unfittable"""
+    small = make_rectangle_dxf(tmp_path / 'small.dxf', 20, 20)
+    huge = make_rectangle_dxf(tmp_path / 'huge.dxf', 500, 500)
+
+    nester = DXFNester(spacing=2.0)
+    result = nester.nest_parts_on_stock(
+        [small, huge], [{'width': 100, 'height': 100}], max_workers=1
+    )
+
+    assert result['placed_count'] == 1
+    assert result['unfittable_parts'] == [huge]
+
+
+def test_nest_parts_reports_metrics(tmp_path, output_dir):
+    """Test phase timings and placement counters are reported"""
+    files = [make_rectangle_dxf(tmp_path / f'part_{i}.dxf', 40, 30) for i in range(3)]
+
+    nester = DXFNester(200, 100, 2.0)
+    result = nester.nest_parts(files)
+
+    metrics = result['metrics']
+    for phase in ('dxf_parse', 'polygon_extraction', 'rotation_prep', 'placement_search', 'dxf_write'):
+        assert phase in metrics['timings_s']
+    counters = metrics['counters']
+    assert counters['candidates_tried'] == nester.placement_evaluations > 0
+    assert counters['intersect_calls'] > 0
+    # Each placed part is buffered once and reused by later searches
+    assert counters['buffer_cache_misses'] == 2
+    assert counters['buffer_cache_hits'] > 0
+
+
+def test_nothing_placed_reports_zero_metrics(tmp_path, output_dir):
+    """Test a run that places no parts reports the same metrics keys, at zero where nothing ran"""
+    files = [make_rectangle_dxf(tmp_path / 'part.dxf', 40, 30)]
+
+    placed = DXFNester(200, 100, 2.0).nest_parts(files)
+    result = DXFNester(20, 10, 2.0).nest_parts(files)
+
+    assert result['placed_count'] == 0
+    assert result['nested_dxf'] is None
+    metrics = result['metrics']
+    assert metrics['timings_s'].keys() == placed['metrics']['timings_s'].keys()
+    assert metrics['counters'].keys() == placed['metrics']['counters'].keys()
+    assert metrics['timings_s']['dxf_write'] == 0.0
+    assert metrics['counters']['buffer_cache_misses'] == 0
+
+
+def test_profile_written_to_profile_dir(tmp_path, monkeypatch):
+    """Test NESTING_PROFILE_DIR keeps profiles out of the run's output directory"""
+    profiles = tmp_path / 'profiles'
+    monkeypatch.setenv('NESTING_PROFILE', 'cprofile')
+    monkeypatch.setenv('NESTING_PROFILE_DIR', str(profiles))
+
+    for _ in range(2):
+        with profiled(str(tmp_path / 'output')):
+            sum(range(1000))
+
+    assert len(list(profiles.glob('nesting_profile_*.prof'))) == 2
+    assert not (tmp_path / 'output').exists()
@@ -1,19 +1,160 @@
 #!/usr/bin/env python3
 import os
 import sys
+import json
+import time
+import uuid
+import shutil
 import tempfile
 import urllib.request
 import urllib.parse
-from flask import Flask, request, send_file, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, request, send_file, send_from_directory, jsonify
 import subprocess
 import logging
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'unfolder'))
+from worker_pool import get_pool, UnfoldError
+from result_cache import get_cache
+from metrics import read_metrics
+from unfold_outputs import DEFAULT_OUTPUTS
+from materials import material_path
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Warm FreeCAD workers; UNFOLD_WORKERS=0 starts FreeCAD per request instead
+USE_WORKER_POOL = os.environ.get('UNFOLD_WORKERS', '2') != '0'
+
+# Batch outputs are kept for download until UNFOLD_BATCH_TTL seconds old
+BATCH_DIR = os.environ.get('UNFOLD_BATCH_DIR', os.path.join(tempfile.gettempdir(), 'unfold_batches'))
+BATCH_TTL = float(os.environ.get('UNFOLD_BATCH_TTL', 3600))
+MAX_BATCH_SIZE = int(os.environ.get('UNFOLD_MAX_BATCH_SIZE', 100))
+# Files downloaded at once; unfolding is bounded by the worker pool size
+DOWNLOAD_WORKERS = int(os.environ.get('UNFOLD_DOWNLOAD_WORKERS', 8))
+# What FreeCAD writes for a request (see unfold_outputs.OUTPUTS). Only the
+# DXF is returned, so by default the unbent STEP model and bend lines are skipped.
+UNFOLD_OUTPUTS = DEFAULT_OUTPUTS
+DXF_OUTPUTS = ('dxf', 'dxf+bendlines', 'all')
+
+def unfold_file(input_path, k_factor, output_dir, source=None, outputs=None, material=None):
+    """Unfold a downloaded STEP file into output_dir.
+
+    Served from the result cache when possible, otherwise run on the warm
+    worker pool (or a fresh FreeCAD process with UNFOLD_WORKERS=0). outputs
+    selects the files to write (default UNFOLD_OUTPUTS); material is the path
+    of a material file replacing k_factor (see materials.material_path).
+    Returns the unfold result; raises UnfoldError when FreeCAD fails.
+    """
+    outputs = outputs or UNFOLD_OUTPUTS
+    # Identical STEP bytes and settings were unfolded before: skip FreeCAD
+    cache = get_cache()
+    cache_key = cache.key(input_path, k_factor, outputs=outputs, material_path=material) if cache else None
+    unfold_result = cache.get(cache_key, output_dir) if cache else None
+    if unfold_result is not None:
+        logger.info(f"Unfold cache hit: {cache_key}")
+        return unfold_result
+    
+    if USE_WORKER_POOL:
+        unfold_result = get_pool().unfold(input_path, float(k_factor), output_dir, outputs=outputs,
+                                          material_path=material)
+        logger.info(f"Unfolded in {unfold_result['elapsed_s']:.2f}s")
+    else:
+        # Set environment variables for the unfolding process
+        env = os.environ.copy()
+        env['K_FACTOR'] = str(k_factor)
+        env['OUTPUT_DIR'] = output_dir
+        env['UNFOLD_OUTPUTS'] = outputs
+        if material:
+            env['UNFOLD_MATERIAL'] = material
+        
+        if os.environ.get('UNFOLD_DXF_WRITER') == 'importdxf':
+            # importDXF needs the Draft workbench, which needs a display
+            cmd = [
+                'xvfb-run', '-a',
+                'freecad', input_path,
+                '-c', '/app/src/unfolder/unfold.py'
+            ]
+        else:
+            cmd = ['freecadcmd', '-c', '/app/src/unfolder/unfold.py', input_path]
+        
+        logger.info(f"Running command: {' '.join(cmd)}")
+        
+        result = subprocess.run(
+            cmd,
+            env=env,
+            capture_output=True,
+            text=True,
+            cwd=output_dir  # Set working directory to the output directory
+        )
+        
+        if result.returncode != 0:
+            raise UnfoldError(f"FreeCAD exited with code {result.returncode}", result.stderr)
+        unfold_result = {
+            'dxf_path': os.path.join(output_dir, 'largest_face.dxf'),
+            'step_path': os.path.join(output_dir, 'unbend_model.step'),
+            'metrics': read_metrics(output_dir)
+        }
+    
+    if cache:
+        cache.put(cache_key, unfold_result, {'k_factor': float(k_factor), 'source': source})
+    return unfold_result
+
+def unfold_assembly_file(input_path, k_factor, output_dir, material=None):
+    """Unfold every distinct sheet-metal solid of a downloaded STEP file.
+
+    Parts run in parallel on the worker pool (or one after another in a
+    fresh FreeCAD process with UNFOLD_WORKERS=0). Returns the split result
+    with each part's output paths; raises UnfoldError when the file cannot
+    be split.
+    """
+    if USE_WORKER_POOL:
+        return get_pool().unfold_assembly(input_path, float(k_factor), output_dir,
+                                          material_path=material, outputs=UNFOLD_OUTPUTS)
+    
+    env = os.environ.copy()
+    env['K_FACTOR'] = str(k_factor)
+    env['OUTPUT_DIR'] = output_dir
+    env['UNFOLD_ASSEMBLY'] = '1'
+    env['UNFOLD_OUTPUTS'] = UNFOLD_OUTPUTS
+    if material:
+        env['UNFOLD_MATERIAL'] = material
+    cmd = ['freecadcmd', '-c', '/app/src/unfolder/unfold.py', input_path]
+    logger.info(f"Running command: {' '.join(cmd)}")
+    result = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=output_dir)
+    manifest_path = os.path.join(output_dir, 'assembly.json')
+    if result.returncode != 0 or not os.path.exists(manifest_path):
+        raise UnfoldError(f"FreeCAD exited with code {result.returncode}", result.stderr)
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def sweep_file(input_path, k_factors, output_dir):
+    """Unfold a downloaded STEP file once per k-factor.
+
+    The geometry is analyzed once and only the bend allowances change
+    between k-factors. Runs on the worker pool (or a fresh FreeCAD process
+    with UNFOLD_WORKERS=0); returns the per k-factor results and raises
+    UnfoldError when the file cannot be analyzed.
+    """
+    if USE_WORKER_POOL:
+        return get_pool().sweep(input_path, k_factors, output_dir)
+    
+    env = os.environ.copy()
+    env['K_FACTORS'] = ','.join(str(k) for k in k_factors)
+    env['OUTPUT_DIR'] = output_dir
+    cmd = ['freecadcmd', '-c', '/app/src/unfolder/unfold.py', input_path]
+    logger.info(f"Running command: {' '.join(cmd)}")
+    os.makedirs(output_dir, exist_ok=True)
+    result = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=output_dir)
+    manifest_path = os.path.join(output_dir, 'sweep.json')
+    if result.returncode != 0 or not os.path.exists(manifest_path):
+        raise UnfoldError(f"FreeCAD exited with code {result.returncode}", result.stderr)
+    with open(manifest_path) as f:
+        return json.load(f)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -34,6 +175,13 @@ def unfold_step():
         
         # Get optional parameters
         k_factor = request.args.get('k_factor', os.environ.get('K_FACTOR', '0.38'))
+        outputs = request.args.get('outputs', UNFOLD_OUTPUTS)
+        if outputs not in DXF_OUTPUTS:
+            return jsonify({"error": f"'outputs' must be one of: {', '.join(DXF_OUTPUTS)}"}), 400
+        try:
+            material = material_path(request.args.get('material'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         logger.info(f"Processing STEP file from URL: {step_url}")
         
@@ -63,34 +211,16 @@ def unfold_step():
                 logger.error(f"Failed to download STEP file: {e}")
                 return jsonify({"error": f"Failed to download STEP file: {str(e)}"}), 400
             
-            # Set environment variables for the unfolding process
-            env = os.environ.copy()
-            env['K_FACTOR'] = str(k_factor)
-            env['OUTPUT_DIR'] = temp_dir
-            
-            # Run the unfold script using xvfb-run to handle display
-            cmd = [
-                'xvfb-run', '-a',
-                'freecad', input_path,
-                '-c', '/app/src/unfolder/unfold.py'
-            ]
-            
-            logger.info(f"Running command: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                env=env,
-                capture_output=True,
-                text=True,
-                cwd=temp_dir  # Set working directory to temp_dir
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"Unfold process failed: {result.stderr}")
+            try:
+                unfold_result = unfold_file(input_path, k_factor, temp_dir, original_filename, outputs,
+                                            material)
+            except UnfoldError as e:
+                logger.error(f"Unfold process failed: {e}\n{e.details or ''}")
                 return jsonify({
                     "error": "Unfold process failed",
-                    "details": result.stderr
+                    "details": e.details or str(e)
                 }), 500
+            cache_hit = unfold_result.get('cached', False)
             
             # Look for the output DXF file (expecting largest_face.dxf)
             output_files = []
@@ -106,17 +236,350 @@ def unfold_step():
             output_path = output_files[0]
             logger.info(f"Returning unfolded DXF: {os.path.basename(output_path)} as {output_filename}")
             
-            return send_file(
+            response = send_file(
                 output_path,
                 mimetype='application/dxf',
                 as_attachment=True,
                 download_name=output_filename
             )
+            response.headers['X-Unfold-Cache'] = 'hit' if cache_hit else 'miss'
+            if unfold_result.get('metrics'):
+                # Per-phase timings and counts, to diagnose slow parts
+                response.headers['X-Unfold-Metrics'] = json.dumps(
+                    unfold_result['metrics'], separators=(',', ':'))
+            return response
+            
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+def dxf_filename_for(url, used_names):
+    """Output DXF name for a STEP URL, unique within used_names"""
+    original_filename = os.path.basename(urllib.parse.urlparse(url).path)
+    base_name = os.path.splitext(original_filename)[0] or 'unfolded'
+    filename = f"{base_name}.dxf"
+    suffix = 2
+    while filename in used_names:
+        filename = f"{base_name}_{suffix}.dxf"
+        suffix += 1
+    used_names.add(filename)
+    return filename
+
+def unfold_batch_item(step_url, k_factor, batch_id, batch_dir, output_filename, material=None):
+    """Download and unfold one file of a batch; returns its manifest entry"""
+    entry = {
+        "url": step_url,
+        "filename": output_filename,
+        "status": "failed",
+        "timings": {}
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, 'input.step')
+        start = time.perf_counter()
+        try:
+            urllib.request.urlretrieve(step_url, input_path)
+        except Exception as e:
+            logger.error(f"Failed to download {step_url}: {e}")
+            entry["status"] = "download_failed"
+            entry["error"] = f"Failed to download STEP file: {str(e)}"
+            return entry
+        finally:
+            entry["timings"]["download_s"] = round(time.perf_counter() - start, 4)
+        
+        start = time.perf_counter()
+        try:
+            unfold_result = unfold_file(
+                input_path, k_factor, os.path.join(work_dir, 'output'),
+                os.path.basename(urllib.parse.urlparse(step_url).path), material=material
+            )
+        except UnfoldError as e:
+            logger.error(f"Unfold of {step_url} failed: {e}")
+            entry["error"] = str(e)
+            entry["details"] = e.details
+            return entry
+        finally:
+            entry["timings"]["unfold_s"] = round(time.perf_counter() - start, 4)
+        
+        dxf_path = unfold_result.get('dxf_path')
+        if not dxf_path or not os.path.exists(dxf_path):
+            entry["error"] = "No output DXF file generated"
+            return entry
+        shutil.move(dxf_path, os.path.join(batch_dir, output_filename))
+    
+    entry["status"] = "ok"
+    entry["cached"] = unfold_result.get('cached', False)
+    if unfold_result.get('metrics'):
+        entry["metrics"] = unfold_result['metrics']
+    entry["dxf_url"] = f"/unfold/batch/{batch_id}/{output_filename}"
+    return entry
+
+def remove_expired_batches():
+    """Delete batch outputs older than BATCH_TTL"""
+    if not os.path.isdir(BATCH_DIR):
+        return
+    cutoff = time.time() - BATCH_TTL
+    for name in os.listdir(BATCH_DIR):
+        path = os.path.join(BATCH_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            continue
+
+@app.route('/unfold/batch', methods=['POST'])
+def unfold_batch():
+    """
+    POST endpoint to unfold many STEP files in one request.
+    JSON body: {"urls": [<step_url>, ...], "k_factor": 0.38, "material": <file name>}
+    Files are downloaded concurrently and unfolded on the warm FreeCAD
+    workers. Returns a manifest with per-file status, timings and the URL
+    of each DXF under /unfold/batch/<batch_id>/.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        step_urls = body.get('urls')
+        if not isinstance(step_urls, list) or not step_urls:
+            return jsonify({"error": "Body must contain a non-empty 'urls' list"}), 400
+        if len(step_urls) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} files per batch"}), 400
+        k_factor = body.get('k_factor', os.environ.get('K_FACTOR', '0.38'))
+        try:
+            float(k_factor)
+        except (TypeError, ValueError):
+            return jsonify({"error": "'k_factor' must be a number"}), 400
+        try:
+            material = material_path(body.get('material'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        remove_expired_batches()
+        batch_id = uuid.uuid4().hex[:12]
+        batch_dir = os.path.join(BATCH_DIR, batch_id)
+        os.makedirs(batch_dir)
+        logger.info(f"Batch {batch_id}: unfolding {len(step_urls)} STEP files")
+        
+        used_names = set()
+        output_filenames = [dxf_filename_for(url, used_names) for url in step_urls]
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(step_urls), DOWNLOAD_WORKERS)) as executor:
+            files = list(executor.map(
+                lambda item: unfold_batch_item(item[0], k_factor, batch_id, batch_dir, item[1], material),
+                zip(step_urls, output_filenames)
+            ))
+        
+        succeeded = sum(1 for entry in files if entry["status"] == "ok")
+        manifest = {
+            "batch_id": batch_id,
+            "k_factor": float(k_factor),
+            "total": len(files),
+            "succeeded": succeeded,
+            "failed": len(files) - succeeded,
+            "total_s": round(time.perf_counter() - start, 4),
+            "files": files
+        }
+        with open(os.path.join(batch_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Batch {batch_id}: {succeeded}/{len(files)} unfolded in {manifest['total_s']:.2f}s")
+        
+        return jsonify(manifest), 200
+        
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+@app.route('/unfold/assembly', methods=['POST'])
+def unfold_assembly():
+    """
+    POST endpoint to unfold every sheet-metal part of a STEP assembly.
+    JSON body: {"url": <step_url>, "k_factor": 0.38, "material": <file name>}
+    Solids that are not sheet metal are skipped, and identical solids are
+    unfolded once. Returns a manifest with one DXF per distinct part under
+    /unfold/batch/<batch_id>/, plus the labels of every instance of it.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        step_url = body.get('url')
+        if not step_url:
+            return jsonify({"error": "Body must contain 'url'"}), 400
+        k_factor = body.get('k_factor', os.environ.get('K_FACTOR', '0.38'))
+        try:
+            float(k_factor)
+        except (TypeError, ValueError):
+            return jsonify({"error": "'k_factor' must be a number"}), 400
+        try:
+            material = material_path(body.get('material'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        remove_expired_batches()
+        batch_id = uuid.uuid4().hex[:12]
+        batch_dir = os.path.join(BATCH_DIR, batch_id)
+        os.makedirs(batch_dir)
+        base_name = os.path.splitext(os.path.basename(urllib.parse.urlparse(step_url).path))[0] or 'assembly'
+        
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_path = os.path.join(work_dir, 'input.step')
+            try:
+                urllib.request.urlretrieve(step_url, input_path)
+            except Exception as e:
+                logger.error(f"Failed to download STEP file: {e}")
+                return jsonify({"error": f"Failed to download STEP file: {str(e)}"}), 400
+            
+            try:
+                assembly = unfold_assembly_file(input_path, k_factor, os.path.join(work_dir, 'output'), material)
+            except UnfoldError as e:
+                logger.error(f"Assembly unfold failed: {e}\n{e.details or ''}")
+                return jsonify({
+                    "error": "Unfold process failed",
+                    "details": e.details or str(e)
+                }), 500
+            
+            parts = []
+            for part in assembly['parts']:
+                entry = {
+                    "name": part['name'],
+                    "instances": part['instances'],
+                    "quantity": len(part['instances']),
+                    "thickness": part.get('thickness'),
+                    "status": "failed"
+                }
+                dxf_path = part.get('dxf_path')
+                if part.get('error'):
+                    entry["error"] = part['error']
+                elif not dxf_path or not os.path.exists(dxf_path):
+                    entry["error"] = "No output DXF file generated"
+                else:
+                    filename = f"{base_name}_{part['name']}.dxf"
+                    shutil.move(dxf_path, os.path.join(batch_dir, filename))
+                    entry["status"] = "ok"
+                    entry["filename"] = filename
+                    entry["dxf_url"] = f"/unfold/batch/{batch_id}/{filename}"
+                if 'elapsed_s' in part:
+                    entry["unfold_s"] = part['elapsed_s']
+                parts.append(entry)
+        
+        succeeded = sum(1 for entry in parts if entry["status"] == "ok")
+        manifest = {
+            "batch_id": batch_id,
+            "url": step_url,
+            "k_factor": float(k_factor),
+            "total": len(parts),
+            "succeeded": succeeded,
+            "failed": len(parts) - succeeded,
+            "total_s": round(time.perf_counter() - start, 4),
+            "parts": parts,
+            "skipped": assembly['skipped']
+        }
+        with open(os.path.join(batch_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Assembly {batch_id}: {succeeded}/{len(parts)} parts unfolded in {manifest['total_s']:.2f}s")
+        
+        return jsonify(manifest), 200
+        
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+@app.route('/unfold/sweep', methods=['POST'])
+def unfold_sweep():
+    """
+    POST endpoint to unfold one STEP file with several k-factors.
+    JSON body: {"url": <step_url>, "k_factors": [0.33, 0.38, 0.44]}
+    The part is analyzed once and laid out flat once per k-factor. Returns
+    a manifest with one DXF per k-factor under /unfold/batch/<batch_id>/,
+    along with the size of each flat pattern.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        step_url = body.get('url')
+        if not step_url:
+            return jsonify({"error": "Body must contain 'url'"}), 400
+        k_factors = body.get('k_factors')
+        if not isinstance(k_factors, list) or not k_factors:
+            return jsonify({"error": "Body must contain a non-empty 'k_factors' list"}), 400
+        if len(k_factors) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} k-factors per sweep"}), 400
+        try:
+            # 0.4 and 0.40 give the same DXF: unfold it once
+            k_factors = list(dict.fromkeys(float(k) for k in k_factors))
+        except (TypeError, ValueError):
+            return jsonify({"error": "'k_factors' must be numbers"}), 400
+        
+        remove_expired_batches()
+        batch_id = uuid.uuid4().hex[:12]
+        batch_dir = os.path.join(BATCH_DIR, batch_id)
+        os.makedirs(batch_dir)
+        base_name = os.path.splitext(os.path.basename(urllib.parse.urlparse(step_url).path))[0] or 'unfolded'
+        
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_path = os.path.join(work_dir, 'input.step')
+            try:
+                urllib.request.urlretrieve(step_url, input_path)
+            except Exception as e:
+                logger.error(f"Failed to download STEP file: {e}")
+                return jsonify({"error": f"Failed to download STEP file: {str(e)}"}), 400
+            
+            try:
+                sweep = sweep_file(input_path, k_factors, os.path.join(work_dir, 'output'))
+            except UnfoldError as e:
+                logger.error(f"Sweep failed: {e}\n{e.details or ''}")
+                return jsonify({
+                    "error": "Unfold process failed",
+                    "details": e.details or str(e)
+                }), 500
             
+            files = []
+            for item in sweep['results']:
+                entry = {
+                    "k_factor": item['k_factor'],
+                    "status": "failed",
+                    "unfold_s": item.get('elapsed_s')
+                }
+                dxf_path = item.get('dxf_path')
+                if item.get('error'):
+                    entry["error"] = item['error']
+                elif not dxf_path or not os.path.exists(dxf_path):
+                    entry["error"] = "No output DXF file generated"
+                else:
+                    filename = f"{base_name}_k{item['k_factor']:g}.dxf"
+                    shutil.move(dxf_path, os.path.join(batch_dir, filename))
+                    entry["status"] = "ok"
+                    entry["filename"] = filename
+                    entry["dxf_url"] = f"/unfold/batch/{batch_id}/{filename}"
+                    entry["flat_size"] = item.get('flat_size')
+                files.append(entry)
+        
+        succeeded = sum(1 for entry in files if entry["status"] == "ok")
+        manifest = {
+            "batch_id": batch_id,
+            "url": step_url,
+            "thickness": sweep.get('thickness'),
+            "total": len(files),
+            "succeeded": succeeded,
+            "failed": len(files) - succeeded,
+            "analysis_s": sweep.get('analysis_s'),
+            "metrics": sweep.get('metrics'),
+            "total_s": round(time.perf_counter() - start, 4),
+            "files": files
+        }
+        with open(os.path.join(batch_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Sweep {batch_id}: {succeeded}/{len(files)} k-factors unfolded in {manifest['total_s']:.2f}s")
+        
+        return jsonify(manifest), 200
+        
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
+@app.route('/unfold/batch/<batch_id>/<path:filename>', methods=['GET'])
+def unfold_batch_file(batch_id, filename):
+    """Download one output (or manifest.json) of a batch"""
+    return send_from_directory(os.path.join(BATCH_DIR, os.path.basename(batch_id)), filename, as_attachment=True)
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint with usage information"""
@@ -128,10 +591,41 @@ def index():
                 "description": "Unfold a STEP file into DXF",
                 "parameters": {
                     "url": "URL to the STEP file (required)",
-                    "k_factor": "K-factor for unfolding (optional, default: 0.38)"
+                    "k_factor": "K-factor for unfolding (optional, default: 0.38)",
+                    "outputs": "dxf, dxf+bendlines or all; dxf+bendlines adds bend lines on layer BEND (optional, default: dxf)",
+                    "material": "Name of a .json/.csv material file in UNFOLD_MATERIAL_DIR whose k-factor table replaces k_factor (optional, default: UNFOLD_MATERIAL)"
                 },
                 "example": "/unfold?url=https://example.com/file.step&k_factor=0.4"
             },
+            "/unfold/batch": {
+                "method": "POST",
+                "description": "Unfold many STEP files; returns a manifest with per-file status and timings",
+                "body": {
+                    "urls": "List of URLs to STEP files (required)",
+                    "k_factor": "K-factor for unfolding (optional, default: 0.38)",
+                    "material": "Material file name, as for /unfold (optional)"
+                },
+                "outputs": "/unfold/batch/<batch_id>/<filename>"
+            },
+            "/unfold/assembly": {
+                "method": "POST",
+                "description": "Unfold every sheet metal part of a STEP assembly, one DXF per distinct part",
+                "body": {
+                    "url": "URL to the STEP assembly (required)",
+                    "k_factor": "K-factor for unfolding (optional, default: 0.38)",
+                    "material": "Material file name, as for /unfold (optional)"
+                },
+                "outputs": "/unfold/batch/<batch_id>/<filename>"
+            },
+            "/unfold/sweep": {
+                "method": "POST",
+                "description": "Unfold one STEP file with several k-factors from a single analysis, one DXF per k-factor",
+                "body": {
+                    "url": "URL to the STEP file (required)",
+                    "k_factors": "List of K-factors to unfold with (required)"
+                },
+                "outputs": "/unfold/batch/<batch_id>/<filename>"
+            },
             "/health": {
                 "method": "GET",
                 "description": "Health check endpoint"
@@ -140,5 +634,8 @@ def index():
     }), 200
 
 if __name__ == '__main__':
+    if USE_WORKER_POOL:
+        # Pay the FreeCAD startup cost before the first request
+        get_pool().start()
     port = int(os.environ.get('PORT', 5001))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
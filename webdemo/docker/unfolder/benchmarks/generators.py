@@ -0,0 +1,241 @@
+"""Parametric sheet-metal parts for unfold benchmarks.
+
+Every generator builds its solid headlessly with FreeCAD's Part API and
+returns it together with the area its flat pattern must have for a given
+k-factor, worked out from the dimensions it was built with:
+
+    flat area = sum of flat lengths x width + sum of bend allowances x width
+                - cutouts
+
+where each bend allowance is (inner radius + k-factor x thickness) x angle,
+as in SheetMetalNewUnfolder.BendAllowanceCalculator.
+"""
+
+from math import atan2, cos, pi, sin, tan
+from typing import NamedTuple
+
+import Part
+from FreeCAD import Matrix, Vector
+
+
+class GeneratedPart(NamedTuple):
+    shape: Part.Shape
+    thickness: float
+    flat_area: float
+    # allowed deviation of the flat pattern's area from flat_area
+    area_tolerance: float
+    bends: int
+
+
+class SheetPath:
+    """The centerline of a bent strip in the XZ plane, drawn like a turtle:
+    forward() adds a flat, bend() a bend to the left (or to the right for a
+    negative angle). solid() thickens it and extrudes it along +Y."""
+
+    def __init__(self, x=0.0, z=0.0, heading=0.0):
+        self.position = (x, z)
+        self.heading = heading
+        self.elements = []
+
+    def forward(self, length):
+        x, z = self.position
+        end = (x + length * cos(self.heading), z + length * sin(self.heading))
+        self.elements.append(('line', self.position, end))
+        self.position = end
+        return self
+
+    def bend(self, angle, radius):
+        """Turn by angle radians around a centerline radius"""
+        x, z = self.position
+        sign = 1 if angle > 0 else -1
+        center = (x - sign * radius * sin(self.heading), z + sign * radius * cos(self.heading))
+        start_angle = self.heading - sign * pi / 2
+        end_angle = start_angle + angle
+        self.elements.append(('arc', center, radius, start_angle, end_angle))
+        self.position = (center[0] + radius * cos(end_angle), center[1] + radius * sin(end_angle))
+        self.heading += angle
+        return self
+
+    def flat_length(self, thickness, k_factor):
+        """Length of the flat pattern of the strip"""
+        length = 0.0
+        for element in self.elements:
+            if element[0] == 'line':
+                _, (x1, z1), (x2, z2) = element
+                length += ((x2 - x1) ** 2 + (z2 - z1) ** 2) ** 0.5
+            else:
+                _, _, radius, start_angle, end_angle = element
+                inner_radius = radius - thickness / 2
+                length += (inner_radius + k_factor * thickness) * abs(end_angle - start_angle)
+        return length
+
+    @property
+    def bends(self):
+        return sum(1 for element in self.elements if element[0] == 'arc')
+
+    def offset_edges(self, offset):
+        """Edges of the centerline offset to its left"""
+        edges = []
+        current = None
+        for element in self.elements:
+            if element[0] == 'line':
+                _, (x1, z1), (x2, z2) = element
+                heading = atan2(z2 - z1, x2 - x1)
+                left = (-sin(heading) * offset, cos(heading) * offset)
+                start = current or Vector(x1 + left[0], 0.0, z1 + left[1])
+                end = Vector(x2 + left[0], 0.0, z2 + left[1])
+                edges.append(Part.LineSegment(start, end).toShape())
+            else:
+                _, (cx, cz), radius, start_angle, end_angle = element
+                # the left of a counter-clockwise arc is towards its center
+                radius = radius - offset if end_angle > start_angle else radius + offset
+
+                def at(angle):
+                    return Vector(cx + radius * cos(angle), 0.0, cz + radius * sin(angle))
+
+                start = current or at(start_angle)
+                end = at(end_angle)
+                middle = at((start_angle + end_angle) / 2)
+                edges.append(Part.Arc(start, middle, end).toShape())
+            current = end
+        return edges
+
+    def solid(self, thickness, width):
+        top = self.offset_edges(thickness / 2)
+        bottom = self.offset_edges(-thickness / 2)
+        end_cap = Part.LineSegment(top[-1].lastVertex().Point, bottom[-1].lastVertex().Point)
+        start_cap = Part.LineSegment(bottom[0].firstVertex().Point, top[0].firstVertex().Point)
+        wire = Part.Wire(top + [end_cap.toShape()] + list(reversed(bottom)) + [start_cap.toShape()])
+        return Part.Face(wire).extrude(Vector(0.0, width, 0.0))
+
+
+def box_with_flanges(flanges, k_factor, side=60.0, height=12.0, thickness=1.0, radius=1.0):
+    """A regular polygon base with a flange bent up by 90 degrees along each
+    of its `flanges` sides (a 4 flange box is an open square tray). The
+    flanges stop 2 x thickness short of the corners so they don't touch."""
+    center_radius = radius + thickness / 2
+    gap = 2 * thickness
+    length = side - 2 * gap
+    # the flange's bend and wall, seen along its side: x outwards, z up
+    flange = SheetPath(0.0, thickness / 2).bend(pi / 2, center_radius).forward(height)
+    flange_solid = flange.solid(thickness, length)
+
+    circumradius = side / (2 * sin(pi / flanges))
+    corners = [
+        Vector(circumradius * cos(2 * pi * i / flanges), circumradius * sin(2 * pi * i / flanges), 0.0)
+        for i in range(flanges)
+    ]
+    base = Part.Face(Part.makePolygon(corners + [corners[0]])).extrude(Vector(0.0, 0.0, thickness))
+    walls = []
+    for i in range(flanges):
+        a, b = corners[i], corners[(i + 1) % flanges]
+        d = (b - a).normalize()
+        # the corners run counter-clockwise, so the outside is to the right
+        n = Vector(d.y, -d.x, 0.0)
+        origin = a + d * gap
+        placement = Matrix(
+            n.x, d.x, 0.0, origin.x,
+            n.y, d.y, 0.0, origin.y,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0,
+        )
+        walls.append(flange_solid.transformed(placement))
+    shape = base.fuse(walls).removeSplitter()
+
+    base_area = flanges * side ** 2 / (4 * tan(pi / flanges))
+    flat_area = base_area + flanges * length * flange.flat_length(thickness, k_factor)
+    return GeneratedPart(shape.Solids[0], thickness, flat_area, 1e-4 * flat_area, flanges)
+
+
+def hem_chain(hems, k_factor, flat=40.0, width=30.0, thickness=1.0, radius=1.0):
+    """A strip folded back over itself by 180 degrees `hems` times, each
+    layer stacked on the one before like a closed accordion"""
+    center_radius = radius + thickness / 2
+    path = SheetPath().forward(flat)
+    for i in range(hems):
+        path.bend(pi if i % 2 == 0 else -pi, center_radius).forward(flat)
+    flat_area = path.flat_length(thickness, k_factor) * width
+    return GeneratedPart(path.solid(thickness, width), thickness, flat_area, 1e-4 * flat_area, hems)
+
+
+def channel(base, flange, width, thickness, radius):
+    """A U-channel: a base along +X at z = 0, from x = center radius, with a
+    flange bent up at both ends"""
+    center_radius = radius + thickness / 2
+    path = (
+        SheetPath(0.0, flange + center_radius, -pi / 2)
+        .forward(flange)
+        .bend(pi / 2, center_radius)
+        .forward(base)
+        .bend(pi / 2, center_radius)
+        .forward(flange)
+    )
+    return path, path.solid(thickness, width)
+
+
+def perforated_panel(holes, k_factor, pitch=8.0, hole_radius=2.5, thickness=1.0, radius=1.0):
+    """A channel whose base is perforated with a square-ish grid of `holes`
+    round holes"""
+    columns = max(1, round(holes ** 0.5))
+    rows = -(-holes // columns)
+    base = columns * pitch + 2 * pitch
+    width = rows * pitch + 2 * pitch
+    path, shape = channel(base, 15.0, width, thickness, radius)
+    start = radius + thickness / 2 + 1.5 * pitch
+    cutters = [
+        Part.makeCylinder(
+            hole_radius,
+            4 * thickness,
+            Vector(start + (i % columns) * pitch, 1.5 * pitch + (i // columns) * pitch, -2 * thickness),
+        )
+        for i in range(holes)
+    ]
+    shape = shape.cut(Part.makeCompound(cutters))
+    flat_area = path.flat_length(thickness, k_factor) * width - holes * pi * hole_radius ** 2
+    return GeneratedPart(shape.Solids[0], thickness, flat_area, 1e-4 * flat_area, path.bends)
+
+
+def spline_cutouts(cutouts, k_factor, pitch=30.0, thickness=1.0, radius=1.0):
+    """A channel whose base has `cutouts` lobed cutouts bounded by periodic
+    B-splines, which the unfolder has to turn into lines and arcs"""
+    base = cutouts * pitch + pitch
+    width = 2 * pitch
+    path, shape = channel(base, 15.0, width, thickness, radius)
+    start = radius + thickness / 2 + pitch
+    cutters = []
+    cutout_area = 0.0
+    tolerance = 0.0
+    for i in range(cutouts):
+        cx, cy = start + i * pitch, pitch
+        lobes = 3 + i % 4
+        points = [
+            Vector(
+                cx + (8.0 + 2.5 * cos(lobes * a)) * cos(a),
+                cy + (8.0 + 2.5 * cos(lobes * a)) * sin(a),
+                -2 * thickness,
+            )
+            for a in (2 * pi * j / 24 for j in range(24))
+        ]
+        curve = Part.BSplineCurve()
+        curve.interpolate(points, PeriodicFlag=True)
+        face = Part.Face(Part.Wire(curve.toShape()))
+        cutters.append(face.extrude(Vector(0.0, 0.0, 4 * thickness)))
+        cutout_area += face.Area
+        # B-splines become arcs within a tenth of a millimeter
+        tolerance += 0.1 * curve.length()
+    shape = shape.cut(Part.makeCompound(cutters))
+    flat_area = path.flat_length(thickness, k_factor) * width - cutout_area
+    return GeneratedPart(shape.Solids[0], thickness, flat_area, tolerance, path.bends)
+
+
+GENERATORS = {
+    'box': box_with_flanges,
+    'hems': hem_chain,
+    'perforated': perforated_panel,
+    'splines': spline_cutouts,
+}
+
+
+def generate_part(kind, size, k_factor):
+    """The part of a kind with `size` flanges, hems, holes or cutouts"""
+    return GENERATORS[kind](size, k_factor)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Unfold benchmark harness.
+
+Builds parametric sheet-metal parts with FreeCAD's Part API (boxes with N
+flanges, hem chains, perforated panels with M holes, channels with B-spline
+cutouts, see generators.py), unfolds each with both engines and records wall
+time, time and peak Python allocation per phase, peak RSS, counts and the
+flat pattern's area against the area expected from the part's dimensions.
+Each run happens in a fresh process so memory numbers are not polluted by
+earlier runs.
+
+Per-phase memory is measured with tracemalloc, so it only covers what Python
+allocates; memory OCC allocates shows up in the run's peak RSS alone.
+
+The engines are:
+    new     SheetMetalNewUnfolder.UnfoldAnalysis(...).flat_pattern(...)
+    legacy  SheetMetalUnfolder.SheetTree: Bend_analysis, unfold_tree2 and
+            the shell, solid and removeSplitter steps of its getUnfold
+
+FreeCAD has to be importable: run the harness with FreeCAD's Python, or
+point FREECAD_LIB at the directory holding FreeCAD.so
+(default /usr/lib/freecad-python3/lib, where Ubuntu's freecad package puts it).
+
+Usage:
+    python benchmarks/run_benchmarks.py --tier quick --output results.json
+    python benchmarks/run_benchmarks.py --tier quick --compare results.json
+
+--compare takes the --output of an earlier run, e.g. one of the commit a
+change is based on.
+
+A run whose flat pattern area is off by more than the part's tolerance gets
+status "area_mismatch"; compare_to_baseline reports slowdowns and runs that
+were correct in the baseline but aren't anymore.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'src')
+sys.path.insert(0, os.environ.get('FREECAD_LIB', '/usr/lib/freecad-python3/lib'))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(SRC_DIR, 'sheet_metal'))
+sys.path.insert(0, os.path.join(SRC_DIR, 'unfolder'))
+
+from metrics import UnfoldMetrics
+
+# Number of flanges, hems, holes or cutouts of each kind of part per tier
+TIERS = {
+    'quick': {'box': (4,), 'hems': (2,), 'perforated': (16,), 'splines': (2,)},
+    'standard': {'box': (4, 8), 'hems': (2, 6), 'perforated': (16, 100), 'splines': (2, 8)},
+    'full': {'box': (4, 8, 16), 'hems': (2, 6, 12), 'perforated': (16, 100, 400), 'splines': (2, 8, 24)},
+}
+
+ENGINES = ('new', 'legacy')
+
+DEFAULT_K_FACTOR = 0.38
+
+
+def build_scenarios(tier, kinds):
+    return [
+        {'name': f'{kind}_{size}', 'kind': kind, 'size': size}
+        for kind, sizes in TIERS[tier].items() if kind in kinds
+        for size in sizes
+    ]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PhaseMetrics(UnfoldMetrics):
+    """UnfoldMetrics that also records, for each phase, the peak of Python
+    allocations traced by tracemalloc above what was allocated when the phase
+    started. A phase entered again keeps its highest peak.
+
+    tracemalloc has to be tracing. Each phase resets tracemalloc's peak, so
+    the peak of the whole run is kept in peak_traced.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.peak_alloc = {}
+        self.peak_traced = 0
+        # [allocated at start, highest peak seen] of each open phase
+        self._open = []
+
+    def _seen(self, peak):
+        self.peak_traced = max(self.peak_traced, peak)
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        # resetting forgets the peak the enclosing phase has reached so far
+        self._seen(peak)
+        tracemalloc.reset_peak()
+        self._open.append([current, current])
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            start, seen = self._open.pop()
+            peak = max(seen, tracemalloc.get_traced_memory()[1])
+            self.peak_alloc[name] = max(self.peak_alloc.get(name, 0), peak - start)
+            self._seen(peak)
+
+    def as_dict(self):
+        result = super().as_dict()
+        result['peak_alloc_mb'] = {
+            name: round(size / (1024 * 1024), 2) for name, size in self.peak_alloc.items()
+        }
+        return result
+
+
+def root_face_index(shape):
+    """The largest planar face, which all generated parts are unfolded from"""
+    planar = [i for i, face in enumerate(shape.Faces) if face.Surface.TypeId == 'Part::GeomPlane']
+    return max(planar, key=lambda i: shape.Faces[i].Area)
+
+
+def unfold_new(part, face_index, k_factor, metrics):
+    """Flat pattern area of the new unfolder"""
+    import SheetMetalNewUnfolder
+
+    bac = SheetMetalNewUnfolder.BendAllowanceCalculator.from_single_value(k_factor, 'ansi')
+    analysis = SheetMetalNewUnfolder.UnfoldAnalysis(part.shape, face_index, metrics=metrics)
+    flat = analysis.flat_pattern(bac)
+    return flat.face.Area
+
+
+def unfold_legacy(part, face_index, k_factor, metrics):
+    """Flat pattern area of the legacy unfolder, i.e. the volume of its
+    unfolded solid over the thickness"""
+    import Part
+    import SheetMetalUnfolder
+
+    SheetMetalUnfolder.KFACTORSTANDARD = 'ansi'
+    with metrics.phase('sheet_tree'):
+        tree = SheetMetalUnfolder.SheetTree(part.shape, face_index, {1: k_factor}, None)
+    if tree.error_code is None:
+        with metrics.phase('bend_analysis'):
+            tree.Bend_analysis(face_index, None)
+    if tree.error_code is None:
+        with metrics.phase('unfold_tree'):
+            faces, _fold_lines = tree.unfold_tree2(tree.root)
+    if tree.error_code is not None:
+        raise RuntimeError(
+            f"{SheetMetalUnfolder.unfold_error[tree.error_code]} at Face{tree.failed_face_idx + 1}"
+        )
+    metrics.count('faces', len(faces))
+    with metrics.phase('make_solid'):
+        solid = Part.Solid(Part.Shell(faces))
+    with metrics.phase('remove_splitter'):
+        solid = solid.removeSplitter()
+    return solid.Volume / part.thickness
+
+
+UNFOLDERS = {'new': unfold_new, 'legacy': unfold_legacy}
+
+
+def run_case(case):
+    """Generate one part and unfold it with one engine (runs in a child process)"""
+    from generators import generate_part
+
+    start = time.perf_counter()
+    part = generate_part(case['kind'], case['size'], case['k_factor'])
+    generate_time = time.perf_counter() - start
+    face_index = root_face_index(part.shape)
+
+    metrics = PhaseMetrics()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        flat_area = UNFOLDERS[case['engine']](part, face_index, case['k_factor'], metrics)
+    wall_time = time.perf_counter() - start
+    traced_peak = max(tracemalloc.get_traced_memory()[1], metrics.peak_traced)
+    tracemalloc.stop()
+
+    area_error = flat_area - part.flat_area
+    measured = metrics.as_dict()
+    return {
+        'wall_time_s': round(wall_time, 4),
+        'generate_time_s': round(generate_time, 4),
+        'phases': measured['phases'],
+        'phase_peak_alloc_mb': measured['peak_alloc_mb'],
+        'counts': measured['counts'],
+        'peak_rss_mb': round(_peak_rss_mb(), 2),
+        'peak_python_alloc_mb': round(traced_peak / (1024 * 1024), 2),
+        'input_faces': len(part.shape.Faces),
+        'bends': part.bends,
+        'flat_area': round(flat_area, 4),
+        'expected_area': round(part.flat_area, 4),
+        'area_error': round(area_error, 4),
+        'area_tolerance': round(part.area_tolerance, 4),
+        'status': 'ok' if abs(area_error) <= part.area_tolerance else 'area_mismatch',
+    }
+
+
+def _case_entry(case, connection):
+    try:
+        connection.send(run_case(case))
+    except Exception as e:
+        connection.send({'status': 'error', 'error': str(e)})
+    finally:
+        connection.close()
+
+
+def run_isolated(case, timeout):
+    """Run a case in a fresh spawned process, killing it after timeout seconds"""
+    context = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_case_entry, args=(case, child_conn))
+    process.start()
+    child_conn.close()
+
+    result = None
+    if parent_conn.poll(timeout):
+        result = parent_conn.recv()
+    process.join(5)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    if result is None:
+        result = {'status': 'timeout', 'timeout_s': timeout}
+    return result
+
+
+def comparison_table(results):
+    """One line per scenario comparing the engines' times and area errors"""
+    runs = {(r['scenario'], r['engine']): r for r in results}
+    scenarios = list(dict.fromkeys(r['scenario'] for r in results))
+
+    def cell(run):
+        if run is None:
+            return f"{'-':>10} {'-':>10}"
+        if 'wall_time_s' not in run:
+            return f"{run['status']:>21}"
+        return f"{run['wall_time_s']:>9.3f}s {run['area_error']:>+10.3f}"
+
+    lines = [
+        f"{'scenario':<16} {'new time':>10} {'new error':>10} {'legacy time':>11} {'legacy err':>10} {'speedup':>8}",
+    ]
+    for scenario in scenarios:
+        new, legacy = runs.get((scenario, 'new')), runs.get((scenario, 'legacy'))
+        speedup = ''
+        if new and legacy and 'wall_time_s' in new and 'wall_time_s' in legacy and new['wall_time_s'] > 0:
+            speedup = f"{legacy['wall_time_s'] / new['wall_time_s']:.1f}x"
+        lines.append(f"{scenario:<16} {cell(new)}  {cell(legacy)} {speedup:>8}")
+    return lines
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return human readable regressions of results against a baseline file"""
+    baseline_runs = {(r['scenario'], r['engine']): r for r in baseline['results']}
+    regressions = []
+    for run in results:
+        reference = baseline_runs.get((run['scenario'], run['engine']))
+        if reference is None or reference['status'] != 'ok':
+            continue
+        label = f"{run['scenario']} [{run['engine']}]"
+        if run['status'] != 'ok':
+            regressions.append(f"{label}: status ok -> {run['status']}")
+            continue
+        if run['wall_time_s'] > reference['wall_time_s'] * (1 + threshold):
+            regressions.append(
+                f"{label}: wall time {reference['wall_time_s']:.3f}s -> {run['wall_time_s']:.3f}s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark both unfolders on parametric sheet metal parts')
+    parser.add_argument('--tier', choices=sorted(TIERS), default='quick',
+                        help='Part sizes to run, see TIERS')
+    parser.add_argument('--kind', action='append', choices=sorted(TIERS['quick']),
+                        help='Only run this kind of part (repeatable)')
+    parser.add_argument('--scenario', action='append',
+                        help='Only run scenarios with this name, e.g. box_8 (repeatable)')
+    parser.add_argument('--engine', action='append', choices=ENGINES,
+                        help='Only run this unfolder (repeatable)')
+    parser.add_argument('--k-factor', type=float, default=DEFAULT_K_FACTOR,
+                        help='ANSI k-factor of all bends')
+    parser.add_argument('--timeout', type=float, default=900.0,
+                        help='Seconds before a single run is abandoned')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative slowdown before a run counts as a regression')
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.tier, args.kind or TIERS['quick'])
+    if args.scenario:
+        scenarios = [s for s in scenarios if s['name'] in args.scenario]
+
+    results = []
+    for scenario in scenarios:
+        for engine in args.engine or ENGINES:
+            case = {**scenario, 'engine': engine, 'k_factor': args.k_factor}
+            print(f"Running {scenario['name']} [{engine}]...", flush=True)
+            measurement = run_isolated(case, args.timeout)
+            run = {'scenario': scenario['name'], **case, **measurement}
+            del run['name']
+            results.append(run)
+            if 'wall_time_s' in measurement:
+                print(f"  {measurement['status']}: {measurement['wall_time_s']:.3f}s, "
+                      f"area {measurement['flat_area']:.2f} (expected {measurement['expected_area']:.2f}), "
+                      f"{measurement['peak_rss_mb']:.1f} MB peak RSS")
+            else:
+                print(f"  {measurement['status']}: {measurement.get('error', '')}")
+
+    print()
+    for line in comparison_table(results):
+        print(line)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'tier': args.tier,
+            'k_factor': args.k_factor,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
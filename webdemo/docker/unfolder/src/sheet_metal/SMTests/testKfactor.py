@@ -20,9 +20,14 @@
 #
 # #######################################################################
 
+import json
+import os
+import tempfile
 import unittest
 import FreeCAD
 from SheetMetalKfactor import KFactorLookupTable
+from SheetMetalNewUnfolder import BendAllowanceCalculator
+from lookup import KFactorTable
 
 
 class TestKFactor(unittest.TestCase):
@@ -58,5 +63,72 @@ class TestKFactor(unittest.TestCase):
         self.assertTrue(c.k_factor_standard == "ansi")
 
 
+class TestKFactorTable(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_lookups(self):
+        table = KFactorTable.from_dict({99: 0.5, 1: 0.38, 3: 0.43})
+        self.assertEqual(table.keys, [1.0, 3.0, 99.0])
+        # step lookups take the first row at or above the ratio
+        self.assertEqual(table.step(0.5), 0.38)
+        self.assertEqual(table.step(1), 0.38)
+        self.assertEqual(table.step(2), 0.43)
+        self.assertEqual(table.step(1000), 0.5)
+        # interpolated lookups are clamped at both ends
+        self.assertEqual(table.interpolate(0.5), 0.38)
+        self.assertAlmostEqual(table.interpolate(2), 0.405)
+        self.assertAlmostEqual(table.interpolate(51), 0.465)
+        self.assertEqual(table.interpolate(1000), 0.5)
+
+    def test_invalid_tables(self):
+        with self.assertRaises(ValueError):
+            KFactorTable([], [])
+        with self.assertRaises(ValueError):
+            KFactorTable([1, 3], [0.38])
+        with self.assertRaises(ValueError):
+            KFactorTable([1, 3, 3], [0.38, 0.43, 0.5])
+        with self.assertRaises(ValueError):
+            KFactorTable([1], [0.38], "iso")
+
+    def test_material_files(self):
+        rows = [[1, 0.38], [3, 0.43], [99, 0.5]]
+        json_path = self.write(
+            "steel.json", json.dumps({"k_factor_standard": "ansi", "rows": rows})
+        )
+        csv_path = self.write(
+            "steel.csv",
+            "Radius / Thickness,K-factor (DIN)\n1,0.76\n3,0.86\n\n99,1.0\n",
+        )
+        from_json = KFactorTable.from_file(json_path)
+        from_csv = KFactorTable.from_file(csv_path)
+        self.assertEqual(from_json.keys, [1.0, 3.0, 99.0])
+        self.assertEqual(from_json.values, [0.38, 0.43, 0.5])
+        self.assertEqual(from_json.k_factor_standard, "ansi")
+        self.assertEqual(from_csv.keys, [1.0, 3.0, 99.0])
+        self.assertEqual(from_csv.k_factor_standard, "din")
+        with self.assertRaises(ValueError):
+            KFactorTable.from_file(self.write("steel.txt", ""))
+        with self.assertRaises(ValueError):
+            KFactorTable.from_file(self.write("bad.csv", "Radius,K\n1,0.38\n"))
+
+        # DIN k-factors are halved to the ANSI values used internally
+        ansi = BendAllowanceCalculator.from_file(json_path)
+        din = BendAllowanceCalculator.from_file(csv_path)
+        for radius in (0.5, 2.0, 10.0, 200.0):
+            self.assertAlmostEqual(
+                ansi.get_k_factor(radius, 1.0), din.get_k_factor(radius, 1.0)
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
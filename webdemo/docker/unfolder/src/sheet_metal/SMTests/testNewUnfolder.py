@@ -0,0 +1,415 @@
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+import time
+import unittest
+from math import cos, hypot, pi, sin
+
+import FreeCAD
+import networkx as nx
+import Part
+from FreeCAD import Rotation, Vector
+from SheetMetalNewUnfolder import (
+    BendAllowanceCalculator,
+    Edge2DCleanup,
+    ShapeTopology,
+    TangentFaces,
+    UnfoldAnalysis,
+    accumulate_unbend_transforms,
+    build_graph_of_all_tangent_faces,
+    build_graph_of_tangent_faces,
+    flat_plate_thickness,
+    getFlatPattern,
+)
+
+
+def make_corrugated_strip(
+    bends: int, thickness: float, radius: float, flange: float, width: float
+) -> Part.Shape:
+    """A strip bent back and forth by 90 degrees `bends` times: a square wave
+    in the XZ plane with `flange` long segments, extruded `width` along Y."""
+    points = [(0.0, 0.0)]
+    for i in range(bends + 1):
+        x, z = points[-1]
+        if i % 2 == 0:
+            points.append((x + flange, z))
+        else:
+            points.append((x, flange if z == 0.0 else 0.0))
+
+    # bend radius of the centerline
+    center_radius = radius + thickness / 2
+
+    def unit(a, b):
+        length = hypot(b[0] - a[0], b[1] - a[1])
+        return ((b[0] - a[0]) / length, (b[1] - a[1]) / length)
+
+    def left(d):
+        return (-d[1], d[0])
+
+    def along(p, d, distance):
+        return (p[0] + d[0] * distance, p[1] + d[1] * distance)
+
+    def vec(p):
+        return Vector(p[0], 0.0, p[1])
+
+    def side(offset):
+        """edges of the centerline, filleted and offset to its left"""
+        edges = []
+        current = along(points[0], left(unit(points[0], points[1])), offset)
+        for i in range(1, len(points) - 1):
+            d_in = unit(points[i - 1], points[i])
+            d_out = unit(points[i], points[i + 1])
+            turn = 1 if d_in[0] * d_out[1] - d_in[1] * d_out[0] > 0 else -1
+            tangent_in = along(points[i], d_in, -center_radius)
+            tangent_out = along(points[i], d_out, center_radius)
+            center = along(tangent_in, left(d_in), turn * center_radius)
+            arc_radius = center_radius - turn * offset
+            start = along(tangent_in, left(d_in), offset)
+            end = along(tangent_out, left(d_out), offset)
+            middle = along(center, unit(center, points[i]), arc_radius)
+            edges.append(Part.LineSegment(vec(current), vec(start)).toShape())
+            edges.append(Part.Arc(vec(start), vec(middle), vec(end)).toShape())
+            current = end
+        last = along(points[-1], left(unit(points[-2], points[-1])), offset)
+        edges.append(Part.LineSegment(vec(current), vec(last)).toShape())
+        return edges
+
+    top = side(thickness / 2)
+    bottom = side(-thickness / 2)
+    end_cap = Part.LineSegment(top[-1].lastVertex().Point, bottom[-1].lastVertex().Point)
+    start_cap = Part.LineSegment(bottom[0].firstVertex().Point, top[0].firstVertex().Point)
+    wire = Part.Wire(top + [end_cap.toShape()] + list(reversed(bottom)) + [start_cap.toShape()])
+    return Part.Face(wire).extrude(Vector(0.0, width, 0.0))
+
+
+def make_perforated_panel(rows: int, columns: int) -> Part.Shape:
+    """A channel (a strip with two bends) whose base is perforated with a
+    rows x columns grid of round holes."""
+    pitch, hole_radius, thickness = 6.0, 2.0, 1.0
+    base = columns * pitch + 10.0
+    strip = make_corrugated_strip(2, thickness, 1.0, base, rows * pitch + 4.0)
+    # the base runs along X at z = 0 between the two bends
+    holes = [
+        Part.makeCylinder(
+            hole_radius,
+            4 * thickness,
+            Vector(base / 2 + (c - (columns - 1) / 2) * pitch, 2.0 + (r + 0.5) * pitch, -2 * thickness),
+            Vector(0, 0, 1),
+        )
+        for r in range(rows)
+        for c in range(columns)
+    ]
+    return strip.cut(Part.makeCompound(holes))
+
+
+class TestNewUnfolder(unittest.TestCase):
+    def test_topology_matches_ancestor_search(self):
+        # perforated panels have thousands of edges, the worst case for
+        # looking up each edge's faces with an OCC ancestor search
+        panel = make_perforated_panel(20, 20)
+        faces = panel.Faces
+        face_lookup = {f.hashCode(): i for i, f in enumerate(faces)}
+
+        start = time.perf_counter()
+        expected = [
+            sorted(face_lookup[f.hashCode()] for f in panel.ancestorsOfType(e, Part.Face))
+            for e in panel.Edges
+        ]
+        search_time = time.perf_counter() - start
+        start = time.perf_counter()
+        topology = ShapeTopology(panel)
+        topology_time = time.perf_counter() - start
+
+        self.assertEqual([sorted(f) for f in topology.edge_faces], expected)
+        root = max(range(len(faces)), key=lambda i: faces[i].Area)
+        self.assertEqual(
+            sorted(build_graph_of_tangent_faces(panel, root, topology).edges),
+            sorted(build_graph_of_tangent_faces(panel, root).edges),
+        )
+        FreeCAD.Console.PrintMessage(
+            f"Edge to face adjacency for {len(topology.edges)} edges: "
+            f"{search_time:.3f}s with ancestorsOfType, {topology_time:.3f}s in one pass\n"
+        )
+
+    def test_tangent_face_graph_of_corrugated_strip(self):
+        bends = 6
+        strip = make_corrugated_strip(bends, 1.0, 1.0, 10.0, 20.0)
+        topology = ShapeTopology(strip)
+        for a, b in (f for f in topology.edge_faces if len(f) == 2):
+            face_a, face_b = topology.faces[a], topology.faces[b]
+            self.assertEqual(
+                TangentFaces.compare(face_a, face_b), TangentFaces.compare(face_b, face_a)
+            )
+        root = max(range(len(topology.faces)), key=lambda i: topology.faces[i].Area)
+        graph = build_graph_of_tangent_faces(strip, root, topology)
+        # one side of the sheet: every flange and bend, chained together
+        self.assertEqual(graph.number_of_nodes(), 2 * bends + 1)
+        self.assertEqual(graph.number_of_edges(), 2 * bends)
+        surface_types = [topology.faces[i].Surface.TypeId for i in graph.nodes]
+        self.assertEqual(surface_types.count("Part::GeomCylinder"), bends)
+        # one graph of all tangent faces serves every root face
+        all_tangent_faces = build_graph_of_all_tangent_faces(strip, topology)
+        for face_index in range(len(topology.faces)):
+            self.assertEqual(
+                sorted(build_graph_of_tangent_faces(strip, face_index, topology, all_tangent_faces).edges),
+                sorted(build_graph_of_tangent_faces(strip, face_index, topology).edges),
+            )
+
+    def test_fix_coincidence_snaps_and_orders_loops(self):
+        fuzz = 1e-3
+        # a square whose corners are slightly off, drawn out of order with
+        # one side reversed, and a top side split in two by a tiny segment
+        edges = [
+            Part.makeLine(Vector(0, 0, 0), Vector(10, 0, 0)),
+            Part.makeLine(Vector(10, 0.0004, 0), Vector(10, 10, 0)),
+            Part.makeLine(Vector(0, 0, 0), Vector(0, 10, 0)),
+            Part.makeLine(Vector(10, 10, 0), Vector(5, 10, 0)),
+            Part.makeLine(Vector(5, 10, 0), Vector(4.9997, 10, 0)),
+            Part.makeLine(Vector(4.9997, 10, 0), Vector(0.0002, 10, 0)),
+            Part.Circle(Vector(5, 5, 0), Vector(0, 0, 1), 2).toShape(),
+        ]
+        wires = Edge2DCleanup.fix_coincidence(edges, fuzz)
+
+        self.assertEqual(sorted(len(w.Edges) for w in wires), [1, 5])
+        self.assertTrue(all(w.isClosed() for w in wires))
+        square = max(wires, key=lambda w: len(w.Edges))
+        # endpoints snap onto the first of the points they coincide with
+        corners = sorted((round(v.X, 9), round(v.Y, 9)) for v in square.Vertexes)
+        self.assertEqual(corners, [(0, 0), (0, 10), (5, 10), (10, 0), (10, 10)])
+
+    def test_eliminate_bsplines_on_patterned_curves(self):
+        # splines through points on a straight line and on a quarter circle,
+        # repeated along X like a pattern of louvers
+        line = Part.BSplineCurve()
+        line.interpolate([Vector(x, 0.5 * x, 0) for x in range(5)])
+        arc = Part.BSplineCurve()
+        arc.interpolate(
+            [Vector(5 * cos(a * pi / 16), 5 * sin(a * pi / 16), 0) for a in range(9)]
+        )
+        sketch = []
+        for i in range(5):
+            offset = Vector(20 * i, 0, 0)
+            sketch.append(line.toShape().translated(offset))
+            sketch.append(arc.toShape().translated(offset))
+
+        result = Edge2DCleanup.eliminate_bsplines(sketch, 0.1)
+
+        self.assertEqual(
+            [e.Curve.TypeId for e in result],
+            ["Part::GeomLine", "Part::GeomCircle"] * 5,
+        )
+        for original, converted in zip(sketch, result):
+            for a, b in (
+                (original.firstVertex().Point, converted.firstVertex().Point),
+                (original.lastVertex().Point, converted.lastVertex().Point),
+            ):
+                self.assertAlmostEqual(a.distanceToPoint(b), 0.0, places=5)
+        for i, converted in enumerate(result[1::2]):
+            self.assertAlmostEqual(converted.Curve.Radius, 5.0, delta=0.01)
+            self.assertAlmostEqual(
+                converted.Curve.Center.distanceToPoint(Vector(20 * i, 0, 0)), 0.0, delta=0.01
+            )
+
+    def test_accumulated_transforms_on_long_chain(self):
+        # a long chain of faces where the root and every odd-numbered face
+        # rotate their descendants, so each face's placement depends on all
+        # of its ancestors. Recomputing every root path would need ~n^2/2
+        # matrix multiplications.
+        n = 3000
+        dg = nx.DiGraph()
+        dg.add_node(0)
+        for i in range(1, n):
+            dg.add_edge(i - 1, i)
+            if i % 2:
+                # only bends carry a transformation
+                dg.nodes[i]["unbend_transform"] = Rotation(Vector(0, 0, 1), 2).toMatrix()
+        dg.nodes[0]["unbend_transform"] = Rotation(Vector(0, 0, 1), 1).toMatrix()
+        # a side branch off the root with no bends
+        dg.add_edge(0, n)
+
+        start = time.perf_counter()
+        placements = accumulate_unbend_transforms(dg, 0)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(placements), n + 1)
+        self.assertTrue(placements[0].isUnity())
+        for face_id in (1, 2, 3, 1000, n - 1):
+            # the root adds 1 degree, every odd-numbered ancestor 2 degrees
+            expected_angle = 1 + 2 * (face_id // 2)
+            rotated = placements[face_id].multVec(Vector(1, 0, 0))
+            expected = Rotation(Vector(0, 0, 1), expected_angle).multVec(Vector(1, 0, 0))
+            self.assertAlmostEqual(rotated.distanceToPoint(expected), 0.0, places=6)
+        self.assertAlmostEqual(
+            placements[n].multVec(Vector(1, 0, 0)).getAngle(Vector(1, 0, 0)),
+            pi / 180,
+            places=6,
+        )
+        FreeCAD.Console.PrintMessage(
+            f"Accumulated unbend transforms of {n + 1} faces in {elapsed:.3f}s\n"
+        )
+
+    def test_many_flanges_unfold_to_developed_length(self):
+        bends, thickness, radius, flange, width = 40, 1.0, 1.0, 10.0, 20.0
+        doc = FreeCAD.newDocument()
+        try:
+            obj = doc.addObject("Part::Feature", "Strip")
+            obj.Shape = make_corrugated_strip(bends, thickness, radius, flange, width)
+            doc.recompute()
+            faces = obj.Shape.Faces
+            root_index = max(
+                (
+                    i
+                    for i, f in enumerate(faces)
+                    if f.Surface.TypeId == "Part::GeomPlane"
+                    and abs(f.Surface.Axis.z) > 0.99
+                ),
+                key=lambda i: faces[i].Area,
+            )
+            # with a k-factor of 0.5 the sheet unrolls to its centerline length
+            bac = BendAllowanceCalculator.from_single_value(0.5, "ansi")
+
+            start = time.perf_counter()
+            flat = getFlatPattern(bac, obj, f"Face{root_index + 1}")
+            elapsed = time.perf_counter() - start
+
+            center_radius = radius + thickness / 2
+            developed_length = (
+                (bends + 1) * flange
+                - 2 * bends * center_radius
+                + bends * pi / 2 * center_radius
+            )
+            box = flat.face.BoundBox
+            self.assertAlmostEqual(max(box.XLength, box.YLength), developed_length, delta=0.01)
+            self.assertAlmostEqual(min(box.XLength, box.YLength), width, delta=0.01)
+            self.assertAlmostEqual(box.ZLength, 0.0, places=6)
+            FreeCAD.Console.PrintMessage(
+                f"Unfolded {bends} bends ({len(faces)} faces) in {elapsed:.2f}s\n"
+            )
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+
+    def test_k_factor_sweep_from_one_analysis(self):
+        bends, thickness, radius, flange, width = 4, 2.0, 3.0, 30.0, 25.0
+        doc = FreeCAD.newDocument()
+        try:
+            obj = doc.addObject("Part::Feature", "Strip")
+            obj.Shape = make_corrugated_strip(bends, thickness, radius, flange, width)
+            doc.recompute()
+            faces = obj.Shape.Faces
+            root_index = max(range(len(faces)), key=lambda i: faces[i].Area)
+            analysis = UnfoldAnalysis.from_solid(obj, f"Face{root_index + 1}")
+            self.assertEqual(len(analysis.bends), bends)
+            self.assertAlmostEqual(analysis.thickness, thickness, places=6)
+
+            for k_factor in (0.3, 0.4, 0.5):
+                bac = BendAllowanceCalculator.from_single_value(k_factor, "ansi")
+                flat = analysis.flat_pattern(bac)
+                # each bend's arc is measured at radius + k * thickness
+                center_radius = radius + thickness / 2
+                developed_length = (
+                    (bends + 1) * flange
+                    - 2 * bends * center_radius
+                    + bends * pi / 2 * (radius + k_factor * thickness)
+                )
+                box = flat.face.BoundBox
+                self.assertAlmostEqual(
+                    max(box.XLength, box.YLength), developed_length, delta=0.01
+                )
+                # the same as unfolding from scratch
+                fresh = getFlatPattern(bac, obj, f"Face{root_index + 1}")
+                self.assertAlmostEqual(fresh.face.Area, flat.face.Area, places=6)
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+
+    def test_bend_lines_clipped_to_flat_pattern(self):
+        bends, thickness, radius, flange, width = 3, 1.0, 2.0, 20.0, 15.0
+        doc = FreeCAD.newDocument()
+        try:
+            obj = doc.addObject("Part::Feature", "Strip")
+            obj.Shape = make_corrugated_strip(bends, thickness, radius, flange, width)
+            doc.recompute()
+            faces = obj.Shape.Faces
+            root_index = max(range(len(faces)), key=lambda i: faces[i].Area)
+            analysis = UnfoldAnalysis.from_solid(obj, f"Face{root_index + 1}")
+            bac = BendAllowanceCalculator.from_single_value(0.4, "ansi")
+
+            flat = analysis.flat_pattern(bac)
+            # one line across the full width of each bend, on the pattern
+            self.assertEqual(len(flat.bend_lines.Edges), bends)
+            for line in flat.bend_lines.Edges:
+                self.assertAlmostEqual(line.Length, width, places=6)
+                self.assertLess(line.distToShape(flat.face)[0], 1e-6)
+            self.assertEqual(
+                len(analysis.flat_pattern(bac, with_bend_lines=False).bend_lines.Edges), 0
+            )
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+
+    def test_flat_plate_fast_path(self):
+        hole = Part.makeCylinder(5.0, 10.0, Vector(20, 25, -5), Vector(0, 0, 1))
+        plate = Part.makeBox(100, 50, 2).cut(hole)
+        faces = plate.Faces
+        root_index = max(range(len(faces)), key=lambda i: faces[i].Area)
+        self.assertAlmostEqual(flat_plate_thickness(plate, root_index), 2.0, places=6)
+
+        # bent parts and plates with slanted edges need the full unfolding
+        strip = make_corrugated_strip(2, 1.0, 1.0, 20.0, 10.0)
+        strip_root = max(range(len(strip.Faces)), key=lambda i: strip.Faces[i].Area)
+        self.assertIsNone(flat_plate_thickness(strip, strip_root))
+        # a 45 degree cut across the end of the plate
+        cutter = Part.makeBox(10, 60, 10, Vector(-5, -5, -5))
+        cutter.rotate(Vector(0, 0, 0), Vector(0, 1, 0), 45)
+        cutter.translate(Vector(100, 0, 2))
+        wedge = Part.makeBox(100, 50, 2).cut(cutter)
+        wedge_root = max(range(len(wedge.Faces)), key=lambda i: wedge.Faces[i].Area)
+        self.assertIsNone(flat_plate_thickness(wedge, wedge_root))
+        # the end face of a bracket has an opposite face of the same area and
+        # only side walls in between, but its distance is the bracket's width
+        bracket = make_corrugated_strip(1, 1.0, 1.0, 20.0, 10.0)
+        end_index = next(
+            i
+            for i, face in enumerate(bracket.Faces)
+            if face.Surface.TypeId == "Part::GeomPlane"
+            and abs(face.normalAt(0, 0).y) > 0.5
+        )
+        self.assertIsNone(flat_plate_thickness(bracket, end_index))
+
+        doc = FreeCAD.newDocument()
+        try:
+            obj = doc.addObject("Part::Feature", "Plate")
+            obj.Shape = plate
+            doc.recompute()
+            bac = BendAllowanceCalculator.from_single_value(0.5, "ansi")
+            flat = getFlatPattern(bac, obj, f"Face{root_index + 1}")
+            self.assertAlmostEqual(flat.face.Area, 100 * 50 - pi * 25, places=4)
+            self.assertEqual(len(flat.bend_lines.Edges), 0)
+            box = flat.face.BoundBox
+            self.assertAlmostEqual(box.XMin, 0.0, places=6)
+            self.assertAlmostEqual(box.ZLength, 0.0, places=6)
+            # the same as the full unfolding
+            full = UnfoldAnalysis.from_solid(obj, f"Face{root_index + 1}").flat_pattern(bac)
+            self.assertAlmostEqual(full.face.Area, flat.face.Area, places=6)
+            self.assertAlmostEqual(full.unbent_solid().Volume, flat.unbent_solid().Volume, places=4)
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+
+
+if __name__ == "__main__":
+    unittest.main()
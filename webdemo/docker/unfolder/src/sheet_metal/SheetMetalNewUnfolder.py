@@ -22,17 +22,19 @@
 #
 ###################################################################################
 
+from contextlib import nullcontext
 from enum import Enum, auto
-from functools import reduce
 from itertools import combinations
-from math import degrees, log10, pi, radians, sin, tan
-from operator import mul as multiply_operator
+from math import degrees, floor, log10, pi, radians, sin, sqrt, tan
 from statistics import StatisticsError, mode
+from typing import NamedTuple, Optional
 
 import FreeCAD
+import numpy as np
 import Part
 import SheetMetalTools
 from FreeCAD import Matrix, Placement, Rotation, Vector
+from lookup import KFactorTable, k_factor_standard_from_header, normalize_header
 # from TechDraw import projectEx as project_shape_to_plane
 
 try:
@@ -68,25 +70,64 @@ spline2arc_tol = 0.1  # one tenth of one millimeter
 discretization_quantity = 10
 
 
+class ShapeTopology:
+    """Adjacency between the faces, edges and vertices of a shape, built in
+    one pass over the faces' and edges' sub-shapes. Looking up the faces of
+    an edge (or the edges of a vertex) is then a dict access instead of an
+    OCC ancestor search over the whole shape. Sub-shapes are matched by
+    hashCode(), as elsewhere in this module. The Faces and Edges lists are
+    kept too, because each access to shape.Faces or shape.Edges builds a
+    new list."""
+
+    def __init__(self, shp: Part.Shape):
+        self.faces = shp.Faces
+        self.face_hashes = [f.hashCode() for f in self.faces]
+        self.edges = shp.Edges
+        self.edge_hashes = [e.hashCode() for e in self.edges]
+        edge_lookup = {h: i for i, h in enumerate(self.edge_hashes)}
+        # edge index -> indices of the faces bounded by that edge
+        self.edge_faces = [[] for _ in self.edges]
+        for face_index, face in enumerate(self.faces):
+            for e in face.Edges:
+                adjacent = self.edge_faces[edge_lookup[e.hashCode()]]
+                # a seam edge bounds the same face on both sides; count it once
+                if face_index not in adjacent:
+                    adjacent.append(face_index)
+        # vertex hashCode -> indices of the edges meeting at that vertex
+        self.vertex_edges = {}
+        for edge_index, e in enumerate(self.edges):
+            for v in e.Vertexes:
+                self.vertex_edges.setdefault(v.hashCode(), []).append(edge_index)
+
+    def edges_at_vertex(self, v: Part.Vertex) -> list[Part.Edge]:
+        return [self.edges[i] for i in self.vertex_edges.get(v.hashCode(), [])]
+
+
 class EstimateThickness:
     """This class provides helper functions to determine the sheet thickness
     of a solid-modelled sheet metal part."""
 
     @staticmethod
-    def from_normal_edges(shp: Part.Shape, selected_face: int) -> float:
+    def from_normal_edges(
+        shp: Part.Shape, selected_face: int, topology: ShapeTopology = None
+    ) -> float:
         """Get the modal length of all straight edges that share a vertex with
         the selected root face, and are orinted in line with the root faces
         normal direction. Edges that meet this criteria usually correspond to
         the sheet thickness."""
         num_places = abs(int(log10(eps)))
-        root_face = shp.Faces[selected_face]
+        root_face = topology.faces[selected_face] if topology else shp.Faces[selected_face]
         normal = root_face.Surface.Axis
         # Checking membership of an edge in a shape directly won't work.
         # We must compare via hashCodes instead.
         root_face_edge_hashes = [e.hashCode() for e in root_face.Edges]
         length_values = []
         for v in root_face.Vertexes:
-            for e in shp.ancestorsOfType(v, Part.Edge):
+            if topology:
+                edges_at_vertex = topology.edges_at_vertex(v)
+            else:
+                edges_at_vertex = shp.ancestorsOfType(v, Part.Edge)
+            for e in edges_at_vertex:
                 if (
                     e.hashCode() not in root_face_edge_hashes
                     and e.Curve.TypeId == "Part::GeomLine"
@@ -142,12 +183,15 @@ class EstimateThickness:
             return 0.0
 
     @staticmethod
-    def from_face(shape: Part.Shape, selected_face: int) -> float:
-        ref_face = shape.Faces[selected_face]
+    def from_face(
+        shape: Part.Shape, selected_face: int, topology: ShapeTopology = None
+    ) -> float:
+        faces = topology.faces if topology else shape.Faces
+        ref_face = faces[selected_face]
         # find all planar faces that are parallel to the chosen face
         candidates = [
             f
-            for f in shape.Faces
+            for f in faces
             if f.hashCode() != ref_face.hashCode()
             and f.Surface.TypeId == "Part::GeomPlane"
             and SheetMetalTools.smIsParallel(ref_face.Surface.Axis, f.Surface.Axis)
@@ -162,10 +206,12 @@ class EstimateThickness:
         )
 
     @staticmethod
-    def using_best_method(shape: Part.Shape, selected_face: int) -> float:
-        thickness = EstimateThickness.from_normal_edges(shape, selected_face)
+    def using_best_method(
+        shape: Part.Shape, selected_face: int, topology: ShapeTopology = None
+    ) -> float:
+        thickness = EstimateThickness.from_normal_edges(shape, selected_face, topology)
         if not thickness:
-            thickness = EstimateThickness.from_face(shape, selected_face)
+            thickness = EstimateThickness.from_face(shape, selected_face, topology)
         if not thickness:
             thickness = EstimateThickness.from_cylinders(shape)
         if not thickness:
@@ -174,12 +220,41 @@ class EstimateThickness:
         return thickness
 
 
+class PlaneData(NamedTuple):
+    Axis: Vector
+    Position: Vector
+
+
+class CylinderData(NamedTuple):
+    Axis: Vector
+    Center: Vector
+    Radius: float
+
+
+class ToroidData(NamedTuple):
+    Axis: Vector
+    Center: Vector
+    MajorRadius: float
+    MinorRadius: float
+
+
+class SphereData(NamedTuple):
+    Center: Vector
+    Radius: float
+
+
+class ConeData(NamedTuple):
+    Axis: Vector
+    Apex: Vector
+    SemiAngle: float
+
+
 class TangentFaces:
     """This class provides functions to check if brep faces are tangent to
     each other. each compare_x_x function accepts two surfaces of a
-    particular type, and returns a boolean value indicating tangency.
-    The compare function accepts two faces and selects the correct
-    compare_x_x function automatically,"""
+    particular type (or their summaries, see below), and returns a boolean
+    value indicating tangency. The compare function accepts two faces and
+    looks up the correct compare_x_x function in the comparisons table."""
 
     @staticmethod
     def compare_plane_plane(p1: Part.Plane, p2: Part.Plane) -> bool:
@@ -373,85 +448,84 @@ class TangentFaces:
     def compare_extrusion_cone(ex: Part.SurfaceOfExtrusion, cn: Part.Cone) -> bool:
         return False  # TODO
 
+    # surface types, in the order that the compare_x_x functions take them
+    surface_order = {
+        "Part::GeomPlane": 0,
+        "Part::GeomCylinder": 1,
+        "Part::GeomToroid": 2,
+        "Part::GeomSphere": 3,
+        "Part::GeomSurfaceOfExtrusion": 4,
+        "Part::GeomCone": 5,
+    }
+
     @staticmethod
-    def compare(face1: Part.Face, face2: Part.Face) -> bool:
+    def summarize(face: Part.Face) -> tuple[str, object]:
+        """Returns the surface type of a face and the geometry that the
+        compare_x_x functions need. Every attribute access on a FreeCAD
+        surface copies data out of OCC, so the values are read once into a
+        compact tuple (with the surface's attribute names) per face."""
+        s = face.Surface
+        type_id = s.TypeId
+        if type_id == "Part::GeomPlane":
+            return type_id, PlaneData(s.Axis, s.Position)
+        if type_id == "Part::GeomCylinder":
+            return type_id, CylinderData(s.Axis, s.Center, s.Radius)
+        if type_id == "Part::GeomToroid":
+            return type_id, ToroidData(s.Axis, s.Center, s.MajorRadius, s.MinorRadius)
+        if type_id == "Part::GeomSphere":
+            return type_id, SphereData(s.Center, s.Radius)
+        if type_id == "Part::GeomCone":
+            return type_id, ConeData(s.Axis, s.Apex, s.SemiAngle)
+        return type_id, s
+
+    @staticmethod
+    def compare_summaries(
+        summary1: tuple[str, object], summary2: tuple[str, object]
+    ) -> bool:
+        """Same as compare, for the output of summarize"""
+        (type1, s1), (type2, s2) = summary1, summary2
+        order = TangentFaces.surface_order
         # order types to simplify pattern matching
-        s1 = face1.Surface
-        s2 = face2.Surface
-        type1 = s1.TypeId
-        type2 = s2.TypeId
-        order = [
-            "Part::GeomPlane",
-            "Part::GeomCylinder",
-            "Part::GeomToroid",
-            "Part::GeomSphere",
-            "Part::GeomSurfaceOfExtrusion",
-            "Part::GeomCone",
-        ]
-        needs_swap = (
-            type1 in order
-            and type2 in order
-            and order.index(type1) > order.index(type2)
-        )
-        if needs_swap:
-            s2, s1 = s1, s2
-        cls = TangentFaces
-        if s1.TypeId == "Part::GeomPlane":
-            # plane
-            if s2.TypeId == "Part::GeomPlane":
-                return cls.compare_plane_plane(s1, s2)
-            elif s2.TypeId == "Part::GeomCylinder":
-                return cls.compare_plane_cylinder(s1, s2)
-            elif s2.TypeId == "Part::GeomToroid":
-                return cls.compare_plane_torus(s1, s2)
-            elif s2.TypeId == "Part::GeomSphere":
-                return cls.compare_plane_sphere(s1, s2)
-            elif s2.TypeId == "Part::GeomSurfaceOfExtrusion":
-                return cls.compare_plane_extrusion(s1, s2)
-            elif s2.TypeId == "Part::GeomCone":
-                return cls.compare_plane_cone(s1, s2)
-            # cylinder
-        elif s1.TypeId == "Part::GeomCylinder":
-            if s2.TypeId == "Part::GeomCylinder":
-                return cls.compare_cylinder_cylinder(s1, s2)
-            elif s2.TypeId == "Part::GeomToroid":
-                return cls.compare_cylinder_torus(s1, s2)
-            elif s2.TypeId == "Part::GeomSphere":
-                return cls.compare_cylinder_sphere(s1, s2)
-            elif s2.TypeId == "Part::GeomSurfaceOfExtrusion":
-                return cls.compare_cylinder_extrusion(s1, s2)
-            elif s2.TypeId == "Part::GeomCone":
-                return cls.compare_cylinder_cone(s1, s2)
-        elif s1.TypeId == "Part::GeomToroid":
-            # torus
-            if s2.TypeId == "Part::GeomToroid":
-                return cls.compare_torus_torus(s1, s2)
-            elif s2.TypeId == "Part::GeomSphere":
-                return cls.compare_torus_sphere(s1, s2)
-            elif s2.TypeId == "Part::GeomSurfaceOfExtrusion":
-                return cls.compare_torus_extrusion(s1, s2)
-            elif s2.TypeId == "Part::GeomCone":
-                return cls.compare_torus_cone(s1, s2)
-        elif s1.TypeId == "Part::GeomSphere":
-            # sphere
-            if s2.TypeId == "Part::GeomSphere":
-                return cls.compare_sphere_sphere(s1, s2)
-            elif s2.TypeId == "Part::GeomSurfaceOfExtrusion":
-                return cls.compare_sphere_extrusion(s1, s2)
-            elif s2.TypeId == "Part::GeomCone":
-                return cls.compare_sphere_cone(s1, s2)
-        elif s1.TypeId == "Part::GeomSurfaceOfExtrusion":
-            # extrusion
-            if s2.TypeId == "Part::GeomSurfaceOfExtrusion":
-                return cls.compare_extrusion_extrusion(s1, s2)
-            elif s2.TypeId == "Part::GeomCone":
-                return cls.compare_extrusion_cone(s1, s2)
-        elif s1.TypeId == "Part::GeomCone":
-            # cone
-            if s2.TypeId == "Part::GeomCone":
-                return cls.compare_cone_cone(s1, s2)
+        if type1 in order and type2 in order and order[type1] > order[type2]:
+            type1, s1, type2, s2 = type2, s2, type1, s1
+        comparison = TangentFaces.comparisons.get((type1, type2))
         # all other cases
-        return False
+        if comparison is None:
+            return False
+        return comparison(s1, s2)
+
+    @staticmethod
+    def compare(face1: Part.Face, face2: Part.Face) -> bool:
+        return TangentFaces.compare_summaries(
+            TangentFaces.summarize(face1), TangentFaces.summarize(face2)
+        )
+
+
+# dispatch table of the compare_x_x functions, keyed by ordered pairs of
+# surface types
+TangentFaces.comparisons = {
+    ("Part::GeomPlane", "Part::GeomPlane"): TangentFaces.compare_plane_plane,
+    ("Part::GeomPlane", "Part::GeomCylinder"): TangentFaces.compare_plane_cylinder,
+    ("Part::GeomPlane", "Part::GeomToroid"): TangentFaces.compare_plane_torus,
+    ("Part::GeomPlane", "Part::GeomSphere"): TangentFaces.compare_plane_sphere,
+    ("Part::GeomPlane", "Part::GeomSurfaceOfExtrusion"): TangentFaces.compare_plane_extrusion,
+    ("Part::GeomPlane", "Part::GeomCone"): TangentFaces.compare_plane_cone,
+    ("Part::GeomCylinder", "Part::GeomCylinder"): TangentFaces.compare_cylinder_cylinder,
+    ("Part::GeomCylinder", "Part::GeomToroid"): TangentFaces.compare_cylinder_torus,
+    ("Part::GeomCylinder", "Part::GeomSphere"): TangentFaces.compare_cylinder_sphere,
+    ("Part::GeomCylinder", "Part::GeomSurfaceOfExtrusion"): TangentFaces.compare_cylinder_extrusion,
+    ("Part::GeomCylinder", "Part::GeomCone"): TangentFaces.compare_cylinder_cone,
+    ("Part::GeomToroid", "Part::GeomToroid"): TangentFaces.compare_torus_torus,
+    ("Part::GeomToroid", "Part::GeomSphere"): TangentFaces.compare_torus_sphere,
+    ("Part::GeomToroid", "Part::GeomSurfaceOfExtrusion"): TangentFaces.compare_torus_extrusion,
+    ("Part::GeomToroid", "Part::GeomCone"): TangentFaces.compare_torus_cone,
+    ("Part::GeomSphere", "Part::GeomSphere"): TangentFaces.compare_sphere_sphere,
+    ("Part::GeomSphere", "Part::GeomSurfaceOfExtrusion"): TangentFaces.compare_sphere_extrusion,
+    ("Part::GeomSphere", "Part::GeomCone"): TangentFaces.compare_sphere_cone,
+    ("Part::GeomSurfaceOfExtrusion", "Part::GeomSurfaceOfExtrusion"): TangentFaces.compare_extrusion_extrusion,
+    ("Part::GeomSurfaceOfExtrusion", "Part::GeomCone"): TangentFaces.compare_extrusion_cone,
+    ("Part::GeomCone", "Part::GeomCone"): TangentFaces.compare_cone_cone,
+}
 
 
 class UVRef(Enum):
@@ -630,51 +704,129 @@ class SketchExtraction:
         overall_transform.transform(Vector(), shift_transform)
         return overall_transform
 
+    @staticmethod
+    def boundary_segments(face: Part.Face) -> tuple[list, list]:
+        """The boundary of a face in the XY-plane as 2D line segments
+        ((x1, y1), (x2, y2)) and full circles ((x, y), radius). Arcs are
+        returned as their whole circle, and other curves as polylines."""
+        segments = []
+        circles = []
+        for edge in face.Edges:
+            curve_type = edge.Curve.TypeId
+            if curve_type == "Part::GeomCircle":
+                center = edge.Curve.Center
+                circles.append(((center.x, center.y), edge.Curve.Radius))
+                continue
+            if curve_type == "Part::GeomLine":
+                points = [edge.firstVertex().Point, edge.lastVertex().Point]
+            else:
+                points = edge.discretize(discretization_quantity)
+            points = [(p.x, p.y) for p in points]
+            segments.extend(zip(points, points[1:]))
+        return segments, circles
+
+    @staticmethod
+    def clip_lines_to_face(
+        lines: list[Part.Edge], face: Part.Face
+    ) -> list[Part.Edge]:
+        """Trims straight edges to the parts of them that lie inside a face,
+        both in the XY-plane. This is done in 2D, rather than as a boolean
+        with a solid made from the face: each line is split wherever it may
+        cross the face's boundary, and the pieces whose midpoint is inside
+        the face are kept, joined where they meet."""
+        segments, circles = SketchExtraction.boundary_segments(face)
+        clipped = []
+        for line in lines:
+            start = line.firstVertex().Point
+            end = line.lastVertex().Point
+            px, py = start.x, start.y
+            dx, dy = end.x - start.x, end.y - start.y
+            length_squared = dx * dx + dy * dy
+            if length_squared < tol * tol:
+                continue
+            # parameters along the line, from 0 at its start to 1 at its end.
+            # Splitting at a point that isn't a crossing only costs an extra
+            # inside test, so arcs are treated as whole circles.
+            splits = {0.0, 1.0}
+            for (ax, ay), (bx, by) in segments:
+                ex, ey = bx - ax, by - ay
+                denominator = dx * ey - dy * ex
+                if abs(denominator) < eps * sqrt(length_squared * (ex * ex + ey * ey)):
+                    # parallel: split where the segment's ends project
+                    splits.add(((ax - px) * dx + (ay - py) * dy) / length_squared)
+                    splits.add(((bx - px) * dx + (by - py) * dy) / length_squared)
+                    continue
+                s = ((ax - px) * dy - (ay - py) * dx) / denominator
+                if -eps <= s <= 1 + eps:
+                    splits.add(((ax - px) * ey - (ay - py) * ex) / denominator)
+            for (cx, cy), radius in circles:
+                fx, fy = px - cx, py - cy
+                b = dx * fx + dy * fy
+                discriminant = b * b - length_squared * (fx * fx + fy * fy - radius * radius)
+                if discriminant >= 0.0:
+                    root = sqrt(discriminant)
+                    splits.add((-b - root) / length_squared)
+                    splits.add((-b + root) / length_squared)
+            splits = sorted(t for t in splits if 0.0 <= t <= 1.0)
+            piece = None
+            for t1, t2 in zip(splits, splits[1:]):
+                t = (t1 + t2) / 2
+                if face.isInside(Vector(px + t * dx, py + t * dy, start.z), tol, True):
+                    piece = (piece[0] if piece else t1, t2)
+                elif piece:
+                    clipped.append(SketchExtraction._line_piece(start, end, *piece))
+                    piece = None
+            if piece:
+                clipped.append(SketchExtraction._line_piece(start, end, *piece))
+        return clipped
+
+    @staticmethod
+    def _line_piece(start: Vector, end: Vector, t1: float, t2: float) -> Part.Edge:
+        return Part.makeLine(start + (end - start) * t1, start + (end - start) * t2)
+
 
 class BendAllowanceCalculator:
     def __init__(self) -> None:
         self.k_factor_standard = None
-        self.radius_thickness_values = None
-        self.k_factor_values = None
+        self.k_factor_table = None
 
     @classmethod
-    def from_single_value(cls, k_factor: float, kfactor_standard: str):
-        """one k-factor for all radius:thickness ratios"""
+    def from_table(cls, table: KFactorTable):
+        """k-factors interpolated from a radius:thickness table"""
         instance = cls()
         instance.k_factor_standard = (
             cls.KFactorStandard.ANSI
-            if kfactor_standard == "ansi"
+            if table.k_factor_standard == "ansi"
             else cls.KFactorStandard.DIN
         )
-        instance.radius_thickness_values = [
-            1.0,
-        ]
-        instance.k_factor_values = [
-            k_factor,
-        ]
+        instance.k_factor_table = table
         return instance
 
+    @classmethod
+    def from_single_value(cls, k_factor: float, kfactor_standard: str):
+        """one k-factor for all radius:thickness ratios"""
+        return cls.from_table(
+            KFactorTable([1.0], [k_factor], "ansi" if kfactor_standard == "ansi" else "din")
+        )
+
+    @classmethod
+    def from_file(cls, path: str):
+        """k-factors from a .json or .csv material file, see KFactorTable"""
+        return cls.from_table(KFactorTable.from_file(path))
+
+    @property
+    def radius_thickness_values(self) -> list[float]:
+        return self.k_factor_table.keys
+
+    @property
+    def k_factor_values(self) -> list[float]:
+        return self.k_factor_table.values
+
     def get_k_factor(self, radius: float, thickness: float) -> float:
-        # if we are below the lowest tabulated value for the radius over
-        # thickness relation, return the smallest noted k-factor
-        r_over_t = radius / thickness
-        if r_over_t <= self.radius_thickness_values[0]:
-            kf_val = self.k_factor_values[0]
-        # apply similar logic to radius:thickness values greater than
-        # the largest available
-        elif r_over_t >= self.radius_thickness_values[-1]:
-            kf_val = self.k_factor_values[-1]
-        # if we are within the range of specified radius:thickness values,
-        # perform piecewise linear interpolation
-        else:
-            i = 0
-            while r_over_t <= self.radius_thickness_values[i]:
-                i += 1
-            kf1 = self.k_factor_values[i]
-            kf2 = self.k_factor_values[i + 1]
-            rt1 = self.radius_thickness_values[i]
-            rt2 = self.radius_thickness_values[i + 1]
-            kf_val = kf1 + (kf2 - kf1) * ((r_over_t - rt1) / (rt2 - rt1))
+        # below the lowest (or above the highest) tabulated value for the
+        # radius over thickness relation, the smallest (or largest) noted
+        # k-factor is used. In between, the k-factor is interpolated linearly.
+        kf_val = self.k_factor_table.interpolate(radius / thickness)
         # we use the ansi definition of the k-factor everywhere internally
         return self._convert_to_ansi_kfactor(kf_val)
 
@@ -697,22 +849,15 @@ class BendAllowanceCalculator:
 
     @classmethod
     def from_spreadsheet(cls, sheet: FreeCAD.DocumentObject):
-        instance = cls()
-        r_t_header = sheet.getContents("A1")
-        r_t_header = "".join(c for c in r_t_header if c not in "' ").lower()
+        r_t_header = normalize_header(sheet.getContents("A1"), "' ")
         if r_t_header != "radius/thickness":
             errmsg = (
                 "Cell A1 of material definition sheet must "
                 'be exactly "Radius/Thickness"'
             )
             raise ValueError(errmsg)
-        kf_header = sheet.getContents("B1")
-        kf_header = "".join(c for c in kf_header if c not in "' -()").lower()
-        if kf_header == "kfactoransi":
-            instance.k_factor_standard = cls.KFactorStandard.ANSI
-        elif kf_header == "kfactordin":
-            instance.k_factor_standard = cls.KFactorStandard.DIN
-        else:
+        k_factor_standard = k_factor_standard_from_header(sheet.getContents("B1"))
+        if k_factor_standard is None:
             errmsg = (
                 "Cell B1 of material definition sheet must be "
                 'one of "K-factor (ANSI)" or "K-factor (DIN)"'
@@ -736,9 +881,9 @@ class BendAllowanceCalculator:
                 )
                 raise ValueError(errmsg)
             k_factor_list.append(float(next_kf_value))
-        instance.radius_thickness_values = radius_thickness_list
-        instance.k_factor_values = k_factor_list
-        return instance
+        return cls.from_table(
+            KFactorTable(radius_thickness_list, k_factor_list, k_factor_standard)
+        )
 
     def _convert_to_ansi_kfactor(self, k_factor: float) -> float:
         if self.k_factor_standard == self.KFactorStandard.DIN:
@@ -754,86 +899,143 @@ class Edge2DCleanup:
     replace bezier curves and other geometry types with lines and arcs"""
 
     @staticmethod
-    def bspline_to_line(curve: Part.Edge) -> tuple[Part.Edge, float]:
-        p1 = curve.firstVertex().Point
-        p2 = curve.lastVertex().Point
-        if p1.distanceToPoint(p2) < eps:
-            return Part.Edge(), float("inf")
-        line = Part.makeLine(p1, p2)
-        max_err = Edge2DCleanup.check_err(curve, line)
-        return line, max_err
+    def sample_points(curve: Part.Edge) -> np.ndarray:
+        """Points spaced evenly along the curve, including its endpoints,
+        as an (n, 3) array"""
+        return np.array(
+            [tuple(p) for p in curve.discretize(Number=discretization_quantity + 2)]
+        )
 
     @staticmethod
-    def check_err(curve1: Part.Edge, curve2: Part.Edge) -> float:
-        max_err = 0.00
-        for i in range(discretization_quantity):
-            curve1_parameter = curve1.FirstParameter + (
-                curve1.LastParameter - curve1.FirstParameter
-            ) * (i + 1) / (discretization_quantity + 1)
-            curve2_parameter = curve2.FirstParameter + (
-                curve2.LastParameter - curve2.FirstParameter
-            ) * (i + 1) / (discretization_quantity + 1)
-            err = curve1.valueAt(curve1_parameter).distanceToPoint(
-                curve2.valueAt(curve2_parameter)
-            )
-            if err > max_err:
-                max_err = err
-        return max_err
+    def line_err(points: np.ndarray) -> float:
+        """Largest distance from the sampled points to the straight segment
+        between the first and last point"""
+        start, end = points[0], points[-1]
+        chord = end - start
+        length_squared = chord @ chord
+        if length_squared < eps**2:
+            return float("inf")
+        t = np.clip((points - start) @ chord / length_squared, 0.0, 1.0)
+        closest = start + t[:, np.newaxis] * chord
+        return float(np.max(np.linalg.norm(points - closest, axis=1)))
+
+    @staticmethod
+    def circle_through(
+        p1: np.ndarray, p2: np.ndarray, p3: np.ndarray
+    ) -> tuple[np.ndarray, float, np.ndarray] | None:
+        """Center, radius and unit normal of the circle through three points,
+        or None if the points are (nearly) collinear"""
+        a = p1 - p3
+        b = p2 - p3
+        normal = np.cross(a, b)
+        normal_squared = normal @ normal
+        if normal_squared < eps**2:
+            return None
+        center = p3 + np.cross((a @ a) * b - (b @ b) * a, normal) / (2 * normal_squared)
+        return center, float(np.linalg.norm(p1 - center)), normal / sqrt(normal_squared)
+
+    @staticmethod
+    def circle_err(
+        points: np.ndarray, center: np.ndarray, radius: float, normal: np.ndarray
+    ) -> float:
+        """Largest distance from the sampled points to a circle"""
+        offsets = points - center
+        height = offsets @ normal
+        in_plane = offsets - height[:, np.newaxis] * normal
+        radial = np.linalg.norm(in_plane, axis=1) - radius
+        return float(np.max(np.hypot(radial, height)))
+
+    @staticmethod
+    def bspline_to_line(
+        curve: Part.Edge, points: np.ndarray = None
+    ) -> tuple[Part.Edge, float]:
+        if points is None:
+            points = Edge2DCleanup.sample_points(curve)
+        max_err = Edge2DCleanup.line_err(points)
+        if max_err == float("inf"):
+            return Part.Edge(), max_err
+        line = Part.makeLine(curve.firstVertex().Point, curve.lastVertex().Point)
+        return line, max_err
 
     @staticmethod
-    def bspline_to_arc(curve: Part.Edge) -> tuple[Part.Edge, float]:
+    def bspline_to_arc(
+        curve: Part.Edge, points: np.ndarray = None
+    ) -> tuple[Part.Edge, float]:
+        if points is None:
+            points = Edge2DCleanup.sample_points(curve)
+        n = len(points)
         point1 = curve.firstVertex().Point
-        point2 = curve.valueAt(
-            curve.FirstParameter + 0.5 * (curve.LastParameter - curve.FirstParameter)
-        )
         point3 = curve.lastVertex().Point
         if point1.distanceToPoint(point3) < eps:
             # full circle
-            point4 = curve.valueAt(
-                curve.FirstParameter
-                + 0.25 * (curve.LastParameter - curve.FirstParameter)
+            circle = Edge2DCleanup.circle_through(
+                points[0], points[n // 4], points[n // 2]
             )
-            radius = point1.distanceToPoint(point2) / 2
-            center = point1 + 0.5 * (point2 - point1)
-            axis = (point1 - center).cross(point4 - center)
-            arc = Part.makeCircle(radius, center, axis)
+            if circle is None:
+                return Part.Edge(), float("inf")
+            center, radius, normal = circle
+            max_err = Edge2DCleanup.circle_err(points, center, radius, normal)
+            arc = Part.makeCircle(radius, Vector(*center), Vector(*normal))
         else:
             # partial circle
+            circle = Edge2DCleanup.circle_through(points[0], points[n // 2], points[-1])
+            if circle is None:
+                return Part.Edge(), float("inf")
+            max_err = Edge2DCleanup.circle_err(points, *circle)
+            point2 = Vector(*points[n // 2])
             arc = Part.Arc(point1, point2, point3).toShape().Edges[0]
-        max_err = Edge2DCleanup.check_err(curve, arc)
         return arc, max_err
 
+    @staticmethod
+    def bspline_to_lines_and_arcs(
+        edge: Part.Edge, points: np.ndarray, tolerance: float
+    ) -> list[Part.Edge]:
+        """Replace a curve with a line, an arc, or a chain of biarcs, whichever
+        is the first to fit within tolerance"""
+        if isinstance(edge.Curve, Part.BSplineCurve):
+            bspline = edge
+        else:
+            # some edge types (such as elliptical arcs) don't support the
+            # .toBSpline() method, so we have to use .toNurbs().
+            # However, when the latter is called on a Part::BezierCurve,
+            # the returned bspline won't have the toBiArcs() method.
+            bspline = edge.toNurbs().Edges[0]
+        new_edge, max_err = Edge2DCleanup.bspline_to_line(bspline, points)
+        if max_err < tolerance:
+            return [new_edge]
+        new_edge, max_err = Edge2DCleanup.bspline_to_arc(bspline, points)
+        if max_err < tolerance:
+            return [new_edge]
+        if not hasattr(bspline, "toBiArcs"):
+            bspline = edge.toNurbs().Edges[0]
+        return [a.toShape().Edges[0] for a in bspline.Curve.toBiArcs(tolerance)]
+
     @staticmethod
     def eliminate_bsplines(
         sketch: list[Part.Edge], tolerance: float
     ) -> list[Part.Edge]:
         """convert all geometry in the sketch to only straight lines and arcs"""
         new_edge_list = []
+        # patterned features repeat the same curve at different positions, so
+        # conversions are cached by the curve's sampled shape relative to its
+        # start point, and moved into place on a cache hit.
+        conversions = {}
         for edge in sketch:
             if edge.Curve.TypeId in ["Part::GeomLine", "Part::GeomCircle"]:
                 new_edge_list.append(edge)
-            else:
-                if isinstance(edge.Curve, Part.BSplineCurve):
-                    bspline = edge
-                else:
-                    # some edge types (such as elliptical arcs) don't support the
-                    # .toBSpline() method, so we have to use .toNurbs().
-                    # However, when the latter is called on a Part::BezierCurve,
-                    # the returned bspline won't have the toBiArcs() method.
-                    bspline = edge.toNurbs().Edges[0]
-                new_edge, max_err = Edge2DCleanup.bspline_to_line(bspline)
-                if max_err < tolerance:
-                    new_edge_list.append(new_edge)
-                    continue
-                new_edge, max_err = Edge2DCleanup.bspline_to_arc(bspline)
-                if max_err < tolerance:
-                    new_edge_list.append(new_edge)
-                    continue
-                if not hasattr(bspline, "toBiArcs"):
-                    bspline = edge.toNurbs().Edges[0]
-                new_edge_list.extend(
-                    a.toShape().Edges[0] for a in bspline.Curve.toBiArcs(tolerance)
-                )
+                continue
+            points = Edge2DCleanup.sample_points(edge)
+            # adding 0.0 turns -0.0 into 0.0, which has different bytes
+            key = (np.round(points - points[0], 6) + 0.0).tobytes()
+            origin = Vector(*points[0])
+            if key in conversions:
+                cached_origin, cached_edges = conversions[key]
+                offset = origin - cached_origin
+                new_edge_list.extend(e.translated(offset) for e in cached_edges)
+                continue
+            new_edges = Edge2DCleanup.bspline_to_lines_and_arcs(edge, points, tolerance)
+            conversions[key] = (origin, new_edges)
+            new_edge_list.extend(new_edges)
         return new_edge_list
 
     @staticmethod
@@ -867,88 +1069,118 @@ class Edge2DCleanup:
             .Edges[0]
         )
 
+    @staticmethod
+    def cluster_points(points: list[Vector], fuzzvalue: float) -> list[int]:
+        """Groups points that are within fuzzvalue of each other in the
+        XY-plane, transitively. Returns the group of each point, which is the
+        index of the group's first point. Points are hashed into a grid of
+        fuzzvalue sized cells, so only points in neighbouring cells are ever
+        compared."""
+        parent = list(range(len(points)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        grid = {}
+        for i, p in enumerate(points):
+            cell_x, cell_y = floor(p.x / fuzzvalue), floor(p.y / fuzzvalue)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for j in grid.get((cell_x + dx, cell_y + dy), ()):
+                        q = points[j]
+                        if (p.x - q.x) ** 2 + (p.y - q.y) ** 2 <= fuzzvalue**2:
+                            root_i, root_j = find(i), find(j)
+                            if root_i != root_j:
+                                parent[max(root_i, root_j)] = min(root_i, root_j)
+            grid.setdefault((cell_x, cell_y), []).append(i)
+        return [find(i) for i in range(len(points))]
+
     @staticmethod
     def fix_coincidence(edgelist: list[Part.Edge], fuzzvalue: float) -> list[Part.Wire]:
-        """Given a list of edges, finds pairs of edges with endpoints that are
-        nearly (but not exactly) coincident.
+        """Given a list of edges, snaps endpoints that are nearly (but not
+        exactly) coincident onto each other, and chains the edges into loops.
+        Only edges with an endpoint that moved are rebuilt.
         Returns a list of wires with improved coincidence between edges"""
-        try:
-            list_of_lists_of_edges = Part.sortEdges(edgelist, fuzzvalue)
-        except Part.OCCError:
-            # the optional fuzz-value argument is not available in FreeCAD version <= 0.21
-            # Users should not expect good results with out-of tolerance shapes if the
-            # fuzz argument wasn't used
-            list_of_lists_of_edges = Part.sortEdges(edgelist)
+        points = []
+        for e in edgelist:
+            points.extend((e.firstVertex().Point, e.lastVertex().Point))
+        groups = Edge2DCleanup.cluster_points(points, fuzzvalue)
+        # skip tiny edge segments. Their endpoints were still clustered above,
+        # which joins up the edges on either side of them.
+        # Each edge is kept with the groups of its start and end point.
+        edges = [
+            (e, groups[2 * i], groups[2 * i + 1])
+            for i, e in enumerate(edgelist)
+            if e.Length > fuzzvalue
+        ]
+        # group -> indices of the edges that start or end there
+        incident = {}
+        for k, (_, group_a, group_b) in enumerate(edges):
+            incident.setdefault(group_a, []).append(k)
+            incident.setdefault(group_b, []).append(k)
+        # walk open chains from their ends, so that each is found in one piece
+        chain_ends = [
+            (k, g) for g, ks in incident.items() if len(ks) % 2 for k in ks
+        ]
+        used = [False] * len(edges)
         wires = []
-        for list_of_edges in list_of_lists_of_edges:
-            # skip tiny edge segments
-            useable_edges = [e for e in list_of_edges if e.Length > fuzzvalue]
-            if not useable_edges:
-                # skip this edge list entirely if it was made up of only tiny segments
+        for first, start_group in chain_ends + [(k, e[1]) for k, e in enumerate(edges)]:
+            if used[first]:
                 continue
-            edgeloop_length = len(useable_edges)
-            if edgeloop_length > 1:
-                new_edges = []
-                for i in range(edgeloop_length):
-                    e1 = useable_edges[i % edgeloop_length]
-                    e2 = useable_edges[(i + 1) % edgeloop_length]
-                    e1_start = e1.firstVertex().Point
-                    e1_end = e1.lastVertex().Point
-                    e2_start = e2.firstVertex().Point
-                    e2_end = e2.lastVertex().Point
-                    # this should be the correct error
-                    err1 = e1_end.distanceToPoint(e2_start)
-                    # but one of these other ones might be the case we need to use
-                    # if Part.sortEdges has failed to do its job properly
-                    err2 = e1_end.distanceToPoint(e2_end)
-                    err3 = e1_start.distanceToPoint(e2_start)
-                    err4 = e1_start.distanceToPoint(e2_end)
-                    if err1 < err2 and err1 < err3 and err1 < err4:
-                        # orientation is End ->*-> Start
-                        startpoint = e1.firstVertex().Point
-                        endpoint = e2.firstVertex().Point
-                    elif err2 < err1 and err2 < err3 and err2 < err4:
-                        # "orientation is End ->*-> End"
-                        startpoint = e1.firstVertex().Point
-                        endpoint = e2.lastVertex().Point
-                    elif err3 < err1 and err3 < err2 and err3 < err4:
-                        # orientation is Start ->*-> Start
-                        startpoint = e1.lastVertex().Point
-                        endpoint = e2.firstVertex().Point
-                    elif err4 < err2 and err4 < err3 and err4 < err1:
-                        # orientation is Start ->*-> End
-                        startpoint = e1.lastVertex().Point
-                        endpoint = e2.lastVertex().Point
-                    else:
-                        # orientation is ambiguous - the best we can do is assume
-                        # that the edges were sorted correctly
-                        startpoint = e1.firstVertex().Point
-                        endpoint = e2.firstVertex().Point
-                    if e1.Curve.TypeId == "Part::GeomLine":
-                        new_edges.append(Edge2DCleanup.line_xy(startpoint, endpoint))
-                    elif e1.Curve.TypeId == "Part::GeomCircle":
-                        pmin, pmax = e1.ParameterRange
-                        midpoint = e1.valueAt((pmax + pmin) / 2)
-                        new_edges.append(
-                            Edge2DCleanup.arc_xy(startpoint, midpoint, endpoint)
-                        )
-                    else:
-                        errmsg = (
-                            f"Can't process edge with curve type = {e1.Curve.TypeId}"
-                        )
-                        raise RuntimeError(errmsg)
-                w = Part.Wire(new_edges)
-                wires.append(w)
-            else:
+            used[first] = True
+            loop = [first]
+            _, group_a, group_b = edges[first]
+            current = group_b if group_a == start_group else group_a
+            while True:
+                candidates = incident[current]
+                while candidates and used[candidates[-1]]:
+                    candidates.pop()
+                if not candidates:
+                    break
+                k = candidates.pop()
+                used[k] = True
+                loop.append(k)
+                _, group_a, group_b = edges[k]
+                current = group_b if group_a == current else group_a
+            if len(loop) == 1:
                 # single edge loops
-                edge = useable_edges[0]
+                edge = edges[first][0]
                 if edge.Curve.TypeId != "Part::GeomCircle":
                     errmsg = "Can't process non-circular single-edge loop"
                     raise RuntimeError(errmsg)
-                w = Part.Wire(
-                    [Edge2DCleanup.circle_xy(edge.Curve.Center, edge.Curve.Radius)]
+                wires.append(
+                    Part.Wire(
+                        [Edge2DCleanup.circle_xy(edge.Curve.Center, edge.Curve.Radius)]
+                    )
                 )
-                wires.append(w)
+                continue
+            # an open chain is closed by snapping its end onto its start
+            snap_to = {current: start_group}
+            new_edges = []
+            for k in loop:
+                e, group_a, group_b = edges[k]
+                group_a = snap_to.get(group_a, group_a)
+                group_b = snap_to.get(group_b, group_b)
+                startpoint = Vector(points[group_a].x, points[group_a].y, 0.0)
+                endpoint = Vector(points[group_b].x, points[group_b].y, 0.0)
+                if e.Curve.TypeId not in ("Part::GeomLine", "Part::GeomCircle"):
+                    errmsg = f"Can't process edge with curve type = {e.Curve.TypeId}"
+                    raise RuntimeError(errmsg)
+                if (
+                    e.firstVertex().Point.distanceToPoint(startpoint) <= tol
+                    and e.lastVertex().Point.distanceToPoint(endpoint) <= tol
+                ):
+                    new_edges.append(e)
+                elif e.Curve.TypeId == "Part::GeomLine":
+                    new_edges.append(Edge2DCleanup.line_xy(startpoint, endpoint))
+                else:
+                    pmin, pmax = e.ParameterRange
+                    midpoint = e.valueAt((pmax + pmin) / 2)
+                    new_edges.append(Edge2DCleanup.arc_xy(startpoint, midpoint, endpoint))
+            wires.append(Part.Wire(new_edges))
         return wires
 
     @staticmethod
@@ -994,34 +1226,66 @@ class Edge2DCleanup:
         return result
 
 
-def build_graph_of_tangent_faces(shp: Part.Shape, root: int) -> nx.Graph:
+def build_graph_of_all_tangent_faces(
+    shp: Part.Shape, topology: ShapeTopology = None
+) -> nx.Graph:
+    """Graph of every pair of faces that share an edge and are tangent there,
+    for all root faces. build_graph_of_tangent_faces takes the part of it
+    connected to one root face, so the graph can be built once and shared by
+    unfolds from several root faces."""
     # created a simple undirected graph object
     graph_of_shape_faces = nx.Graph()
     # track faces by their indices, because the underlying pointers to faces
     # may get changed around while building the graph.
-    face_hashes = [f.hashCode() for f in shp.Faces]
-    index_lookup = {h: i for i, h in enumerate(face_hashes)}
+    if topology is None:
+        topology = ShapeTopology(shp)
     # get pairs of faces that share the same edge
-    candidates = [
-        (i, shp.ancestorsOfType(e, Part.Face)) for i, e in enumerate(shp.Edges)
-    ]
+    candidates = enumerate(topology.edge_faces)
     # filter to remove seams on cylinders or other faces that wrap back onto themselves
     # other than self-adjacent faces, edges should always have 2 face ancestors
     # this assumption is probably only valid for watertight solids.
+    # many edges are shared by the same pair of faces (e.g. a flange and a
+    # bend split into several edges), so each pair is only compared once,
+    # from surface data that is only read once per face.
+    summaries = {}
+    tangency = {}
     for edge_index, faces in filter(lambda c: len(c[1]) == 2, candidates):
-        face_a, face_b = faces
-        if TangentFaces.compare(face_a, face_b):
+        index_a, index_b = faces
+        pair = (topology.face_hashes[index_a], topology.face_hashes[index_b])
+        if pair not in tangency:
+            for i in faces:
+                if i not in summaries:
+                    summaries[i] = TangentFaces.summarize(topology.faces[i])
+            tangency[pair] = tangency[pair[::-1]] = TangentFaces.compare_summaries(
+                summaries[index_a], summaries[index_b]
+            )
+        if tangency[pair]:
             graph_of_shape_faces.add_edge(
-                index_lookup[face_a.hashCode()],
-                index_lookup[face_b.hashCode()],
+                index_a,
+                index_b,
                 label=edge_index,  # store indexes in the label attr for debugging
             )
-    # graph_of_shape_faces should have at least three connected subgraphs
+    return graph_of_shape_faces
+
+
+def build_graph_of_tangent_faces(
+    shp: Part.Shape,
+    root: int,
+    topology: ShapeTopology = None,
+    all_tangent_faces: nx.Graph = None,
+) -> nx.Graph:
+    """The faces tangent to the root face, directly or through other faces.
+    all_tangent_faces is the output of build_graph_of_all_tangent_faces, which
+    is built here if not given."""
+    if all_tangent_faces is None:
+        all_tangent_faces = build_graph_of_all_tangent_faces(shp, topology)
+    # all_tangent_faces should have at least three connected subgraphs
     # (top side, bottom side, and sheet edge sides of the sheetmetal part).
     # We only care about the subgraph that includes the selected root face.
-    for c in nx.connected_components(graph_of_shape_faces):
-        if root in c:
-            return graph_of_shape_faces.subgraph(c).copy()
+    if root in all_tangent_faces:
+        return all_tangent_faces.subgraph(
+            nx.node_connected_component(all_tangent_faces, root)
+        ).copy()
     # If there is nothing tangent to the root face, return a graph with one
     # node and no edges.
     # This is useful for dxf/svg export of flat plates for manufacturing.
@@ -1030,54 +1294,63 @@ def build_graph_of_tangent_faces(shp: Part.Shape, root: int) -> nx.Graph:
     return single_face_graph
 
 
-def unroll_cylinder(
-    cylindrical_face: Part.Face,
-    refpos: UVRef,
-    bac: BendAllowanceCalculator,
-    thickness: float,
-    seam_edges: set,
-) -> tuple[list[Part.Edge], Part.Edge]:
-    """Given a cylindrical face and a reference corner,
-    computes flattened versions of the face's non-seam edges,
-    oriented with respect to the +x,+y quadrant of the 2D plane."""
+def unroll_cylinder_parametric(
+    cylindrical_face: Part.Face, seam_edges: set
+) -> list[tuple]:
+    """Given a cylindrical face, computes its non-seam edges in the face's
+    (v, u - umin) parameter space, before the u (angular) direction is
+    scaled to a bend allowance. Lines are returned as ("line", start, end)
+    and everything else as ("bspline", poles, weights)."""
     umin, umax, vmin, vmax = cylindrical_face.ParameterRange
-    bend_angle = umax - umin
-    radius = cylindrical_face.Surface.Radius
-    bend_direction = BendDirection.from_face(cylindrical_face)
-    bend_allowance = bac.get_bend_allowance(
-        bend_direction, radius, thickness, bend_angle
-    )
-    overall_height = abs(vmax - vmin)
-    y_scale_factor = bend_allowance / bend_angle
-    flattened_edges = []
+    curves = []
     for e in [
         edge for edge in cylindrical_face.Edges if edge.hashCode() not in seam_edges
     ]:
         edge_on_surface, e_param_min, e_param_max = cylindrical_face.curveOnSurface(e)
         if isinstance(edge_on_surface, (Part.Geom2d.Line2d, Part.Geom2d.Line2dSegment)):
             v1 = edge_on_surface.value(e_param_min)
-            y1, x1 = v1.x - umin, v1.y - vmin
             v2 = edge_on_surface.value(e_param_max)
-            y2, x2 = v2.x - umin, v2.y - vmin
-            line = Part.makeLine(
-                Vector(x1, y1 * y_scale_factor), Vector(x2, y2 * y_scale_factor)
+            curves.append(
+                ("line", (v1.y - vmin, v1.x - umin), (v2.y - vmin, v2.x - umin))
             )
-            flattened_edges.append(line)
         elif isinstance(edge_on_surface, Part.Geom2d.BSplineCurve2d):
             poles_and_weights = edge_on_surface.getPolesAndWeights()
-            poles = [
-                (v - vmin, (u - umin) * y_scale_factor, 0)
-                for u, v, _ in poles_and_weights
-            ]
+            poles = [(v - vmin, u - umin) for u, v, _ in poles_and_weights]
             weights = [w for _, _, w in poles_and_weights]
-            spline = Part.BSplineCurve()
-            spline.buildFromPolesMultsKnots(poles=poles, weights=weights)
-            flattened_edges.append(spline.toShape())
+            curves.append(("bspline", poles, weights))
         else:
             errmsg = (
                 f"Unhandled curve type when unfolding face: {type(edge_on_surface)}"
             )
             raise TypeError(errmsg)
+    return curves
+
+
+def flatten_unrolled_cylinder(
+    curves: list[tuple],
+    refpos: UVRef,
+    overall_height: float,
+    bend_angle: float,
+    bend_allowance: float,
+) -> tuple[list[Part.Edge], Part.Edge]:
+    """Builds the flattened edges of a cylindrical face from the output of
+    unroll_cylinder_parametric, stretching the angular direction to the bend
+    allowance and orienting the result with respect to the +x,+y quadrant of
+    the 2D plane."""
+    y_scale_factor = bend_allowance / bend_angle
+    flattened_edges = []
+    for curve in curves:
+        if curve[0] == "line":
+            (x1, y1), (x2, y2) = curve[1], curve[2]
+            line = Part.makeLine(
+                Vector(x1, y1 * y_scale_factor), Vector(x2, y2 * y_scale_factor)
+            )
+            flattened_edges.append(line)
+        else:
+            poles = [(x, y * y_scale_factor, 0) for x, y in curve[1]]
+            spline = Part.BSplineCurve()
+            spline.buildFromPolesMultsKnots(poles=poles, weights=curve[2])
+            flattened_edges.append(spline.toShape())
     mirror_base_pos = Vector(overall_height / 2, bend_allowance / 2)
     # there are four possible orientations of the face corresponding to four
     # quadrants of the 2D plane. Whether flipping across the x/y/both axis is
@@ -1101,22 +1374,44 @@ def unroll_cylinder(
             )
             for x in flattened_edges
         ]
-    half_bend_width = Vector((vmax - vmin) / 2, 0)
+    half_bend_width = Vector(overall_height / 2, 0)
     bend_line = Part.makeLine(
         mirror_base_pos + half_bend_width, mirror_base_pos - half_bend_width
     )
     return flattened_edges, bend_line
 
 
-def compute_unbend_transform(
-    bent_face: Part.Face,
-    base_edge: Part.Edge,
-    thickness: float,
+def unroll_cylinder(
+    cylindrical_face: Part.Face,
+    refpos: UVRef,
     bac: BendAllowanceCalculator,
-) -> tuple[Matrix, Matrix, UVRef]:
+    thickness: float,
+    seam_edges: set,
+) -> tuple[list[Part.Edge], Part.Edge]:
+    """Given a cylindrical face and a reference corner,
+    computes flattened versions of the face's non-seam edges,
+    oriented with respect to the +x,+y quadrant of the 2D plane."""
+    umin, umax, vmin, vmax = cylindrical_face.ParameterRange
+    bend_angle = umax - umin
+    radius = cylindrical_face.Surface.Radius
+    bend_direction = BendDirection.from_face(cylindrical_face)
+    bend_allowance = bac.get_bend_allowance(
+        bend_direction, radius, thickness, bend_angle
+    )
+    return flatten_unrolled_cylinder(
+        unroll_cylinder_parametric(cylindrical_face, seam_edges),
+        refpos,
+        abs(vmax - vmin),
+        bend_angle,
+        bend_allowance,
+    )
+
+
+def bend_reference(
+    bent_face: Part.Face, base_edge: Part.Edge
+) -> tuple[Matrix, UVRef, BendDirection, float, float]:
     """Computes the position and orientation of a reference corner on a bent
-    surface, as well as a transformation to flatten out subsequent faces to
-    align with the pre-bend part of the shape"""
+    surface, along with the bend's direction, radius and angle"""
     # for cylindrical surfaces, the u-parameter corresponds to the radial
     # direction, and the u-period is the radial boundary of the cylindrical
     # patch. The v-period corresponds to the axial direction.
@@ -1182,12 +1477,21 @@ def compute_unbend_transform(
     # note that the x-axis is ignored here based on the priority string
     lcs_rotation = Rotation(x_axis, y_axis, z_axis, "ZYX")
     alignment_transform = Placement(lcs_base_point, lcs_rotation).toMatrix()
+    return alignment_transform, uvref, bend_direction, radius, bend_angle
+
+
+def unbend_transform(
+    alignment_transform: Matrix,
+    bend_direction: BendDirection,
+    radius: float,
+    bend_angle: float,
+    bend_allowance: float,
+) -> Matrix:
+    """Computes a transformation to flatten out the faces after a bend to
+    align with the pre-bend part of the shape"""
     # the actual unbend transformation is found by reversing the rotation of
     # a flat face after the bend due to the bending operation,
     # then pushing it forward according to the bend allowance
-    bend_allowance = bac.get_bend_allowance(
-        bend_direction, radius, thickness, bend_angle
-    )
     # fmt: off
     allowance_transform = Matrix(
         1, 0, 0, 0,
@@ -1212,131 +1516,72 @@ def compute_unbend_transform(
     overall_transform.transform(Vector(), translate * rot * translate.inverse())
     overall_transform.transform(Vector(), allowance_transform)
     overall_transform.transform(Vector(), alignment_transform)
-    return alignment_transform, overall_transform, uvref
+    return overall_transform
 
 
-def unfold(
-    shape: Part.Shape, root_face_index: int, bac: BendAllowanceCalculator
-) -> tuple[list[Part.Edge], list[Part.Edge]]:
-    """Given a solid body of a sheet metal part and a reference face, computes
-    a solid representation of the unbent object, as well as a compound object
-    containing straight edges for each bend centerline."""
-    graph_of_sheet_faces = build_graph_of_tangent_faces(shape, root_face_index)
-    thickness = EstimateThickness.using_best_method(shape, root_face_index)
-    # also build a list of all seam edges, to be filtered out from the unfolded shape
-    seam_edges_list = []
-    for _, _, edata in graph_of_sheet_faces.edges(data=True):
-        seam_edges_list.append(shape.Edges[edata["label"]].hashCode())
-    seam_edges = set(seam_edges_list)
-    # we could also get a random spanning tree here. Would that be faster?
-    # Or is it better to take the opportunity to get a spanning tree that meets
-    # some criteria for minimization?
-    # I.E.: the shorter the longest path in the tree, the fewer nested
-    # transformations we have to compute
-    spanning_tree = nx.minimum_spanning_tree(graph_of_sheet_faces, weight="label")
-    # convert to 'directed tree', where every edge points away from the selected face
-    dg = nx.DiGraph()
-    for node in spanning_tree:
-        dg.add_node(node)
-    lengths = nx.all_pairs_shortest_path_length(spanning_tree)
-    distances_to_root_face = {k: kv for k, kv in lengths}[root_face_index]
-    for f1, f2, edata in spanning_tree.edges(data=True):
-        if distances_to_root_face[f1] <= distances_to_root_face[f2]:
-            dg.add_edge(f1, f2, label=edata["label"])
-        else:
-            dg.add_edge(f2, f1, label=edata["label"])
-    # the digraph should now have everything we need to unfold the shape,
-    # For every edge f1--e1-->f2 where f2 is a cylindrical face, feed f1
-    # through our unbending functions with e1 as the stationary edge.
-    for e in [
-        e for e in dg.edges if shape.Faces[e[1]].Surface.TypeId == "Part::GeomCylinder"
-    ]:
-        # the bend face is the end-node of the directed edge
-        bend_part = shape.Faces[e[1]]
-        # we stored the edge indices as the labels of the graph edges
-        edge_before_bend_index = dg.get_edge_data(e[0], e[1])["label"]
-        # check that we aren't trying to unfold across a non-linear reference edge
-        # this condition is reached if the user supplies a part with complex formed
-        # features that have unfoldable-but-tangent faces, for example.
-        edge_before_bend = shape.Edges[edge_before_bend_index]
-        if edge_before_bend.Curve.TypeId != "Part::GeomLine":
-            errmsg = (
-                "This shape appears to have bends across non-straight edges. "
-                "Unfolding such a shape is not yet supported."
-                f" (Edge{edge_before_bend_index + 1})"
-            )
-            raise RuntimeError(errmsg)
-        # compute the unbend transformation matrices.
-        alignment_transform, overall_transform, uvref = compute_unbend_transform(
-            bend_part, edge_before_bend, thickness, bac
-        )
-        # Determine the unbent face shape from the reference UV position.
-        # Also get a bend line across the middle of the flattened face.
-        dg.nodes[e[1]]["unbend_transform"] = overall_transform
-        try:
-            flattened_edges, bend_line = unroll_cylinder(
-                bend_part, uvref, bac, thickness, seam_edges
-            )
-            # Add the transformation and unbend shape to the end node of the edge
-            # as attributes.
-            dg.nodes[e[1]]["bend_line"] = bend_line.transformed(alignment_transform)
-            dg.nodes[e[1]]["sketch_lines"] = [
-                e.transformed(alignment_transform) for e in flattened_edges
-            ]
-        except Exception as E:
-            msg = (
-                f"failed to unroll a cylindrical face (Face{e[1] + 1})"
-                + "\n"
-                + f"Original exception: {E}\n"
-            )
-            FreeCAD.Console.PrintWarning(msg)
-    # Get a path from the root (stationary) face to each other face,
-    # so we can combine transformations to position the final shape.
-    # Apply the unbent transformation to all the flattened geometry to bring
-    # it in-plane with the root face.
-    list_of_sketch_lines = []
-    list_of_bend_lines = []
-    for face_id, path in nx.shortest_path(dg, source=root_face_index).items():
-        # the path includes the root face itself, which we don't need
-        path_to_face = path[:-1]
-        node_data = dg.nodes.data()
-        # accumulate transformations while traversing from the root face to this face
-        list_of_matrices = [
-            node_data[f]["unbend_transform"]
-            for f in path_to_face
-            if "unbend_transform" in node_data[f]
-        ]
-        # use reduce() to do repeated matrix multiplication
-        # Matrix() * M_1 * M_2 * ... * M_N for N matrices
-        final_mat = reduce(multiply_operator, list_of_matrices, Matrix())
-        # bent faces of the input shape are swapped for their unbent versions
-        if "sketch_lines" in node_data[face_id]:
-            list_of_sketch_lines.extend(
-                [e.transformed(final_mat) for e in node_data[face_id]["sketch_lines"]]
-            )
-        # planar faces of the input shape are returned aligned to the root face,
-        # but otherwise unmodified
-        else:
-            list_of_sketch_lines.extend(
-                [
-                    e.transformed(final_mat)
-                    for e in shape.Faces[face_id].Edges
-                    if e.hashCode() not in seam_edges
-                ]
-            )
-        # also combine all of the bend lines into a list after positioning
-        # them correctly
-        if "bend_line" in node_data[face_id]:
-            list_of_bend_lines.append(
-                node_data[face_id]["bend_line"].transformed(final_mat)
-            )
-    # Extrude the 2d profile back into a flattened solid body.
-    return list_of_sketch_lines, list_of_bend_lines
+def compute_unbend_transform(
+    bent_face: Part.Face,
+    base_edge: Part.Edge,
+    thickness: float,
+    bac: BendAllowanceCalculator,
+) -> tuple[Matrix, Matrix, UVRef]:
+    """Computes the position and orientation of a reference corner on a bent
+    surface, as well as a transformation to flatten out subsequent faces to
+    align with the pre-bend part of the shape"""
+    alignment_transform, uvref, bend_direction, radius, bend_angle = bend_reference(
+        bent_face, base_edge
+    )
+    bend_allowance = bac.get_bend_allowance(
+        bend_direction, radius, thickness, bend_angle
+    )
+    overall_transform = unbend_transform(
+        alignment_transform, bend_direction, radius, bend_angle, bend_allowance
+    )
+    return alignment_transform, overall_transform, uvref
 
 
-def getUnfold(
-    bac: BendAllowanceCalculator, solid: Part.Feature, facename: str
-) -> tuple[Part.Face, Part.Shape, Part.Compound, Vector]:
+def accumulate_unbend_transforms(
+    dg: nx.DiGraph, root: int, unbend_transforms: dict[int, Matrix] = None
+) -> dict[int, Matrix]:
+    """Walk a directed tree of faces from the root face, and return for each
+    face the product of the unbend transformation matrices of its ancestors,
+    root first: Matrix() * M_1 * M_2 * ... * M_N. The matrices are taken from
+    unbend_transforms (face index -> matrix) if given, otherwise from the
+    "unbend_transform" node attributes. Each face's matrix is computed once
+    from its parent's, so the walk is linear in the number of faces."""
+    if unbend_transforms is None:
+        unbend_transforms = {
+            face_id: data["unbend_transform"]
+            for face_id, data in dg.nodes(data=True)
+            if "unbend_transform" in data
+        }
+    placements = {root: Matrix()}
+    for parent, face_id in nx.bfs_edges(dg, root):
+        matrix = placements[parent]
+        if parent in unbend_transforms:
+            matrix = matrix * unbend_transforms[parent]
+        placements[face_id] = matrix
+    return placements
+
+
+class UnrolledBend(NamedTuple):
+    """Everything needed to flatten a bend, other than its bend allowance"""
+
+    face_id: int
+    direction: BendDirection
+    radius: float
+    angle: float
+    # length of the bend along its axis
+    width: float
+    alignment_transform: Matrix
+    uvref: UVRef
+    # output of unroll_cylinder_parametric, or None if unrolling failed
+    curves: list[tuple] | None
+
+
+def shape_in_own_frame(solid: Part.Feature, facename: str) -> tuple[Part.Shape, int]:
+    """The shape of an object in its own coordinate system, and the index of
+    the named face (e.g. "Face3")"""
     object_placement = solid.Placement.toMatrix()
     shp = solid.Shape.transformed(object_placement.inverse())
     if hasattr(shp, "findSubShape"):
@@ -1350,25 +1595,444 @@ def getUnfold(
         except ValueError:
             errmsg = f"Invalid shape name: {facename}"
             raise RuntimeError(errmsg)
-    sketch_lines, bend_lines = unfold(shp, root_face_index, bac)
-    sketch_align_transform = SketchExtraction.move_to_origin(
-        Part.makeCompound(sketch_lines), shp.Faces[root_face_index]
-    )
-    thickness = EstimateThickness.using_best_method(shp, root_face_index)
-    sketch_lines = [e.transformed(sketch_align_transform) for e in sketch_lines]
-    bend_lines = [e.transformed(sketch_align_transform) for e in bend_lines]
-    sketch_wirelist = Edge2DCleanup.clean_and_structure_geometry(sketch_lines)
-    root_normal = shp.Faces[root_face_index].normalAt(0, 0)
-    face = Part.makeFace(sketch_wirelist, "Part::FaceMakerBullseye")
-    unbent_solid = face.extrude(Vector(0.0, 0.0, -1 * thickness))
-    inplace_unbend = face.transformed(sketch_align_transform.inverse()).extrude(
-        root_normal.normalize() * -1 * thickness
+    return shp, root_face_index
+
+
+class NoMetrics:
+    """Stands in for a metrics recorder when nobody wants the numbers.
+    A recorder (e.g. unfolder/metrics.py's UnfoldMetrics) has
+    phase(name), a context manager that times a phase of the unfold,
+    and count(name, n), which adds n to a counter."""
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+
+class UnfoldAnalysis:
+    """The part of unfolding a shape that doesn't depend on the bend
+    allowance: the graph of tangent faces and its spanning tree, the sheet
+    thickness, and the reference corner, radius, angle and unrolled edges of
+    every bend. evaluate() lays the faces out flat for a given bend
+    allowance calculator, so many k-factors can be tried on one analysis.
+    Each phase is timed with metrics (see NoMetrics). Analyses of one shape
+    from different root faces can share its topology and the graph from
+    build_graph_of_all_tangent_faces."""
+
+    def __init__(
+        self,
+        shape: Part.Shape,
+        root_face_index: int,
+        topology: ShapeTopology = None,
+        metrics=None,
+        all_tangent_faces: nx.Graph = None,
+    ):
+        if metrics is None:
+            metrics = NoMetrics()
+        self.metrics = metrics
+        if topology is None:
+            with metrics.phase("topology"):
+                topology = ShapeTopology(shape)
+        self.shape = shape
+        self.root_face_index = root_face_index
+        self.topology = topology
+        faces = topology.faces
+        edges = topology.edges
+        metrics.count("faces", len(faces))
+        metrics.count("edges", len(edges))
+        with metrics.phase("face_graph"):
+            graph_of_sheet_faces = build_graph_of_tangent_faces(
+                shape, root_face_index, topology, all_tangent_faces
+            )
+        with metrics.phase("thickness"):
+            self.thickness = EstimateThickness.using_best_method(
+                shape, root_face_index, topology
+            )
+        # also build a list of all seam edges, to be filtered out from the unfolded shape
+        seam_edges_list = []
+        for _, _, edata in graph_of_sheet_faces.edges(data=True):
+            seam_edges_list.append(topology.edge_hashes[edata["label"]])
+        seam_edges = set(seam_edges_list)
+        self.seam_edges = seam_edges
+        # we could also get a random spanning tree here. Would that be faster?
+        # Or is it better to take the opportunity to get a spanning tree that meets
+        # some criteria for minimization?
+        # I.E.: the shorter the longest path in the tree, the fewer nested
+        # transformations we have to compute
+        with metrics.phase("spanning_tree"):
+            spanning_tree = nx.minimum_spanning_tree(
+                graph_of_sheet_faces, weight="label"
+            )
+            # convert to 'directed tree', where every edge points away from the selected face.
+            # A breadth-first walk from the root visits each tree edge once, parent first.
+            dg = nx.DiGraph()
+            dg.add_node(root_face_index)
+            for f1, f2 in nx.bfs_edges(spanning_tree, root_face_index):
+                dg.add_edge(f1, f2, label=spanning_tree.edges[f1, f2]["label"])
+        self.tree = dg
+        # the digraph should now have everything we need to unfold the shape,
+        # For every edge f1--e1-->f2 where f2 is a cylindrical face, feed f1
+        # through our unbending functions with e1 as the stationary edge.
+        self.bends = {}
+        for e in [
+            e for e in dg.edges if faces[e[1]].Surface.TypeId == "Part::GeomCylinder"
+        ]:
+            # the bend face is the end-node of the directed edge
+            bend_part = faces[e[1]]
+            # we stored the edge indices as the labels of the graph edges
+            edge_before_bend_index = dg.get_edge_data(e[0], e[1])["label"]
+            # check that we aren't trying to unfold across a non-linear reference edge
+            # this condition is reached if the user supplies a part with complex formed
+            # features that have unfoldable-but-tangent faces, for example.
+            edge_before_bend = edges[edge_before_bend_index]
+            if edge_before_bend.Curve.TypeId != "Part::GeomLine":
+                errmsg = (
+                    "This shape appears to have bends across non-straight edges. "
+                    "Unfolding such a shape is not yet supported."
+                    f" (Edge{edge_before_bend_index + 1})"
+                )
+                raise RuntimeError(errmsg)
+            # find the reference corner of the bend, and the frame of reference
+            # that the unbend transformation is applied in.
+            alignment_transform, uvref, direction, radius, angle = bend_reference(
+                bend_part, edge_before_bend
+            )
+            # Get the face's edges in its parameter space, ready to be
+            # stretched out to the bend allowance.
+            try:
+                with metrics.phase("unroll_cylinders"):
+                    curves = unroll_cylinder_parametric(bend_part, seam_edges)
+            except Exception as E:
+                msg = (
+                    f"failed to unroll a cylindrical face (Face{e[1] + 1})"
+                    + "\n"
+                    + f"Original exception: {E}\n"
+                )
+                FreeCAD.Console.PrintWarning(msg)
+                curves = None
+            umin, umax, vmin, vmax = bend_part.ParameterRange
+            self.bends[e[1]] = UnrolledBend(
+                e[1],
+                direction,
+                radius,
+                angle,
+                abs(vmax - vmin),
+                alignment_transform,
+                uvref,
+                curves,
+            )
+        metrics.count("bends", len(self.bends))
+        # planar faces of the input shape are returned aligned to the root face,
+        # but otherwise unmodified, as are bends that couldn't be unrolled
+        self.face_edges = {
+            face_id: self.unmodified_edges(face_id)
+            for face_id in dg.nodes
+            if face_id not in self.bends or self.bends[face_id].curves is None
+        }
+
+    def unmodified_edges(self, face_id: int) -> list[Part.Edge]:
+        return [
+            e
+            for e in self.topology.faces[face_id].Edges
+            if e.hashCode() not in self.seam_edges
+        ]
+
+    @classmethod
+    def from_solid(
+        cls, solid: Part.Feature, facename: str, metrics=None
+    ) -> "UnfoldAnalysis":
+        """Analyzes a sheet metal object in its own coordinate system, with
+        the named face (e.g. "Face3") as the root face"""
+        return cls(*shape_in_own_frame(solid, facename), metrics=metrics)
+
+    @property
+    def root_face(self) -> Part.Face:
+        return self.topology.faces[self.root_face_index]
+
+    def evaluate(
+        self, bac: BendAllowanceCalculator
+    ) -> tuple[list[Part.Edge], list[Part.Edge]]:
+        """Flattens the shape with the given bend allowances. Returns the edges
+        of the flat pattern in-plane with the root face, and a straight edge
+        for each bend centerline."""
+        unbend_transforms = {}
+        sketch_lines = {}
+        bend_lines = {}
+        for face_id, bend in self.bends.items():
+            bend_allowance = bac.get_bend_allowance(
+                bend.direction, bend.radius, self.thickness, bend.angle
+            )
+            unbend_transforms[face_id] = unbend_transform(
+                bend.alignment_transform,
+                bend.direction,
+                bend.radius,
+                bend.angle,
+                bend_allowance,
+            )
+            if bend.curves is None:
+                continue
+            # Determine the unbent face shape from the reference UV position.
+            # Also get a bend line across the middle of the flattened face.
+            try:
+                with self.metrics.phase("flatten_bends"):
+                    flattened_edges, bend_line = flatten_unrolled_cylinder(
+                        bend.curves, bend.uvref, bend.width, bend.angle, bend_allowance
+                    )
+            except Exception as E:
+                msg = (
+                    f"failed to unroll a cylindrical face (Face{face_id + 1})"
+                    + "\n"
+                    + f"Original exception: {E}\n"
+                )
+                FreeCAD.Console.PrintWarning(msg)
+                continue
+            bend_lines[face_id] = bend_line.transformed(bend.alignment_transform)
+            sketch_lines[face_id] = [
+                e.transformed(bend.alignment_transform) for e in flattened_edges
+            ]
+        # Combine the unbend transformations along the tree to position each face,
+        # bringing all the flattened geometry in-plane with the root face.
+        list_of_sketch_lines = []
+        list_of_bend_lines = []
+        with self.metrics.phase("transforms"):
+            placements = accumulate_unbend_transforms(
+                self.tree, self.root_face_index, unbend_transforms
+            )
+            for face_id, final_mat in placements.items():
+                # bent faces of the input shape are swapped for their unbent versions
+                if face_id in sketch_lines:
+                    list_of_sketch_lines.extend(
+                        [e.transformed(final_mat) for e in sketch_lines[face_id]]
+                    )
+                else:
+                    if face_id not in self.face_edges:
+                        self.face_edges[face_id] = self.unmodified_edges(face_id)
+                    list_of_sketch_lines.extend(
+                        [e.transformed(final_mat) for e in self.face_edges[face_id]]
+                    )
+                # also combine all of the bend lines into a list after positioning
+                # them correctly
+                if face_id in bend_lines:
+                    list_of_bend_lines.append(
+                        bend_lines[face_id].transformed(final_mat)
+                    )
+        return list_of_sketch_lines, list_of_bend_lines
+
+    def flat_pattern(
+        self, bac: BendAllowanceCalculator, with_bend_lines: bool = True
+    ) -> "FlatPattern":
+        """Flattens the shape with the given bend allowances, and cleans up
+        the result into a flat face with bend lines, laid out in the XY-plane.
+        Without with_bend_lines, the bend lines are left empty and aren't
+        trimmed to the face."""
+        metrics = self.metrics
+        sketch_lines, bend_lines = self.evaluate(bac)
+        sketch_align_transform = SketchExtraction.move_to_origin(
+            Part.makeCompound(sketch_lines), self.root_face
+        )
+        sketch_lines = [e.transformed(sketch_align_transform) for e in sketch_lines]
+        metrics.count(
+            "splines_converted",
+            sum(1 for e in sketch_lines if e.Curve.TypeId == "Part::GeomBSplineCurve"),
+        )
+        with metrics.phase("cleanup_2d"):
+            sketch_wirelist = Edge2DCleanup.clean_and_structure_geometry(sketch_lines)
+        root_normal = self.root_face.normalAt(0, 0)
+        with metrics.phase("make_face"):
+            face = Part.makeFace(sketch_wirelist, "Part::FaceMakerBullseye")
+        if with_bend_lines:
+            bend_lines = [e.transformed(sketch_align_transform) for e in bend_lines]
+            with metrics.phase("bend_lines"):
+                trimmed_bend_lines = Part.makeCompound(
+                    SketchExtraction.clip_lines_to_face(bend_lines, face)
+                )
+        else:
+            trimmed_bend_lines = Part.makeCompound([])
+        return FlatPattern(
+            self.root_face,
+            face,
+            trimmed_bend_lines,
+            self.thickness,
+            root_normal,
+            sketch_align_transform,
+        )
+
+
+def unfold(
+    shape: Part.Shape,
+    root_face_index: int,
+    bac: BendAllowanceCalculator,
+    topology: ShapeTopology = None,
+) -> tuple[list[Part.Edge], list[Part.Edge]]:
+    """Given a solid body of a sheet metal part and a reference face, computes
+    the edges of the unbent object, as well as straight edges for each bend
+    centerline."""
+    return UnfoldAnalysis(shape, root_face_index, topology).evaluate(bac)
+
+
+class FlatPattern(NamedTuple):
+    """The unfolded part laid flat in the XY plane.
+
+    face is the flat profile (outer boundary and cutouts, lines and arcs
+    only) and bend_lines the bend centerlines trimmed to it, both positioned
+    by align_transform in the +X/+Y quadrant with the root face Z-up."""
+
+    root_face: Part.Face
+    face: Part.Shape
+    bend_lines: Part.Shape
+    thickness: float
+    root_normal: Vector
+    align_transform: Matrix
+
+    def unbent_solid(self) -> Part.Shape:
+        """The flat solid, placed back on the root face of the bent part."""
+        return self.face.transformed(self.align_transform.inverse()).extrude(
+            self.root_normal.normalize() * -1 * self.thickness
+        )
+
+
+def flat_plate_thickness(shp: Part.Shape, root_face_index: int) -> Optional[float]:
+    """The thickness of a plain blank without bends, or None if the shape
+    isn't one.
+
+    A blank is the planar root face and one opposite face of the same area,
+    parallel to it, with side walls at right angles in between: planes, or
+    cylinders around the root face normal (holes and rounded corners).
+    Anything else, e.g. a bend, a chamfer, a countersink or a step in the
+    sheet, means the shape has to go through the full unfolding.
+
+    The end face of a bent part passes those checks, with the width of the
+    part as thickness, so no side wall may be larger than the root face and
+    the thickness must match the one EstimateThickness finds."""
+    faces = shp.Faces
+    root_face = faces[root_face_index]
+    if root_face.Surface.TypeId != "Part::GeomPlane":
+        return None
+    normal = root_face.normalAt(0, 0)
+    origin = root_face.Vertexes[0].Point
+    opposite_face = None
+    thickness = None
+    for face_index, face in enumerate(faces):
+        if face_index == root_face_index:
+            continue
+        surface_type = face.Surface.TypeId
+        if surface_type == "Part::GeomPlane":
+            alignment = face.normalAt(0, 0).dot(normal)
+            if abs(alignment) < eps:
+                # side wall
+                if face.Area > root_face.Area:
+                    return None
+                continue
+            if alignment > -1 + eps or opposite_face is not None:
+                # slanted, facing the same way as the root face, or a
+                # second opposite face
+                return None
+            opposite_face = face
+            thickness = (origin - face.Vertexes[0].Point).dot(normal)
+        elif surface_type == "Part::GeomCylinder":
+            if face.Surface.Axis.cross(normal).Length > eps:
+                # a bend
+                return None
+            if face.Area > root_face.Area:
+                # a bend seen from its end
+                return None
+        else:
+            return None
+    if opposite_face is None or thickness < eps:
+        return None
+    if abs(opposite_face.Area - root_face.Area) > eps * root_face.Area:
+        return None
+    estimate = EstimateThickness.from_normal_edges(shp, root_face_index)
+    if estimate and abs(estimate - thickness) > eps:
+        return None
+    return thickness
+
+
+def flat_plate_pattern(
+    shp: Part.Shape, root_face_index: int, metrics=None
+) -> Optional[FlatPattern]:
+    """The flat pattern of a plain blank without bends (see
+    flat_plate_thickness), which is just its root face laid in the
+    XY-plane. None if the shape isn't a blank."""
+    if metrics is None:
+        metrics = NoMetrics()
+    with metrics.phase("flat_plate_check"):
+        thickness = flat_plate_thickness(shp, root_face_index)
+    if thickness is None:
+        return None
+    metrics.count("flat_plates")
+    metrics.count("faces", len(shp.Faces))
+    metrics.count("edges", len(shp.Edges))
+    root_face = shp.Faces[root_face_index]
+    return flat_pattern_from_face(root_face, root_face, thickness, metrics=metrics)
+
+
+def flat_pattern_from_face(
+    root_face: Part.Face,
+    flat_face: Part.Face,
+    thickness: float,
+    bend_lines: Part.Shape = None,
+    metrics=None,
+) -> FlatPattern:
+    """The flat pattern of a face that already lies in the plane of the root
+    face, e.g. a blank's root face or the unfolded face of another unfolder:
+    the face (and bend lines) laid in the XY-plane, with its outline
+    reduced to lines and arcs."""
+    if metrics is None:
+        metrics = NoMetrics()
+    sketch_align_transform = SketchExtraction.move_to_origin(flat_face, root_face)
+    face = flat_face.transformed(sketch_align_transform)
+    if any(
+        e.Curve.TypeId not in ("Part::GeomLine", "Part::GeomCircle")
+        for e in face.Edges
+    ):
+        # the outline has to be made of lines and arcs for CAM software
+        metrics.count(
+            "splines_converted",
+            sum(1 for e in face.Edges if e.Curve.TypeId == "Part::GeomBSplineCurve"),
+        )
+        with metrics.phase("cleanup_2d"):
+            sketch_wirelist = Edge2DCleanup.clean_and_structure_geometry(face.Edges)
+        with metrics.phase("make_face"):
+            face = Part.makeFace(sketch_wirelist, "Part::FaceMakerBullseye")
+    if bend_lines is None:
+        bend_lines = Part.makeCompound([])
+    else:
+        bend_lines = bend_lines.transformed(sketch_align_transform)
+    return FlatPattern(
+        root_face,
+        face,
+        bend_lines,
+        thickness,
+        root_face.normalAt(0, 0),
+        sketch_align_transform,
     )
-    bend_lines_compound = Part.makeCompound(bend_lines)
-    trimmed_bend_lines = bend_lines_compound.common(
-        unbent_solid.translated(Vector(0.0, 0.0, 0.5 * thickness))
-    ).transformed(sketch_align_transform.inverse())
-    return shp.Faces[root_face_index], inplace_unbend, trimmed_bend_lines, root_normal
+
+
+def getFlatPattern(
+    bac: BendAllowanceCalculator,
+    solid: Part.Feature,
+    facename: str,
+    with_bend_lines: bool = True,
+    metrics=None,
+) -> FlatPattern:
+    shp, root_face_index = shape_in_own_frame(solid, facename)
+    # blanks without bends skip the graph, thickness estimation and cleanup
+    flat = flat_plate_pattern(shp, root_face_index, metrics)
+    if flat is not None:
+        return flat
+    analysis = UnfoldAnalysis(shp, root_face_index, metrics=metrics)
+    return analysis.flat_pattern(bac, with_bend_lines)
+
+
+def getUnfold(
+    bac: BendAllowanceCalculator, solid: Part.Feature, facename: str
+) -> tuple[Part.Face, Part.Shape, Part.Compound, Vector]:
+    flat = getFlatPattern(bac, solid, facename)
+    trimmed_bend_lines = flat.bend_lines.transformed(flat.align_transform.inverse())
+    return flat.root_face, flat.unbent_solid(), trimmed_bend_lines, flat.root_normal
 
 
 def getUnfoldSketches(
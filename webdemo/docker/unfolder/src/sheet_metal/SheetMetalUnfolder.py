@@ -121,7 +121,7 @@ try:
 except ImportError:
     from Drawing import projectEx
 
-from lookup import get_val_from_range
+from lookup import KFactorTable
 
 import tempfile
 from math import sqrt
@@ -167,12 +167,19 @@ unfold_error = {
     -1: ("Unknown error"),
 }
 
-def debug_print(msg, addNewLine = True):
+# Callers pass the values to format instead of building the string, e.g.
+# debug_print("Face%s", idx + 1), so each message is formatted once, here.
+# Whether it is shown is up to FreeCAD's log settings.
+def debug_print(msg, *args, addNewLine = True):
+    if args:
+        msg = msg % args
     if addNewLine:
         msg += "\n"
     FreeCAD.Console.PrintLog(msg)
 
-def warn_print(msg, addNewLine = True):
+def warn_print(msg, *args, addNewLine = True):
+    if args:
+        msg = msg % args
     if addNewLine:
         msg += "\n"
     FreeCAD.Console.PrintWarning(msg)
@@ -195,6 +202,13 @@ def equal_vertex(vert1, vert2, p=5):
     )
 
 
+def vertex_cell(vert, p=5):
+    # grid cell of a vertex, with cells as large as the tolerance of
+    # equal_vertex, so vertices it considers equal are in neighboring cells
+    scale = 10**p
+    return (round(vert.X * scale), round(vert.Y * scale), round(vert.Z * scale))
+
+
 def sk_distance(p0, p1):
     return sqrt((p0[0] - p1[0]) ** 2 + (p0[1] - p1[1]) ** 2)
 
@@ -258,7 +272,7 @@ def sanitizeSkBsp(s_name, knot_tolerance):
         j = 0
         # print(idx_to_del)
         if len(idx_to_del) > 0:
-            debug_print("sanitizing " + s.Label)
+            debug_print("sanitizing %s", s.Label)
             idx_to_del.sort()
             # print(idx_to_del)
             idx_to_del.reverse()
@@ -360,7 +374,7 @@ class Simple_node(object):
         )
         self.error_code = None  # Index to unfold_error dictionary
         self.k_factor_lookup = (
-            k_factor_lookup  # K-factor lookup dictionary, according to ANSI standard
+            k_factor_lookup  # K-factor lookup KFactorTable, according to ANSI standard
         )
         # new node features:
         self.nfIndexes = []  # List of all face-indexes of a node (flat and bend: folded state)
@@ -414,7 +428,7 @@ class Simple_node(object):
 
     @property
     def k_Factor(self):
-        k = get_val_from_range(self.k_factor_lookup, self.innerRadius / self.thickness)
+        k = self.k_factor_lookup.step(self.innerRadius / self.thickness)
 
         return k if KFACTORSTANDARD == "ansi" else k / 2
 
@@ -468,11 +482,13 @@ class SheetTree(object):
         self.cFaceTol = 0.002  # tolerance to detect counter-face vertices
         # this high tolerance was needed for more real parts
         self.root = None  # make_new_face_node adds the root node if parent_node == None
+        self.nodes = {}  # face index -> node of the tree, kept up by make_new_face_node
         self.__Shape = TheShape.copy()
         self.obj = obj
         self.error_code = None
         self.failed_face_idx = None
-        self.k_factor_lookup = k_factor_lookup
+        # compiled once here instead of on every k-factor lookup of a bend
+        self.k_factor_lookup = KFactorTable.from_dict(k_factor_lookup)
         self.wire_replacements = []  # list of wires to be replaced during unfold shape creation
 
         if not self.__Shape.isValid():
@@ -519,7 +535,7 @@ class SheetTree(object):
 
         # Make a first estimate of the thickness
         estimated_thickness = theVol / (self.__Shape.Area / 2.0)
-        debug_print("approximate Thickness: " + str(estimated_thickness))
+        debug_print("approximate Thickness: %s", estimated_thickness)
         # Measure the real thickness of the initial face:
         # Use Orientation and Axis to make a measurement vector
 
@@ -530,8 +546,8 @@ class SheetTree(object):
         # print 'the object is a face! vertices: ', len(self.__Shape.Faces[f_idx].Vertexes)
         F_type = self.__Shape.Faces[f_idx].Surface
         # FIXME: through an error, if not Plane Object
-        debug_print("It is a: " + str(F_type))
-        debug_print("Orientation: " + str(self.__Shape.Faces[f_idx].Orientation))
+        debug_print("It is a: %s", F_type)
+        debug_print("Orientation: %s", self.__Shape.Faces[f_idx].Orientation)
 
         # Need a point on the surface to measure the thickness.
         # Sheet edges could be sloping, so there is a danger to measure
@@ -542,7 +558,7 @@ class SheetTree(object):
             # m_vec = m_vec.add(Base.Vector(Vvec.X, Vvec.Y, Vvec.Z))
             m_vec = m_vec.add(Vvec.Point)
         mvec = m_vec.multiply(1.0 / len(self.__Shape.Faces[f_idx].Vertexes))
-        debug_print("mvec: " + str(mvec))
+        debug_print("mvec: %s", mvec)
 
         # if hasattr(self.__Shape.Faces[f_idx].Surface,'Position'):
         # s_Posi = self.__Shape.Faces[f_idx].Surface.Position
@@ -587,7 +603,7 @@ class SheetTree(object):
         lostShape = self.__Shape.copy()
         lLine = Meassure_axis.common(lostShape)
         lLine = Meassure_axis.common(self.__Shape)
-        debug_print("lLine number edges: " + str(len(lLine.Edges)))
+        debug_print("lLine number edges: %s", len(lLine.Edges))
         measVert = Part.Vertex(measure_pos)
         for mEdge in lLine.Edges:
             if equal_vertex(mEdge.Vertexes[0], measVert) or equal_vertex(
@@ -602,10 +618,9 @@ class SheetTree(object):
             self.error_code = 3
             self.failed_face_idx = f_idx
             warn_print(
-                "estimated thickness: "
-                + str(estimated_thickness)
-                + " measured thickness: "
-                + str(self.__thickness)
+                "estimated thickness: %s measured thickness: %s",
+                estimated_thickness,
+                self.__thickness,
             )
             Part.show(lLine, "Measurement_Thickness_trial")
 
@@ -671,7 +686,7 @@ class SheetTree(object):
                                                 )
                                                 # self.index_list.remove(i) # remove this face from the index_list
                                                 # Part.show(self.f_list[i])
-        debug_print("found_indices: " + str(found_indices))
+        debug_print("found_indices: %s", found_indices)
 
     def is_sheet_edge_face(self, ise_edge, tree_node):  # ise_edge: IsSheetEdge_edge
         # Idea: look at properties of neighbor face
@@ -910,7 +925,7 @@ class SheetTree(object):
 
         if F_type == "<Cylinder object>":
             ePar = theEdge.parameterAt(theEdge.Vertexes[eIdx])
-            debug_print("Idx: " + str(eIdx) + " ePar: " + str(ePar))
+            debug_print("Idx: %s ePar: %s", eIdx, ePar)
             otherPar = theEdge.parameterAt(theEdge.Vertexes[otherIdx])
             tan_vec = theEdge.tangentAt(ePar)
             if ePar < otherPar:
@@ -1057,11 +1072,10 @@ class SheetTree(object):
         newNode.innerRadius = innerRadius
 
         debug_print(
-            newNode.bend_dir
-            + " Face"
-            + str(newNode.idx + 1)
-            + " k-factor: "
-            + str(newNode.k_Factor)
+            "%s Face%s k-factor: %s",
+            newNode.bend_dir,
+            newNode.idx + 1,
+            newNode.k_Factor,
         )
         newNode._trans_length = (
             innerRadius + newNode.k_Factor * self.__thickness
@@ -1150,7 +1164,7 @@ class SheetTree(object):
                                 self.__Shape.Faces[face_idx]
                             )[0]
                             if math.isclose(distance, self.__thickness):
-                                debug_print("found counter-face" + str(i + 1))
+                                debug_print("found counter-face%s", i + 1)
                                 counterFaceList.append([i, distance])
                                 gotCFace = True
                             else:
@@ -1172,16 +1186,15 @@ class SheetTree(object):
                             if (
                                 counterDistance < 2 * self.__thickness
                             ):  # FIXME: small stripes are a risk!
-                                debug_print("found counter-face" + str(i + 1))
+                                debug_print("found counter-face%s", i + 1)
                                 counterFaceList.append([i, counterDistance])
                                 gotCFace = True
                             else:
                                 counter_found = False
                                 debug_print(
-                                    "faceMiddle: "
-                                    + str(faceMiddle)
-                                    + " counterMiddle: "
-                                    + str(counterMiddle)
+                                    "faceMiddle: %s counterMiddle: %s",
+                                    faceMiddle,
+                                    counterMiddle,
                                 )
                     else:
                         # need a mean point of the face to avoid false counter faces
@@ -1200,16 +1213,15 @@ class SheetTree(object):
                         if (
                             counterDistance < 2 * self.__thickness
                         ):  # FIXME: small stripes are a risk!
-                            debug_print("found counter-face" + str(i + 1))
+                            debug_print("found counter-face%s", i + 1)
                             counterFaceList.append([i, counterDistance])
                             gotCFace = True
                         else:
                             counter_found = False
                             debug_print(
-                                "faceMiddle: "
-                                + str(faceMiddle)
-                                + " counterMiddle: "
-                                + str(counterMiddle)
+                                "faceMiddle: %s counterMiddle: %s",
+                                faceMiddle,
+                                counterMiddle,
                             )
 
             if gotCFace:
@@ -1328,7 +1340,7 @@ class SheetTree(object):
             newNode.axis = s_Axis
             newNode.bendCenter = s_Center
             edge_vec = P_edge.Vertexes[0].copy().Point
-            debug_print("edge_vec: " + str(edge_vec))
+            debug_print("edge_vec: %s", edge_vec)
 
             if P_node.node_type == "Flat":
                 dist_c = edge_vec.distanceToPlane(
@@ -1361,12 +1373,10 @@ class SheetTree(object):
             newNode.distCenter = thick_test
             # print "Face idx: ", face_idx, " bend_dir: ", newNode.bend_dir
             debug_print(
-                "Face"
-                + str(face_idx + 1)
-                + " Type: "
-                + str(newNode.node_type)
-                + " bend_dir: "
-                + str(newNode.bend_dir)
+                "Face%s Type: %s bend_dir: %s",
+                face_idx + 1,
+                newNode.node_type,
+                newNode.bend_dir,
             )
 
             # calculate mean point of face:
@@ -1397,10 +1407,7 @@ class SheetTree(object):
                 newNode.error_code = 13  # Analysis: counter face not found
                 self.error_code = 13
                 self.failed_face_idx = face_idx
-                warn_print(
-                    "No opposite face Debugging Thickness: "
-                    + str(self.__thickness)
-                )
+                warn_print("No opposite face Debugging Thickness: %s", self.__thickness)
                 Part.show(
                     self.__Shape.Faces[face_idx], "FailedFace" + str(face_idx + 1) + "_"
                 )
@@ -1488,7 +1495,7 @@ class SheetTree(object):
             newNode.error_code = 13  # Analysis: counter face not found
             self.error_code = 13
             self.failed_face_idx = face_idx
-            warn_print("No counter-face Debugging Thickness: " + str(self.__thickness))
+            warn_print("No counter-face Debugging Thickness: %s", self.__thickness)
             Part.show(
                 self.__Shape.Faces[face_idx], "FailedFace" + str(face_idx + 1) + "_"
             )
@@ -1502,6 +1509,7 @@ class SheetTree(object):
             self.root = newNode
         else:
             P_node.child_list.append(newNode)
+        self.nodes[face_idx] = newNode
         return newNode
 
     def Bend_analysis(self, face_idx, parent_node=None, parent_edge=None):
@@ -1528,13 +1536,13 @@ class SheetTree(object):
                         # edge_list.append(n_edge)
                         wires_edge_lists[wire_idx].append(n_edge)
             if parent_node:
-                debug_print(" Parent Face" + str(parent_node.idx + 1))
-            debug_print("The list: " + str(self.index_list))
+                debug_print(" Parent Face%s", parent_node.idx + 1)
+            debug_print("The list: %s", self.index_list)
             parent_node = self.make_new_face_node(
                 face_idx, parent_node, parent_edge, wires_edge_lists
             )
             # Need also the edge_list in the node!
-            debug_print("The list after make_new_face_node: " + str(self.index_list))
+            debug_print("The list after make_new_face_node: %s", self.index_list)
 
             # in the new code, only the list of child faces will be analyzed.
             removalList = []
@@ -1561,19 +1569,19 @@ class SheetTree(object):
                         else:
                             self.Bend_analysis(child_face_idx, parent_node, edge)
                 else:
-                    debug_print("remove child from List: " + str(child_info[0]))
+                    debug_print("remove child from List: %s", child_info[0])
                     parent_node.seam_edges.append(
                         child_info[1]
                     )  # give Information to the node, that it has a seam.
-                    debug_print("node faces before: " + str(parent_node.nfIndexes))
+                    debug_print("node faces before: %s", parent_node.nfIndexes)
                     # do not make Faces at a detected seam!
                     # self.makeSeamFace(child_info[1], t_node)
                     removalList.append(child_info)
-                    debug_print("node faces with seam: " + str(parent_node.nfIndexes))
-                    otherSeamNode = self.searchNode(child_info[0], self.root)
+                    debug_print("node faces with seam: %s", parent_node.nfIndexes)
+                    otherSeamNode = self.searchNode(child_info[0])
                     debug_print(
-                        "counterface on otherSeamNode: Face"
-                        + str(otherSeamNode.c_face_idx + 1)
+                        "counterface on otherSeamNode: Face%s",
+                        otherSeamNode.c_face_idx + 1,
                     )
                     # do not make Faces at a detected seam!
                     # self.makeSeamFace(child_info[1], otherSeamNode)
@@ -2040,35 +2048,9 @@ class SheetTree(object):
 
         return None
 
-    def searchNode(self, theIdx, sNode):
-        # search for a Node with theIdx in sNode.idx
-        debug_print("my Idx: " + str(sNode.idx))
-
-        if sNode.idx == theIdx:
-            return sNode
-        else:
-            result = None
-            childFaces = []
-            for n_node in sNode.child_list:
-                childFaces.append(n_node.idx)
-            debug_print("my children: " + str(childFaces))
-
-            for n_node in sNode.child_list:
-                nextSearch = self.searchNode(theIdx, n_node)
-                if nextSearch is not None:
-                    result = nextSearch
-                    break
-        if result is not None:
-            debug_print("This is the result: " + str(result.idx))
-        else:
-            debug_print("This is the result: None")
-
-        return result
-
-        # suche bei mir. wenn ja liefere ab
-        # sonst sind Kinder da?
-        # Wenn Kinder vorhanden, frag solange Kinder bis gefunden
-        # oder kein Kind mehr da.
+    def searchNode(self, theIdx):
+        # the node with theIdx as its top face, or None if it isn't in the tree
+        return self.nodes.get(theIdx)
 
     def rotateVec(self, vec, phi, rAxis):
         """rotate a vector by the angle phi around the axis rAxis"""
@@ -2217,12 +2199,10 @@ class SheetTree(object):
                 if "<Ellipse object>" in eType:
                     minPar, maxPar = fEdge.ParameterRange
                     debug_print(
-                        "the Parameterrange: "
-                        + str(minPar)
-                        + " to "
-                        + str(maxPar)
-                        + " Type: "
-                        + str(eType)
+                        "the Parameterrange: %s to %s Type: %s",
+                        minPar,
+                        maxPar,
+                        eType,
                     )
 
                     # compare minimal 1/curvature with curve-lenght to decide on division
@@ -2269,7 +2249,7 @@ class SheetTree(object):
                 elif (
                     "Circle" in eType
                 ):  # FIXME need to check if circle ends are at different radii!
-                    debug_print("j: " + str(j) + " eType: " + str(eType))
+                    debug_print("j: %s eType: %s", j, eType)
                     parList = fEdge.ParameterRange
                     # print "the Parameterrange: ", parList[0], " , ", parList[1], " Type: ",eType
                     # axis_line = Part.makeLine(cent, cent + axis)
@@ -2354,10 +2334,9 @@ class SheetTree(object):
                 else:
                     # print 'unbendFace, curve type not handled: ' + str(eType) + ' in Face' + str(fIdx+1)
                     debug_print(
-                        "unbendFace, curve type not handled: "
-                        + str(eType)
-                        + " in Face"
-                        + str(fIdx + 1)
+                        "unbendFace, curve type not handled: %s in Face%s",
+                        eType,
+                        fIdx + 1,
                     )
                     self.error_code = 26
                     self.failed_face_idx = fIdx
@@ -2386,7 +2365,7 @@ class SheetTree(object):
         if len(edgeLists) == 1:
             eList = Part.__sortEdges__(edgeLists[0])
             myWire = Part.Wire(eList)
-            debug_print("len eList: " + str(len(eList)))
+            debug_print("len eList: %s", len(eList))
             # Part.show(myWire, 'Wire_Face'+str(fIdx+1)+'_' )
             if (len(myWire.Vertexes) == 2) and (len(myWire.Edges) == 3):
                 # print 'got sweep condition!'
@@ -2404,12 +2383,10 @@ class SheetTree(object):
                 except:
                     exc_type, exc_obj, exc_tb = sys.exc_info()
                     warn_print(
-                        "got exception at Face: "
-                        + str(fIdx + 1)
-                        + " len eList: "
-                        + str(len(eList))
-                        + " at line "
-                        + str(exc_tb.tb_lineno)
+                        "got exception at Face: %s len eList: %s at line %s",
+                        fIdx + 1,
+                        len(eList),
+                        exc_tb.tb_lineno,
                     )
                     # for w in eList:
                     # Part.show(w, 'exceptEdge')
@@ -2420,7 +2397,7 @@ class SheetTree(object):
                     theFace = Part.makeFilledFace(thirdWireList)
                 # Part.show(theFace, 'theFace'+ str(bend_node.idx+1)+'_')
         else:
-            debug_print("len edgeLists: " + str(len(edgeLists)))
+            debug_print("len edgeLists: %s", len(edgeLists))
             faces = []
             wires = []
             wireNumber = 0
@@ -2478,48 +2455,53 @@ class SheetTree(object):
           a new sorted list of indexes to edges of the original wire
           flag if wire is closed or not (a wire of a cylinder mantle is not closed!)
         """
-        eIndex = 0
-        newEdgeList = []
-        idxList = list(range(len(myEdgeList)))
-        newIdxList = [eIndex]
-        newEdgeList.append(myEdgeList[eIndex])
-        idxList.remove(eIndex)
-        gotConnection = False
+        # the edge ends hashed by vertex_cell, so every step only compares
+        # the vertices in the cells around the current vertex
+        cells = {}
+        for eIdx, edge in enumerate(myEdgeList):
+            for end, edgeVert in enumerate(edge.Vertexes[:2]):
+                cells.setdefault(vertex_cell(edgeVert), []).append((eIdx, end))
+        unsorted = set(range(1, len(myEdgeList)))
+
+        def next_edge(vert):
+            # the lowest unsorted edge index with an end at vert, preferring
+            # its first vertex, as the linear search over the edges did
+            x, y, z = vertex_cell(vert)
+            found = None
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        for eIdx, end in cells.get((x + dx, y + dy, z + dz), ()):
+                            if (
+                                eIdx in unsorted
+                                and (found is None or (eIdx, end) < found)
+                                and equal_vertex(vert, myEdgeList[eIdx].Vertexes[end])
+                            ):
+                                found = (eIdx, end)
+            return found
+
+        newIdxList = [0]
         closedWire = False
-
-        startVert = myEdgeList[eIndex].Vertexes[0]
-        if len(myEdgeList[eIndex].Vertexes) > 1:
-            vert = myEdgeList[eIndex].Vertexes[1]
+        startVert = myEdgeList[0].Vertexes[0]
+        if len(myEdgeList[0].Vertexes) > 1:
+            vert = myEdgeList[0].Vertexes[1]
         else:
-            vert = myEdgeList[eIndex].Vertexes[0]
-        # Part.show(myEdgeList[0], 'tolEdge'+str(1)+'_')
-        while not gotConnection:
-            for eIdx in idxList:
+            vert = myEdgeList[0].Vertexes[0]
+        while True:
+            found = next_edge(vert)
+            if found is not None:
+                eIdx, end = found
+                unsorted.remove(eIdx)
+                newIdxList.append(eIdx)
                 edge = myEdgeList[eIdx]
-                if equal_vertex(vert, edge.Vertexes[0]):
-                    idxList.remove(eIdx)
-                    eIndex = eIdx
-                    # print 'found eIdx: ', eIdx
-                    newIdxList.append(eIdx)
-                    if len(edge.Vertexes) > 1:
-                        vert = edge.Vertexes[1]
-                    break
                 if len(edge.Vertexes) > 1:
-                    if equal_vertex(vert, edge.Vertexes[1]):
-                        idxList.remove(eIdx)
-                        eIndex = eIdx
-                        # print 'found eIdx: ', eIdx
-                        newIdxList.append(eIdx)
-                        vert = edge.Vertexes[0]
-                        break
-            if len(idxList) == 0:
-                gotConnection = True
+                    vert = edge.Vertexes[1 - end]
             if equal_vertex(vert, startVert):
-                # print 'got last connection'
-                gotConnection = True
                 closedWire = True
-            # Part.show(myEdgeList[eIdx], 'tolEdge'+str(eIdx+1)+'_')
-        # print 'tolerant wire: ', len(myEdgeList)
+                break
+            if not unsorted or found is None:
+                # found is None on an open chain; this used to loop forever
+                break
         return newIdxList, closedWire
 
     def makeFoldLines(self, bend_node, nullVec):
@@ -2683,7 +2665,7 @@ class SheetTree(object):
         end_idx = 1
 
         search_List = theNode.nfIndexes[:]
-        debug_print("This is the search_List: " + str(search_List))
+        debug_print("This is the search_List: %s", search_List)
         search_List.remove(theNode.idx)
         the_index = None
         next_idx = None
@@ -2708,16 +2690,11 @@ class SheetTree(object):
 
         # find the lastEdge
         last_idx = None
-        debug_print("This is the search_List: " + str(search_List))
+        debug_print("This is the search_List: %s", search_List)
         for i in search_List:
             # Part.show(self.f_list[i])
             for theEdge in self.f_list[i].Edges:
-                debug_print(
-                    "Find last Edge in Face: "
-                    + str(i)
-                    + " at Edge: "
-                    + str(theEdge)
-                )
+                debug_print("Find last Edge in Face: %s at Edge: %s", i, theEdge)
                 if len(theEdge.Vertexes) > 1:
                     if equal_vertex(theEdge.Vertexes[0], startVert):
                         last_idx = 1
@@ -2809,7 +2786,7 @@ class SheetTree(object):
                 # if len(node.seam_edges)>0:
                 #  for seamEdge in node.seam_edges:
                 #    self.makeSeamFace(seamEdge, node)
-        debug_print("ufo finish face" + str(node.idx + 1))
+        debug_print("ufo finish face%s", node.idx + 1)
         return (theShell + nodeShell, theFoldLines + nodeFoldLines)
 
     # Build a copy of the face, replacing any wire that must be replaced
@@ -2865,7 +2842,7 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
     ob_Name = solid.Name
     err_code = 0
 
-    debug_print(f"name: {facename}")
+    debug_print("name: %s", facename)
     f_number = int(facename.lstrip("Face")) - 1
     face = solid.Shape.Faces[f_number]
     normalVect = face.normalAt(0, 0)
@@ -2880,7 +2857,7 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
             f_number, None
         )  # traverses the shape and builds the tree-structure
         endzeit = time.process_time()
-        debug_print("Analytical time: " + str(endzeit - startzeit))
+        debug_print("Analytical time: %s", endzeit - startzeit)
 
         if TheTree.error_code is None:
             # TheTree.showFaces()
@@ -2889,7 +2866,7 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
             )  # traverses the tree-structure
             if TheTree.error_code is None:
                 unfoldTime = time.process_time()
-                debug_print("time to run the unfold: " + str(unfoldTime - endzeit))
+                debug_print("time to run the unfold: %s", unfoldTime - endzeit)
                 folds = Part.Compound(foldLines)
                 # Part.show(folds, 'Fold_Lines')
                 try:
@@ -2904,18 +2881,18 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
                         TheSolid = Part.Solid(newShell)
                         solidTime = time.process_time()
                         debug_print(
-                            "Time to make the solid: "
-                            + str(solidTime - unfoldTime)
+                            "Time to make the solid: %s",
+                            solidTime - unfoldTime,
                         )
                     except:
                         debug_print(
-                            "Couldn't make a solid, show only a shell, Faces in List: "
-                            + str(len(theFaceList))
+                            "Couldn't make a solid, show only a shell, Faces in List: %s",
+                            len(theFaceList),
                         )
                         resPart = newShell
                         # Part.show(newShell)
                         showTime = time.process_time()
-                        debug_print("Show time: " + str(showTime - unfoldTime))
+                        debug_print("Show time: %s", showTime - unfoldTime)
                     else:
                         try:
                             cleanSolid = TheSolid.removeSplitter()
@@ -2927,15 +2904,14 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
                             resPart = TheSolid
                         showTime = time.process_time()
                         debug_print(
-                            "Show time: "
-                            + str(showTime - solidTime)
-                            + " total time: "
-                            + str(showTime - startzeit)
+                            "Show time: %s total time: %s",
+                            showTime - solidTime,
+                            showTime - startzeit,
                         )
 
     if TheTree.error_code is not None:
         if TheTree.error_code == 1:
-            warn_print("Error at Face" + str(TheTree.failed_face_idx + 1))
+            warn_print("Error at Face%s", TheTree.failed_face_idx + 1)
             warn_print("Trying to repeat the unfold process again with the Sewed copied Shape")
             FreeCAD.ActiveDocument.openTransaction("sanitize")
             sewedShape = sew_Shape(solid)
@@ -2956,10 +2932,9 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
             err_code = TheTree.error_code
         else:
             warn_print(
-                "Error "
-                + unfold_error[TheTree.error_code]
-                + " at Face"
-                + str(TheTree.failed_face_idx + 1)
+                "Error %s at Face%s",
+                unfold_error[TheTree.error_code],
+                TheTree.failed_face_idx + 1,
             )
     else:
         debug_print("Unfold successful")
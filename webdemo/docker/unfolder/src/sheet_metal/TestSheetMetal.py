@@ -24,4 +24,5 @@
 import TestApp
 
 from SMTests.testFolder import TestFolder
-from SMTests.testKfactor import TestKFactor
+from SMTests.testKfactor import TestKFactor, TestKFactorTable
+from SMTests.testNewUnfolder import TestNewUnfolder
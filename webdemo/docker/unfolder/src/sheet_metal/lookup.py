@@ -23,44 +23,163 @@
 #
 ###################################################################################
 
-import collections
+import csv
+import json
+import os
+from bisect import bisect_left
+
+
+class KFactorTable:
+    """A table of k-factors by radius/thickness ratio, compiled once for
+    lookups.
+
+    The radius/thickness keys must be strictly increasing. Lookups bisect the
+    keys, so they take O(log n) time and don't allocate. Values outside the
+    table are clamped to its first or last k-factor. k_factor_standard is
+    "ansi" or "din"; converting between them is up to the caller.
+    """
+
+    __slots__ = ("keys", "values", "k_factor_standard")
+
+    def __init__(self, keys, values, k_factor_standard="ansi"):
+        keys = [float(k) for k in keys]
+        values = [float(v) for v in values]
+        if not keys:
+            raise ValueError("K-factor table is empty")
+        if len(keys) != len(values):
+            raise ValueError(
+                "K-factor table has %i radius/thickness values but %i k-factors"
+                % (len(keys), len(values))
+            )
+        for previous, key in zip(keys, keys[1:]):
+            if key <= previous:
+                raise ValueError(
+                    "Radius/thickness values of a k-factor table must be strictly "
+                    "increasing (%g follows %g)" % (key, previous)
+                )
+        k_factor_standard = k_factor_standard.lower()
+        if k_factor_standard not in ("ansi", "din"):
+            raise ValueError("Invalid K-factor standard: %s" % k_factor_standard)
+        self.keys = keys
+        self.values = values
+        self.k_factor_standard = k_factor_standard
+
+    def __repr__(self):
+        return "KFactorTable(%r, %r, %r)" % (
+            self.keys,
+            self.values,
+            self.k_factor_standard,
+        )
+
+    @classmethod
+    def from_dict(cls, lookup, k_factor_standard="ansi"):
+        """Table from a {radius/thickness: k-factor} dictionary, in any order"""
+        if isinstance(lookup, cls):
+            return lookup
+        items = sorted((float(k), float(v)) for k, v in lookup.items())
+        return cls([k for k, _ in items], [v for _, v in items], k_factor_standard)
+
+    @classmethod
+    def from_json(cls, path):
+        """Table from a JSON material file:
+
+            {"k_factor_standard": "ansi", "rows": [[1, 0.38], [3, 0.43], [99, 0.5]]}
+
+        with [radius/thickness, k-factor] rows."""
+        with open(path) as f:
+            data = json.load(f)
+        try:
+            rows = data["rows"]
+            k_factor_standard = data["k_factor_standard"]
+        except (KeyError, TypeError):
+            raise ValueError(
+                "JSON material file %s needs 'k_factor_standard' and 'rows'" % path
+            )
+        return cls([r[0] for r in rows], [r[1] for r in rows], k_factor_standard)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Table from a CSV material file laid out like a material spreadsheet:
+        a "Radius / Thickness" and a "K-factor (ANSI)" or "K-factor (DIN)"
+        header, then one row per radius/thickness value."""
+        with open(path, newline="") as f:
+            rows = [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+        if not rows or len(rows[0]) < 2:
+            raise ValueError("CSV material file %s has no header row" % path)
+        if normalize_header(rows[0][0], "' ") != "radius/thickness":
+            raise ValueError(
+                'The first column of CSV material file %s must be "Radius / Thickness"'
+                % path
+            )
+        k_factor_standard = k_factor_standard_from_header(rows[0][1])
+        if k_factor_standard is None:
+            raise ValueError(
+                'The second column of CSV material file %s must be "K-factor (ANSI)" '
+                'or "K-factor (DIN)"' % path
+            )
+        return cls([r[0] for r in rows[1:]], [r[1] for r in rows[1:]], k_factor_standard)
+
+    @classmethod
+    def from_file(cls, path):
+        """Table from a .json or .csv material file"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".json":
+            return cls.from_json(path)
+        if extension == ".csv":
+            return cls.from_csv(path)
+        raise ValueError("Unsupported material file type: %s" % path)
+
+    def step(self, r_over_t):
+        """The k-factor of the first row whose radius/thickness is at least
+        r_over_t"""
+        i = bisect_left(self.keys, r_over_t)
+        return self.values[min(i, len(self.keys) - 1)]
+
+    def interpolate(self, r_over_t):
+        """The k-factor at r_over_t, linearly interpolated between rows"""
+        keys = self.keys
+        i = bisect_left(keys, r_over_t)
+        if i == 0:
+            return self.values[0]
+        if i == len(keys):
+            return self.values[-1]
+        rt1, rt2 = keys[i - 1], keys[i]
+        kf1, kf2 = self.values[i - 1], self.values[i]
+        return kf1 + (kf2 - kf1) * ((r_over_t - rt1) / (rt2 - rt1))
+
+
+def normalize_header(text, ignored):
+    return "".join(c for c in str(text) if c not in ignored).lower()
+
+
+def k_factor_standard_from_header(text):
+    """ "ansi" or "din" for a "K-factor (ANSI)" / "K-factor (DIN)" header,
+    otherwise None"""
+    header = normalize_header(text, "' -()")
+    if header == "kfactoransi":
+        return "ansi"
+    if header == "kfactordin":
+        return "din"
+    return None
 
 
 def get_val_from_range(lookup, input, interpolate=False):
     """
-    lookup: dictionary
+    lookup: dictionary or KFactorTable
     input: float
 
     For working principle, see below tests
     """
-    lookup_sorted = collections.OrderedDict(
-        sorted(lookup.items(), key=lambda t: float(t[0]))
-    )
-    val = None
-    prev_val = None
-    prev_key = None
+    table = KFactorTable.from_dict(lookup)
     input = float(input)
-    for _range in lookup_sorted:
-        val = float(lookup_sorted[_range])
-        if input > float(_range):
-            prev_val = val
-            prev_key = float(_range)
-            continue
-
-        if interpolate:
-            # Do the interpolation here
-            if prev_key is not None:
-                key = float(_range)
-                # print "interpolate for input: ", input, ": ", prev_key, "to ", key, "->", prev_val, val
-                input_offset_percentage = (input - prev_key) / (key - prev_key)
-                val_diff = val - prev_val
-                val_offset = val_diff * input_offset_percentage
-                interpolated_val = prev_val + val_offset
-                round_2 = lambda a: int((a * 100) + 0.5) / 100.0
-                val = round_2(interpolated_val)
-                # print "...interpolated to: ", val, interpolated_val
-        break
-    return val
+    if not interpolate:
+        return table.step(input)
+    i = bisect_left(table.keys, input)
+    if i == 0 or i == len(table.keys):
+        # clamped to the first or last value, as is
+        return table.interpolate(input)
+    round_2 = lambda a: int((a * 100) + 0.5) / 100.0
+    return round_2(table.interpolate(input))
 
 
 mytable = {1: 0.25, 1.1: 0.28, 3: 0.33, 5: 0.42, 7: 0.5}
@@ -0,0 +1,97 @@
+"""Write unfolded sheet metal geometry straight to DXF with ezdxf.
+
+SheetMetalNewUnfolder.getFlatPattern already lays the flat pattern in the
+XY plane and reduces it to lines and circular arcs, so it is written out
+entity by entity. This replaces exporting a Part feature through importDXF,
+which needs the Draft workbench, and then re-orienting the file with
+orientdxf.
+
+Edges are duck typed (Curve.TypeId, Curve.Center, Curve.Radius, Length,
+ParameterRange, valueAt and the first/last vertex points), so this module
+does not import FreeCAD.
+"""
+
+import math
+
+import ezdxf
+
+PROFILE_LAYER = '0'
+BEND_LAYER = 'BEND'
+
+# Written as R12, the version importDXF produced, which every CAM tool reads
+DXF_VERSION = 'R12'
+
+def _angle(center, point):
+    return math.degrees(math.atan2(point[1] - center[1], point[0] - center[0])) % 360
+
+def arc_through(center, radius, start, middle, end):
+    """DXF arc from start through middle to end.
+
+    DXF arcs always run counter-clockwise, so a clockwise arc is written
+    from its end point instead.
+    """
+    start_angle = _angle(center, start)
+    end_angle = _angle(center, end)
+    if (_angle(center, middle) - start_angle) % 360 > (end_angle - start_angle) % 360:
+        start_angle, end_angle = end_angle, start_angle
+    return ('arc', center, radius, start_angle, end_angle)
+
+def edge_to_entity(edge, tolerance=1e-6):
+    """Describe a line or circle edge in the XY plane as a tuple:
+
+        ('line', start, end)
+        ('circle', center, radius)
+        ('arc', center, radius, start_angle, end_angle)
+
+    with (x, y) points and angles in degrees. Raises ValueError for other
+    curve types.
+    """
+    type_id = edge.Curve.TypeId
+    first = edge.firstVertex().Point
+    last = edge.lastVertex().Point
+    start = (first.x, first.y)
+    end = (last.x, last.y)
+    if type_id == 'Part::GeomLine':
+        return ('line', start, end)
+    if type_id == 'Part::GeomCircle':
+        center = (edge.Curve.Center.x, edge.Curve.Center.y)
+        radius = edge.Curve.Radius
+        if math.dist(start, end) < tolerance and edge.Length > math.pi * radius:
+            return ('circle', center, radius)
+        pmin, pmax = edge.ParameterRange
+        mid = edge.valueAt((pmin + pmax) / 2)
+        return arc_through(center, radius, start, (mid.x, mid.y), end)
+    raise ValueError(f"Can't write curve type {type_id} to DXF")
+
+def add_entity(msp, entity, layer=PROFILE_LAYER):
+    kind = entity[0]
+    attribs = {'layer': layer}
+    if kind == 'line':
+        msp.add_line(entity[1], entity[2], dxfattribs=attribs)
+    elif kind == 'circle':
+        msp.add_circle(entity[1], entity[2], dxfattribs=attribs)
+    elif kind == 'arc':
+        msp.add_arc(entity[1], entity[2], entity[3], entity[4], dxfattribs=attribs)
+    else:
+        raise ValueError(f"Unknown entity kind: {kind}")
+
+def write_dxf(path, profile, bend_lines=()):
+    """Write entity tuples to a DXF file: the profile on layer 0, bend lines on BEND"""
+    doc = ezdxf.new(DXF_VERSION)
+    msp = doc.modelspace()
+    for entity in profile:
+        add_entity(msp, entity)
+    if bend_lines:
+        doc.layers.add(BEND_LAYER, color=1)
+        for entity in bend_lines:
+            add_entity(msp, entity, BEND_LAYER)
+    doc.saveas(path)
+    return path
+
+def write_flat_pattern(path, edges, bend_edges=()):
+    """Write the edges of a flat pattern (and optionally its bend lines) to DXF"""
+    return write_dxf(
+        path,
+        [edge_to_entity(edge) for edge in edges],
+        [edge_to_entity(edge) for edge in bend_edges]
+    )
@@ -0,0 +1,210 @@
+"""Fallback chain between the unfold engines, under one deadline.
+
+unfold_with_fallback tries, in order, until one attempt gives a flat pattern:
+
+1. the new unfolder (SheetMetalNewUnfolder) from the requested root face
+2. the new unfolder from other root faces: planar faces, largest first
+3. the legacy unfolder (SheetMetalUnfolder) from the requested root face
+4. the legacy unfolder on a sewn copy of the shape, which is what the
+   legacy getUnfold does by itself after a failure
+
+Every attempt runs in the same FreeCAD session on the shape loaded once, in
+its own coordinate system, and the new unfolder's attempts share one
+ShapeTopology and one graph of tangent faces, built by the first attempt that
+needs it. So a part the new unfolder rejects costs one more attempt
+instead of another request and another FreeCAD boot.
+
+The deadline is checked before every attempt but the first; a running
+attempt is not interrupted (the worker pool's UNFOLD_JOB_TIMEOUT still
+bounds it), so the default stays below that timeout.
+
+    UNFOLD_DEADLINE            seconds for all attempts of an unfold (default 90)
+    UNFOLD_ALTERNATIVE_FACES   other root faces the new unfolder tries (default 3)
+"""
+
+import os
+import time
+
+import Part
+import SheetMetalNewUnfolder
+
+DEFAULT_DEADLINE = float(os.environ.get("UNFOLD_DEADLINE", 90))
+ALTERNATIVE_FACES = int(os.environ.get("UNFOLD_ALTERNATIVE_FACES", 3))
+
+# Faces of the legacy unfolder's result closer than this to the root face's
+# plane, and with a normal this close to parallel, are the flat pattern
+PLANE_TOLERANCE = 1e-4
+
+class UnfoldFailed(RuntimeError):
+    """Every attempt of the fallback chain failed or the deadline passed"""
+
+    def __init__(self, attempts, deadline_passed=False):
+        self.attempts = attempts
+        self.deadline_passed = deadline_passed
+        failures = "; ".join(
+            f"{a['engine']} {a['face']}{' (sewn)' if a['sewn'] else ''}: {a['error']}"
+            for a in attempts
+        )
+        reason = "deadline passed" if deadline_passed else "no engine left"
+        super().__init__(
+            f"Unfolding failed after {len(attempts)} attempts ({reason}): {failures}"
+        )
+
+def alternative_root_faces(shape, root_face_index, limit=ALTERNATIVE_FACES):
+    """Indices of the planar faces other than the root face, largest first.
+
+    Only planar faces can be root faces; the larger one is more likely to be
+    a main face of the sheet than a sheet edge or a small tab.
+    """
+    faces = shape.Faces
+    planar = [
+        i for i, face in enumerate(faces)
+        if i != root_face_index and face.Surface.TypeId == "Part::GeomPlane"
+    ]
+    planar.sort(key=lambda i: faces[i].Area, reverse=True)
+    return planar[:limit]
+
+def matching_face_index(shape, face):
+    """Index of the face of shape at the place of face, e.g. in a sewn copy
+    whose faces are numbered differently"""
+    center = face.CenterOfMass
+    faces = shape.Faces
+    return min(range(len(faces)), key=lambda i: (faces[i].CenterOfMass - center).Length)
+
+def sewn_copy(shape):
+    """The shape with its faces sewn together again, as SheetMetalUnfolder.sew_Shape"""
+    sewn = shape.copy()
+    sewn.sewShape()
+    return Part.Solid(sewn)
+
+def new_flat_pattern(shape, root_face_index, bac, with_bend_lines, metrics, topology,
+                     blank_check=True, tangent_faces=None):
+    """Flat pattern from the new unfolder, laying blanks flat directly when
+    blank_check is set. tangent_faces, if given, is called for the graph of
+    all tangent faces of shape, only once a blank has been ruled out."""
+    if blank_check:
+        flat = SheetMetalNewUnfolder.flat_plate_pattern(shape, root_face_index, metrics)
+        if flat is not None:
+            return flat
+    analysis = SheetMetalNewUnfolder.UnfoldAnalysis(
+        shape, root_face_index, topology, metrics, tangent_faces() if tangent_faces else None
+    )
+    return analysis.flat_pattern(bac, with_bend_lines)
+
+def legacy_flat_pattern(shape, root_face_index, bac, with_bend_lines, metrics):
+    """Unfold with SheetMetalUnfolder's SheetTree, as its getUnfold does, and
+    take the face of the unfolded solid in the root face's plane.
+
+    The legacy unfolder picks k-factors from a table by step instead of
+    interpolating, so k-factor tables may give slightly different results.
+    """
+    import SheetMetalUnfolder
+
+    table = bac.k_factor_table
+    SheetMetalUnfolder.KFACTORSTANDARD = table.k_factor_standard
+    with metrics.phase("legacy_analysis"):
+        tree = SheetMetalUnfolder.SheetTree(shape, root_face_index, table, None)
+        if tree.error_code is None:
+            tree.Bend_analysis(root_face_index, None)
+    if tree.error_code is None:
+        with metrics.phase("legacy_unfold"):
+            faces, fold_lines = tree.unfold_tree2(tree.root)
+    if tree.error_code is not None:
+        error = SheetMetalUnfolder.unfold_error.get(tree.error_code, "Unknown error")
+        raise RuntimeError(f"{error} at Face{tree.failed_face_idx + 1}")
+    with metrics.phase("legacy_solid"):
+        solid = Part.Solid(Part.Shell(faces)).removeSplitter()
+
+    root_face = shape.Faces[root_face_index]
+    normal = root_face.normalAt(0, 0)
+    origin = root_face.Vertexes[0].Point
+    in_plane = [
+        face for face in solid.Faces
+        if face.Surface.TypeId == "Part::GeomPlane"
+        and abs(abs(face.normalAt(0, 0).dot(normal)) - 1) < PLANE_TOLERANCE
+        and abs((face.Vertexes[0].Point - origin).dot(normal)) < PLANE_TOLERANCE
+    ]
+    if not in_plane:
+        raise RuntimeError("The unfolded solid has no face in the root face's plane")
+    flat_face = max(in_plane, key=lambda face: face.Area)
+    thickness = solid.Volume / flat_face.Area
+    bend_lines = Part.makeCompound(fold_lines) if with_bend_lines else None
+    return SheetMetalNewUnfolder.flat_pattern_from_face(
+        root_face, flat_face, thickness, bend_lines, metrics
+    )
+
+def unfold_with_fallback(bac, solid, facename, with_bend_lines=True, metrics=None,
+                         deadline=None):
+    """Flat pattern of a sheet metal object, from the first attempt of the
+    fallback chain that succeeds within deadline seconds (default
+    UNFOLD_DEADLINE).
+
+    Returns (flat pattern, attempts) with one {"engine", "face", "sewn",
+    "elapsed_s"} entry per attempt, and an "error" on the failed ones.
+    Raises UnfoldFailed when no attempt succeeded.
+    """
+    if metrics is None:
+        metrics = SheetMetalNewUnfolder.NoMetrics()
+    end = time.monotonic() + (DEFAULT_DEADLINE if deadline is None else deadline)
+    shape, root_face_index = SheetMetalNewUnfolder.shape_in_own_frame(solid, facename)
+    topology = SheetMetalNewUnfolder.ShapeTopology(shape)
+    tangent_faces = []
+
+    def all_tangent_faces():
+        # built on first use: a blank laid flat by the first attempt needs none
+        if not tangent_faces:
+            with metrics.phase("face_graph"):
+                tangent_faces.append(
+                    SheetMetalNewUnfolder.build_graph_of_all_tangent_faces(shape, topology)
+                )
+        return tangent_faces[0]
+
+    def new_engine(face_index):
+        # A blank is laid flat from the requested root face already; from
+        # another face, e.g. the end face of a bent part, the blank check
+        # could only take a sheet edge for a blank
+        blank_check = face_index == root_face_index
+        return lambda: new_flat_pattern(shape, face_index, bac, with_bend_lines, metrics, topology,
+                                        blank_check, all_tangent_faces)
+
+    def legacy_engine(sewn):
+        def run():
+            if not sewn:
+                return legacy_flat_pattern(shape, root_face_index, bac, with_bend_lines, metrics)
+            sewn_shape = sewn_copy(shape)
+            face_index = matching_face_index(sewn_shape, shape.Faces[root_face_index])
+            return legacy_flat_pattern(sewn_shape, face_index, bac, with_bend_lines, metrics)
+        return run
+
+    chain = [("new", root_face_index, False, new_engine(root_face_index))]
+    chain += [
+        ("new", face_index, False, new_engine(face_index))
+        for face_index in alternative_root_faces(shape, root_face_index)
+    ]
+    chain += [
+        ("legacy", root_face_index, False, legacy_engine(False)),
+        ("legacy", root_face_index, True, legacy_engine(True)),
+    ]
+
+    attempts = []
+    deadline_passed = False
+    for engine, face_index, sewn, attempt in chain:
+        # the first attempt always runs
+        if attempts and time.monotonic() >= end:
+            print(f"Unfold deadline passed after {len(attempts)} attempts")
+            deadline_passed = True
+            break
+        entry = {"engine": engine, "face": f"Face{face_index + 1}", "sewn": sewn}
+        attempts.append(entry)
+        metrics.count("unfold_attempts")
+        start = time.perf_counter()
+        try:
+            flat = attempt()
+        except Exception as e:
+            print(f"Unfold attempt {engine} {entry['face']} failed: {e}")
+            entry["error"] = f"{type(e).__name__}: {e}"
+            continue
+        finally:
+            entry["elapsed_s"] = round(time.perf_counter() - start, 4)
+        return flat, attempts
+    raise UnfoldFailed(attempts, deadline_passed)
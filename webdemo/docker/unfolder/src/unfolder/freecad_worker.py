@@ -0,0 +1,86 @@
+"""Long-lived FreeCAD worker that unfolds STEP files on request.
+
+Started by worker_pool.FreeCADWorkerPool inside `freecadcmd`. FreeCAD, Part,
+ezdxf and SheetMetalNewUnfolder are imported once at startup; after that
+every job only pays for its own geometry work.
+
+Jobs arrive as one JSON object per line on the socket whose file descriptor is
+given in FREECAD_WORKER_FD:
+
+    {"id": 1, "op": "unfold", "args": {"step_path": ..., "k_factor": ..., "output_dir": ...}}
+
+and each gets exactly one reply line:
+
+    {"id": 1, "ok": true, "result": {...}, "elapsed_s": 0.42}
+    {"id": 1, "ok": false, "error": "...", "traceback": "..."}
+
+The worker exits when the socket is closed or on {"op": "shutdown"}.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import socket
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import FreeCAD
+import unfold
+
+OPS = {
+    "unfold": unfold.unfold_step,
+    "unfold_brep": unfold.unfold_brep,
+    "sweep": unfold.sweep_step,
+    "split_assembly": unfold.split_assembly,
+}
+
+def close_documents():
+    """Close every open document so no geometry leaks into the next job"""
+    for name in list(FreeCAD.listDocuments()):
+        FreeCAD.closeDocument(name)
+    gc.collect()
+
+def run_job(job):
+    start = time.perf_counter()
+    try:
+        result = OPS[job["op"]](**job.get("args", {}))
+        reply = {"id": job.get("id"), "ok": True, "result": result}
+    except Exception as e:
+        reply = {
+            "id": job.get("id"),
+            "ok": False,
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc()
+        }
+    finally:
+        close_documents()
+    reply["elapsed_s"] = round(time.perf_counter() - start, 4)
+    return reply
+
+def serve(connection):
+    reader = connection.makefile("r", encoding="utf-8")
+    writer = connection.makefile("w", encoding="utf-8")
+
+    def send(message):
+        writer.write(json.dumps(message) + "\n")
+        writer.flush()
+
+    send({"ready": True, "pid": os.getpid()})
+    for line in reader:
+        job = json.loads(line)
+        if job.get("op") == "shutdown":
+            break
+        send(run_job(job))
+
+if __name__ == "__main__":
+    connection = socket.socket(fileno=int(os.environ["FREECAD_WORKER_FD"]))
+    try:
+        serve(connection)
+    finally:
+        connection.close()
+    # FreeCAD keeps running after a script unless told to exit
+    sys.stdout.flush()
+    os._exit(0)
@@ -0,0 +1,69 @@
+"""Fingerprints telling copies of a part in an assembly apart from other parts.
+
+Volume, area and the face areas and edge lengths of a solid do not change
+when a hole or cutout moves, so two plates that differ only in where their
+hole is used to hash equal and only one of them was unfolded. The hash also
+covers the distance of every edge's and face's center of mass from the
+solid's center of mass: they move with a hole but not with the part, so they
+are independent of the placement without needing a canonical frame, and they
+cost one pass over the edges and faces. A mirrored copy still hashes equal;
+its flat pattern is the same blank turned over.
+
+Distances are rounded to a tenth of a millimeter, coarser than the lengths
+and areas, so modelling noise rarely lands on a rounding boundary; a feature
+moved by less than that is taken for the same part.
+
+Only reads Volume, Area, CenterOfMass, Faces, Edges and Vertexes, so it does
+not import FreeCAD.
+"""
+
+import hashlib
+import json
+from collections import Counter
+
+import numpy as np
+
+# Decimal places the distances from the center of mass are rounded to
+DISTANCE_PLACES = 1
+
+
+def center_distances(solid, shapes, places=DISTANCE_PLACES):
+    """Sorted distances from the center of mass of each of shapes to the
+    solid's center of mass.
+
+    A circle's center of mass is its center, so a hole is placed by where it
+    is and not by where its seam happens to be.
+    """
+    if not shapes:
+        return []
+    c = solid.CenterOfMass
+    centers = np.array([
+        (s.CenterOfMass.x, s.CenterOfMass.y, s.CenterOfMass.z) for s in shapes
+    ], dtype=float)
+    distances = np.linalg.norm(centers - (c.x, c.y, c.z), axis=1)
+    # adding 0.0 turns -0.0 into 0.0 so equal values serialize equal
+    return (np.sort(np.round(distances, places)) + 0.0).tolist()
+
+
+def face_types(solid):
+    """Sorted (surface type, count) pairs of the solid's faces"""
+    return sorted(Counter(f.Surface.TypeId for f in solid.Faces).items())
+
+
+def geometry_hash(solid, places=3):
+    """Fingerprint of a solid's geometry that ignores where it is placed.
+
+    Copies of a part placed elsewhere in an assembly hash equal, so they are
+    unfolded once; parts with the same faces arranged differently do not.
+    """
+    signature = [
+        round(solid.Volume, places),
+        round(solid.Area, places),
+        len(solid.Faces), len(solid.Edges), len(solid.Vertexes),
+        face_types(solid),
+        sorted(round(f.Area, places) for f in solid.Faces),
+        sorted(round(e.Length, places) for e in solid.Edges),
+        center_distances(solid, solid.Faces),
+        center_distances(solid, solid.Edges),
+    ]
+    return hashlib.sha256(json.dumps(signature).encode("utf-8")).hexdigest()
@@ -0,0 +1,31 @@
+"""Material files a service unfolds with instead of a single k-factor.
+
+A material file is a .json or .csv k-factor table (see lookup.KFactorTable).
+Requests name one of the files in UNFOLD_MATERIAL_DIR; those that name none
+use UNFOLD_MATERIAL, if set. The path is resolved here, before an unfold is
+queued, so the result cache can key on the file that will be used. This
+module does not import FreeCAD.
+
+    UNFOLD_MATERIAL       material file for requests that name none
+    UNFOLD_MATERIAL_DIR   directory of the material files requests may name (default /app/materials)
+"""
+
+import os
+
+MATERIAL_SUFFIXES = ('.json', '.csv')
+
+def material_path(name=None):
+    """Path of the material file named name, or UNFOLD_MATERIAL when name is
+    empty; None when there is neither.
+
+    Raises ValueError when name is not the name of a .json or .csv file in
+    UNFOLD_MATERIAL_DIR.
+    """
+    if not name:
+        return os.environ.get('UNFOLD_MATERIAL') or None
+    if not isinstance(name, str) or os.path.basename(name) != name or not name.endswith(MATERIAL_SUFFIXES):
+        raise ValueError(f"'material' must be the name of a .json or .csv material file, got {name!r}")
+    path = os.path.join(os.environ.get('UNFOLD_MATERIAL_DIR', '/app/materials'), name)
+    if not os.path.isfile(path):
+        raise ValueError(f"Unknown material {name!r}")
+    return path
@@ -0,0 +1,59 @@
+"""Per-phase timings and counts of an unfold.
+
+An UnfoldMetrics is handed down the unfold pipeline, which times each of its
+phases (STEP load, face graph, thickness, unrolling, 2-D cleanup, export, ...)
+and counts what it worked on (faces, edges, bends, splines converted). The
+result comes back with the unfold result and is written next to the DXF as
+unfold_metrics.json, so a slow part can be diagnosed from its sidecar.
+
+SheetMetalNewUnfolder only relies on the phase() and count() methods, and
+uses SheetMetalNewUnfolder.NoMetrics when it is given none.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+METRICS_FILE = 'unfold_metrics.json'
+
+class UnfoldMetrics:
+    def __init__(self):
+        self.phases = {}
+        self.counts = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block; a phase entered again adds to its total"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def as_dict(self):
+        """Phase timings in seconds, in the order the phases first ran, and counts"""
+        return {
+            'total_s': round(time.perf_counter() - self._start, 4),
+            'phases': {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            'counts': dict(self.counts),
+        }
+
+    def write(self, output_dir):
+        """Write the metrics to output_dir/unfold_metrics.json and return its path"""
+        path = os.path.join(output_dir, METRICS_FILE)
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return path
+
+def read_metrics(output_dir):
+    """The metrics an unfold wrote into output_dir, or None if there are none"""
+    try:
+        with open(os.path.join(output_dir, METRICS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -1,104 +1,119 @@
 import ezdxf
 from ezdxf.math import BoundingBox, Vec3, Matrix44
+from itertools import product
 import math
 
-def find_closed_loops(dxf_file_path, tolerance=1e-6):
+# Entity types that take part in loop detection and get re-oriented
+LOOP_TYPES = 'LINE ARC LWPOLYLINE CIRCLE SPLINE'
+
+def arc_points(arc):
+    """Start, end and every axis extreme on the arc, in WCS"""
+    start = arc.dxf.start_angle % 360
+    span = (arc.dxf.end_angle - start) % 360 or 360
+    extremes = [a for a in (0, 90, 180, 270) if (a - start) % 360 < span]
+    return [arc.start_point, arc.end_point, *arc.vertices(extremes)]
+
+def entity_geometry(entity):
+    """(endpoints, points for the bounding box, closed) of a supported entity in WCS.
+
+    Closed entities (circles, closed polylines and splines) form a loop on
+    their own and have no free endpoints.
     """
-    Find closed loops formed by connected arcs and lines.
+    kind = entity.dxftype()
+    if kind == 'LINE':
+        points = [Vec3(entity.dxf.start), Vec3(entity.dxf.end)]
+        return points, points, False
+    if kind == 'ARC':
+        return [entity.start_point, entity.end_point], arc_points(entity), False
+    if kind == 'CIRCLE':
+        return [], list(entity.vertices([0, 90, 180, 270])), True
+    if kind == 'LWPOLYLINE':
+        points = list(entity.vertices_in_wcs())
+        if entity.closed:
+            return [], points, True
+        return [points[0], points[-1]], points, False
+    if kind == 'SPLINE':
+        curve = entity.construction_tool()
+        # A B-spline lies inside the hull of its control points
+        points = list(curve.control_points)
+        if entity.closed:
+            return [], points, True
+        return [curve.point(0), curve.point(curve.max_t)], points, False
+    return None
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            # Path halving keeps the trees flat
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[root_j] = root_i
+
+NEIGHBOR_CELLS = list(product((-1, 0, 1), repeat=3))
+
+def group_loops(msp, tolerance=1e-6):
     """
-    doc = ezdxf.readfile(dxf_file_path)
-    msp = doc.modelspace()
-    
-    # Collect all entities with their endpoints
-    entities_data = []
-    
-    for entity in msp:
-        if entity.dxftype() == 'LINE':
-            start = entity.dxf.start
-            end = entity.dxf.end
-            entities_data.append({
-                'entity': entity,
-                'start': (start.x, start.y, start.z),
-                'end': (end.x, end.y, end.z),
-                'type': 'LINE'
-            })
-        elif entity.dxftype() == 'ARC':
-            center = entity.dxf.center
-            radius = entity.dxf.radius
-            start_angle = entity.dxf.start_angle
-            end_angle = entity.dxf.end_angle
-            
-            # Calculate start and end points of arc
-            start_rad = math.radians(start_angle)
-            end_rad = math.radians(end_angle)
-            
-            start_point = (
-                center.x + radius * math.cos(start_rad),
-                center.y + radius * math.sin(start_rad),
-                center.z
-            )
-            end_point = (
-                center.x + radius * math.cos(end_rad),
-                center.y + radius * math.sin(end_rad),
-                center.z
-            )
-            
-            entities_data.append({
-                'entity': entity,
-                'start': start_point,
-                'end': end_point,
-                'type': 'ARC'
-            })
-    
-    # Simple approach: find entities that share endpoints
-    def points_equal(p1, p2, tol=tolerance):
-        return (abs(p1[0] - p2[0]) < tol and 
-                abs(p1[1] - p2[1]) < tol and 
-                abs(p1[2] - p2[2]) < tol)
-    
-    # Group connected entities
-    connected_groups = []
-    used_entities = set()
-    
-    for i, ent_data in enumerate(entities_data):
-        if i in used_entities:
+    Group the entities of a modelspace into loops of connected entities.
+
+    Endpoints are hashed into a grid of tolerance-sized cells, so each
+    endpoint is compared only with the endpoints in its own and neighbouring
+    cells; union-find joins entities that share an endpoint. Linear in the
+    number of entities.
+    """
+    entities = []
+    endpoints = []
+    bbox_points = []
+    closed = []
+    for entity in msp.query(LOOP_TYPES):
+        geometry = entity_geometry(entity)
+        if geometry is None:
             continue
-            
-        group = [ent_data]
-        used_entities.add(i)
-        
-        # Find connected entities
-        for j, other_ent in enumerate(entities_data):
-            if j in used_entities:
-                continue
-                
-            # Check if entities connect
-            if (points_equal(ent_data['end'], other_ent['start']) or
-                points_equal(ent_data['end'], other_ent['end']) or
-                points_equal(ent_data['start'], other_ent['start']) or
-                points_equal(ent_data['start'], other_ent['end'])):
-                group.append(other_ent)
-                used_entities.add(j)
-        
-        if len(group) > 1:  # Only keep groups with multiple entities
-            connected_groups.append(group)
-    
-    # Calculate bounding box for each group
+        entities.append(entity)
+        endpoints.append(geometry[0])
+        bbox_points.append(geometry[1])
+        closed.append(geometry[2])
+
+    loops = UnionFind(len(entities))
+    grid = {}
+    for i, points in enumerate(endpoints):
+        for point in points:
+            cell = (round(point.x / tolerance), round(point.y / tolerance), round(point.z / tolerance))
+            for dx, dy, dz in NEIGHBOR_CELLS:
+                for j, other in grid.get((cell[0] + dx, cell[1] + dy, cell[2] + dz), ()):
+                    if j != i and point.isclose(other, abs_tol=tolerance):
+                        loops.union(i, j)
+            grid.setdefault(cell, []).append((i, point))
+
+    groups = {}
+    for i in range(len(entities)):
+        groups.setdefault(loops.find(i), []).append(i)
+
     group_bboxes = []
-    for group in connected_groups:
-        all_points = []
-        for ent_data in group:
-            all_points.extend([ent_data['start'], ent_data['end']])
-        
-        bbox = BoundingBox(all_points)
+    for members in groups.values():
+        # A lone open entity is not a loop
+        if len(members) == 1 and not closed[members[0]]:
+            continue
         group_bboxes.append({
-            'bbox': bbox,
-            'entities': [ent_data['entity'] for ent_data in group],
-            'entity_count': len(group)
+            'bbox': BoundingBox(point for i in members for point in bbox_points[i]),
+            'entities': [entities[i] for i in members],
+            'entity_count': len(members)
         })
-    
     return group_bboxes
 
+def find_closed_loops(dxf_file_path, tolerance=1e-6):
+    """
+    Find closed loops formed by connected arcs and lines.
+    """
+    return group_loops(ezdxf.readfile(dxf_file_path).modelspace(), tolerance)
+
 def calculate_rotation_matrix(from_normal, to_normal=(0, 0, 1)):
     """
     Calculate rotation matrix to transform from_normal to to_normal.
@@ -125,12 +140,18 @@ def calculate_rotation_matrix(from_normal, to_normal=(0, 0, 1)):
     
     return Matrix44.axis_rotate(axis, angle)
 
-def transform_entities(input_file, output_file):
+def transform_entities(input_file, output_file, verify=False):
     """
     Transform all entities so the largest face normal becomes (0, 0, 1).
+
+    With verify=True the output is read back and the size of each loop
+    printed, which costs another full parse of the file.
     """
+    doc = ezdxf.readfile(input_file)
+    msp = doc.modelspace()
+
     # Find the largest face normal
-    loops = find_closed_loops(input_file)
+    loops = group_loops(msp)
     
     greatest_normal = None
     greatest_area = 0
@@ -190,35 +211,12 @@ def transform_entities(input_file, output_file):
     transform_matrix = calculate_rotation_matrix(greatest_normal, (0, 0, 1))
     print(f"Transformation matrix calculated.")
     
-    # Load the original document
-    doc = ezdxf.readfile(input_file)
-    msp = doc.modelspace()
-    
-    # Transform all entities
+    # Transform all entities; ezdxf also carries each arc's and circle's
+    # coordinate system along, so tilted arcs end up in the XY plane too
     transformed_count = 0
-    for entity in msp:
-        if entity.dxftype() == 'LINE':
-            # Transform line endpoints
-            start = Vec3(entity.dxf.start)
-            end = Vec3(entity.dxf.end)
-            
-            new_start = transform_matrix.transform(start)
-            new_end = transform_matrix.transform(end)
-            
-            entity.dxf.start = new_start
-            entity.dxf.end = new_end
-            transformed_count += 1
-            
-        elif entity.dxftype() == 'ARC':
-            # Transform arc center and adjust angles if needed
-            center = Vec3(entity.dxf.center)
-            new_center = transform_matrix.transform(center)
-            entity.dxf.center = new_center
-            
-            # Note: For full correctness, we should also transform the arc's 
-            # local coordinate system, but this is more complex and depends
-            # on whether the arc is tilted in 3D space
-            transformed_count += 1
+    for entity in msp.query(LOOP_TYPES):
+        entity.transform(transform_matrix)
+        transformed_count += 1
     
     print(f"Transformed {transformed_count} entities.")
     
@@ -226,6 +224,9 @@ def transform_entities(input_file, output_file):
     doc.saveas(output_file)
     print(f"Saved transformed DXF to: {output_file}")
     
+    if not verify:
+        return
+    
     # Verify the transformation by checking the new largest face normal
     print("\nVerifying transformation:")
     verify_loops = find_closed_loops(output_file)
@@ -0,0 +1,268 @@
+"""On-disk caches of unfold results and imported STEP geometry.
+
+The same STEP files are unfolded again and again. Each entry keeps the flat
+DXF, the unbent STEP model and a metadata file, so a repeated request is
+answered by copying files instead of running FreeCAD.
+
+The key is the SHA-256 of the STEP bytes together with the k-factor, the
+k-factor standard, the SHA-256 of the material file if any, the root face
+strategy, the selected outputs and UNFOLDER_VERSION. Entries are
+evicted least recently used first once the cache grows past its size limit.
+
+Importing STEP is often the slowest part of an unfold, so BrepCache also
+keeps each imported shape in OpenCascade's native .brep format, keyed by the
+STEP digest alone. It is reused when the same part is unfolded with other
+settings, such as a new k-factor.
+
+    UNFOLD_CACHE               set to 0 to disable the result cache
+    UNFOLD_CACHE_DIR           result cache directory (default /tmp/unfold_cache)
+    UNFOLD_CACHE_MAX_MB        result cache size limit in megabytes (default 512)
+    UNFOLD_BREP_CACHE          set to 0 to disable the BREP cache
+    UNFOLD_BREP_CACHE_DIR      BREP cache directory (default /tmp/unfold_brep_cache)
+    UNFOLD_BREP_CACHE_MAX_MB   BREP cache size limit in megabytes (default 1024)
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from unfold_outputs import DEFAULT_OUTPUTS
+
+# Bump whenever a change to the unfolder alters its output, so old entries miss
+UNFOLDER_VERSION = "7"
+
+# Result keys holding output files, and the file name each is stored under
+CACHED_FILES = {
+    'dxf_path': 'largest_face.dxf',
+    'step_path': 'unbend_model.step',
+}
+
+# Result keys that describe one run rather than its output, left out of entries
+RUN_KEYS = ('raw_dxf_path', 'metrics', 'metrics_path', 'attempts')
+
+META_FILE = 'meta.json'
+
+def step_digest(step_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(step_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def evict_lru(entries, max_bytes, remove):
+    """Remove (last used, size, path) entries, oldest first, until they fit max_bytes"""
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        remove(path)
+        total -= size
+
+class UnfoldCache:
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get('UNFOLD_CACHE_DIR', '/tmp/unfold_cache')
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('UNFOLD_CACHE_MAX_MB', 512)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, step_path, k_factor, k_factor_standard='ansi', root_face='largest', outputs=DEFAULT_OUTPUTS,
+            material_path=None):
+        """Cache key of a STEP file unfolded with the given settings"""
+        settings = {
+            'source_sha256': step_digest(step_path),
+            'k_factor': float(k_factor),
+            'k_factor_standard': k_factor_standard,
+            # Edited in place, a material file must not match its old results
+            'material_sha256': step_digest(material_path) if material_path else None,
+            'root_face': root_face,
+            'outputs': outputs,
+            'unfolder_version': UNFOLDER_VERSION,
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key, output_dir):
+        """Copy a cached result into output_dir and return it, or None on a miss"""
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.makedirs(output_dir, exist_ok=True)
+            result = {}
+            for result_key, filename in meta['files'].items():
+                result[result_key] = shutil.copy2(os.path.join(entry_dir, filename), output_dir)
+            # The metadata file's mtime records when the entry was last used
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            # Missing, being evicted, or written by an incompatible version
+            return None
+        return {**meta['result'], **result, 'cached': True}
+
+    def put(self, key, result, metadata=None):
+        """Store the output files of an unfold result under key"""
+        files = {
+            result_key: filename
+            for result_key, filename in CACHED_FILES.items()
+            if result.get(result_key) and os.path.exists(result[result_key])
+        }
+        if 'dxf_path' not in files:
+            # Nothing worth caching
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix='.staging_', dir=self.cache_dir)
+        try:
+            for result_key, filename in files.items():
+                shutil.copyfile(result[result_key], os.path.join(staging_dir, filename))
+            meta = {
+                'key': key,
+                'created': time.time(),
+                'unfolder_version': UNFOLDER_VERSION,
+                'files': files,
+                'result': {
+                    k: v for k, v in result.items()
+                    if k not in CACHED_FILES and k not in RUN_KEYS
+                },
+                **(metadata or {}),
+            }
+            with open(os.path.join(staging_dir, META_FILE), 'w') as f:
+                json.dump(meta, f, indent=2)
+
+            # Publish atomically; if another process stored the key first, keep theirs
+            entry_dir = self._entry_dir(key)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            try:
+                os.rename(staging_dir, entry_dir)
+            except OSError:
+                pass
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        self.evict()
+
+    def entries(self):
+        """(last used, size in bytes, path) of every entry"""
+        found = []
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if shard.startswith('.') or not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                entry_dir = os.path.join(shard_dir, key)
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry_dir, META_FILE))
+                    size = sum(
+                        os.path.getsize(os.path.join(entry_dir, name))
+                        for name in os.listdir(entry_dir)
+                    )
+                except OSError:
+                    continue
+                found.append((last_used, size, entry_dir))
+        return found
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            evict_lru(self.entries(), self.max_bytes, lambda path: shutil.rmtree(path, ignore_errors=True))
+
+class BrepCache:
+    """Imported STEP shapes stored as .brep files, keyed by the STEP digest"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get('UNFOLD_BREP_CACHE_DIR', '/tmp/unfold_brep_cache')
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('UNFOLD_BREP_CACHE_MAX_MB', 1024)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], f'{digest}.brep')
+
+    def lookup(self, digest):
+        """Path of the cached .brep for a STEP digest, or None on a miss"""
+        path = self.path(digest)
+        try:
+            # The mtime records when the file was last used
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, digest, write):
+        """Cache a shape; write(path) must save it as BREP to the given path"""
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, staging_path = tempfile.mkstemp(prefix='.staging_', suffix='.brep', dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            write(staging_path)
+            os.replace(staging_path, path)
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+        self.evict()
+        return path
+
+    def entries(self):
+        """(last used, size in bytes, path) of every cached shape"""
+        found = []
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.startswith('.') or not name.endswith('.brep'):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    found.append((os.path.getmtime(path), os.path.getsize(path), path))
+                except OSError:
+                    continue
+        return found
+
+    def evict(self):
+        """Remove least recently used shapes until the cache fits max_bytes"""
+        def remove(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        with self._lock:
+            evict_lru(self.entries(), self.max_bytes, remove)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Process-wide result cache, or None when UNFOLD_CACHE=0"""
+    global _cache
+    if os.environ.get('UNFOLD_CACHE', '1') == '0':
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = UnfoldCache()
+        return _cache
+
+_brep_cache = None
+
+def get_brep_cache():
+    """Process-wide BREP cache, or None when UNFOLD_BREP_CACHE=0"""
+    global _brep_cache
+    if os.environ.get('UNFOLD_BREP_CACHE', '1') == '0':
+        return None
+    with _cache_lock:
+        if _brep_cache is None:
+            _brep_cache = BrepCache()
+        return _brep_cache
@@ -1,28 +1,17 @@
 print("=== UNFOLD SCRIPT STARTING ===")
 import os
 import sys
+import json
+import time
 print("Basic imports successful")
 
-k_factor = float(os.environ.get("K_FACTOR", "0.38"))
-print(f"Using K-factor: {k_factor}")
+import FreeCAD
 
-try:
-    import importDXF
-    print("importDXF imported successfully")
-except Exception as e:
-    print(f"Failed to import importDXF: {e}")
-    
 try:
     import Part
     print("Part imported successfully")
 except Exception as e:
     print(f"Failed to import Part: {e}")
-    
-try:
-    import Draft
-    print("Draft imported successfully")
-except Exception as e:
-    print(f"Failed to import Draft: {e}")
 
 def patch_freecad_precision():
     # Check if Precision attribute exists
@@ -43,81 +32,407 @@ def patch_freecad_precision():
                 return 1e-9
             def p_intersection(self):
                 return 1e-12
-        
+
         FreeCAD.Base.Precision = Precision()
         print("Added FreeCAD.Precision compatibility layer")
 
 # Apply the patch
 patch_freecad_precision()
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'sheet_metal'))
+UNFOLDER_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(UNFOLDER_DIR, '..', 'sheet_metal'))
+sys.path.append(UNFOLDER_DIR)
 # Import the unfold command from the sheet metal module
 import SheetMetalNewUnfolder
+from dxf_writer import write_flat_pattern
+from fallback import unfold_with_fallback
+from geometry_hash import geometry_hash
+from metrics import UnfoldMetrics
+from result_cache import get_brep_cache, step_digest
+from unfold_outputs import DEFAULT_OUTPUTS, OUTPUTS
+
+# "ezdxf" writes the flat pattern directly; "importdxf" exports it through
+# FreeCAD's importDXF (needs the Draft workbench) and re-orients it with orientdxf
+DXF_WRITER = os.environ.get("UNFOLD_DXF_WRITER", "ezdxf")
+
+# A solid counts as sheet metal when its thickness is at most this fraction
+# of its bounding box diagonal; blocks, shafts and fasteners fail the check
+MAX_THICKNESS_RATIO = 0.25
 
 # Flatenning routine
 
-doc = FreeCAD.ActiveDocument
+def open_brep(brep_path, name="Solid"):
+    """Open a .brep file in a new document as a single Part feature"""
+    doc = FreeCAD.newDocument()
+    shape = Part.Shape()
+    shape.read(brep_path)
+    obj = doc.addObject("Part::Feature", name)
+    obj.Shape = shape
+    doc.recompute()
+    return doc
 
-obj = doc.Objects[0]
+def open_step(step_path):
+    """Open a STEP file in a new document.
 
-# Get a base face
-faces = obj.Shape.Faces
-largest_face = max(faces, key=lambda f: f.Area)
-base_index = faces.index(largest_face)
-facename = f"Face{base_index + 1}"  # FreeCAD uses 1-based indexing
+    The imported shape is cached as BREP by STEP digest; later opens of the
+    same bytes load that instead of parsing the STEP file again.
+    """
+    import Import
+    brep_cache = get_brep_cache()
+    digest = step_digest(step_path) if brep_cache else None
+    brep_path = brep_cache.lookup(digest) if brep_cache else None
 
-print(f"Using face: {facename} with area: {largest_face.Area}")
+    if brep_path:
+        print(f"Loading cached BREP: {brep_path}")
+        return open_brep(brep_path, "CachedShape")
 
-bac = SheetMetalNewUnfolder.BendAllowanceCalculator.from_single_value(k_factor, "ansi")
+    doc = FreeCAD.newDocument()
+    Import.insert(step_path, doc.Name)
+    if brep_cache and doc.Objects:
+        try:
+            # Only the object that gets unfolded is kept
+            brep_cache.store(digest, doc.Objects[0].Shape.exportBrep)
+        except Exception as e:
+            print(f"BREP cache store failed: {e}")
+    return doc
 
-sel_face, unfolded_shape, bend_lines, root_normal = SheetMetalNewUnfolder.getUnfold(
-    bac, obj, facename
-)
+def base_face_name(obj):
+    """Name of the face an object is unfolded from: its largest face"""
+    faces = obj.Shape.Faces
+    largest_face = max(faces, key=lambda f: f.Area)
+    base_index = faces.index(largest_face)
+    facename = f"Face{base_index + 1}"  # FreeCAD uses 1-based indexing
 
+    print(f"Using face: {facename} with area: {largest_face.Area}")
+    return facename
 
-unfold_obj = doc.addObject("Part::Feature", "UnfoldedPart")
-unfold_obj.Shape = unfolded_shape
-doc.recompute()
+def bend_allowance_calculator(k_factor, k_factor_standard="ansi", material_path=None):
+    """k-factors from a .json/.csv material file (see lookup.KFactorTable)
+    when one is given, otherwise the single k_factor"""
+    calculator = SheetMetalNewUnfolder.BendAllowanceCalculator
+    if material_path:
+        print(f"Using material file: {material_path}")
+        return calculator.from_file(material_path)
+    return calculator.from_single_value(k_factor, k_factor_standard)
 
+def unfold_document(doc, k_factor, output_dir, k_factor_standard="ansi", material_path=None,
+                    outputs=None, metrics=None, deadline=None):
+    """Unfold the first object of a document and export DXF and STEP files.
 
-faces = unfold_obj.Shape.Faces
-largest_face = max(faces, key=lambda f: f.Area)
+    outputs is one of OUTPUTS (default UNFOLD_OUTPUTS, or "dxf") and selects
+    the files to write. Returns the paths of the written files; a path is
+    None when its export failed or was not selected. The timings and counts
+    of each phase are returned under "metrics" and written to
+    unfold_metrics.json, whose path is "metrics_path".
 
-part = doc.addObject("Part::Feature", "LargestFace")
-part.Shape = largest_face
-doc.recompute()
+    The flat pattern comes from fallback.unfold_with_fallback, which tries
+    other root faces and the legacy unfolder within deadline seconds when
+    the new unfolder fails; "face" is the root face that worked and
+    "attempts" lists every attempt.
+    """
+    if metrics is None:
+        metrics = UnfoldMetrics()
+    outputs = outputs or DEFAULT_OUTPUTS
+    if outputs not in OUTPUTS:
+        raise ValueError(f"Unknown outputs {outputs!r}, expected one of {', '.join(OUTPUTS)}")
+    wanted = OUTPUTS[outputs]
 
-output_dir = os.environ.get("OUTPUT_DIR", "/app/output")
-print(f"Output directory: {output_dir}")
-os.makedirs(output_dir, exist_ok=True)
+    obj = doc.Objects[0]
+    facename = base_face_name(obj)
 
-raw_dxf_path = os.path.join(output_dir, "largest_face_raw.dxf")
-final_dxf_path = os.path.join(output_dir, "largest_face.dxf")
-step_path = os.path.join(output_dir, "unbend_model.step")
+    bac = bend_allowance_calculator(k_factor, k_factor_standard, material_path)
 
-print(f"Exporting DXF to: {raw_dxf_path}")
-try:
-    importDXF.export([part], raw_dxf_path)
-    print(f"Raw DXF exported successfully. File exists: {os.path.exists(raw_dxf_path)}")
-except Exception as e:
-    print(f"DXF export failed: {e}")
+    print(f"Output directory: {output_dir}")
+    os.makedirs(output_dir, exist_ok=True)
 
-# Reorient the DXF to ensure it's on the XY plane
-import sys
-sys.path.append("/app/src/unfolder")
-try:
+    if DXF_WRITER == "importdxf":
+        result = export_with_importdxf(doc, bac, obj, facename, output_dir, wanted, metrics,
+                                       deadline)
+    else:
+        result = export_flat_pattern(bac, obj, facename, output_dir, wanted, metrics, deadline)
+    return {**result, "metrics": metrics.as_dict(), "metrics_path": metrics.write(output_dir)}
+
+def export_flat_pattern(bac, obj, facename, output_dir, wanted, metrics, deadline=None):
+    """Unfold obj and write the selected files with dxf_writer"""
+    flat, attempts = unfold_with_fallback(
+        bac, obj, facename, "bendlines" in wanted, metrics, deadline
+    )
+
+    final_dxf_path = os.path.join(output_dir, "largest_face.dxf")
+    step_path = os.path.join(output_dir, "unbend_model.step")
+
+    # The flat pattern is already in the XY plane: no re-orientation needed
+    if "dxf" in wanted:
+        print(f"Writing DXF to: {final_dxf_path}")
+        try:
+            with metrics.phase("dxf_export"):
+                write_flat_pattern(final_dxf_path, flat.face.Edges, flat.bend_lines.Edges)
+            print(f"DXF written successfully. File exists: {os.path.exists(final_dxf_path)}")
+        except Exception as e:
+            print(f"DXF export failed: {e}")
+
+    if "step" in wanted:
+        try:
+            with metrics.phase("step_export"):
+                flat.unbent_solid().exportStep(step_path)
+            print(f"STEP export complete. File exists: {os.path.exists(step_path)}")
+        except Exception as e:
+            print(f"STEP export failed: {e}")
+
+    return {
+        "face": attempts[-1]["face"],
+        "attempts": attempts,
+        "raw_dxf_path": None,
+        "dxf_path": final_dxf_path if os.path.exists(final_dxf_path) else None,
+        "step_path": step_path if os.path.exists(step_path) else None
+    }
+
+def export_with_importdxf(doc, bac, obj, facename, output_dir, wanted, metrics, deadline=None):
+    """Legacy export through importDXF and orientdxf (UNFOLD_DXF_WRITER=importdxf).
+
+    Always writes the DXF, without bend lines; the STEP model only when wanted.
+    """
+    import importDXF
     from orientdxf import transform_entities
-    
-    print("Reorienting DXF to XY plane...")
-    transform_entities(raw_dxf_path, final_dxf_path)
-    print(f"DXF reorientation complete. Final file exists: {os.path.exists(final_dxf_path)}")
-except Exception as e:
-    print(f"DXF reorientation failed: {e}")
 
-try:
-    Part.export([unfold_obj], step_path)
-    print(f"STEP export complete. File exists: {os.path.exists(step_path)}")
-except Exception as e:
-    print(f"STEP export failed: {e}")
+    flat, attempts = unfold_with_fallback(bac, obj, facename, False, metrics, deadline)
+    with metrics.phase("unbent_solid"):
+        unfolded_shape = flat.unbent_solid()
+
+
+    unfold_obj = doc.addObject("Part::Feature", "UnfoldedPart")
+    unfold_obj.Shape = unfolded_shape
+    doc.recompute()
+
+
+    faces = unfold_obj.Shape.Faces
+    largest_face = max(faces, key=lambda f: f.Area)
+
+    part = doc.addObject("Part::Feature", "LargestFace")
+    part.Shape = largest_face
+    doc.recompute()
+
+    raw_dxf_path = os.path.join(output_dir, "largest_face_raw.dxf")
+    final_dxf_path = os.path.join(output_dir, "largest_face.dxf")
+    step_path = os.path.join(output_dir, "unbend_model.step")
+
+    print(f"Exporting DXF to: {raw_dxf_path}")
+    try:
+        with metrics.phase("dxf_export"):
+            importDXF.export([part], raw_dxf_path)
+        print(f"Raw DXF exported successfully. File exists: {os.path.exists(raw_dxf_path)}")
+    except Exception as e:
+        print(f"DXF export failed: {e}")
+
+    # Reorient the DXF to ensure it's on the XY plane
+    try:
+        print("Reorienting DXF to XY plane...")
+        with metrics.phase("orientation"):
+            transform_entities(raw_dxf_path, final_dxf_path)
+        print(f"DXF reorientation complete. Final file exists: {os.path.exists(final_dxf_path)}")
+    except Exception as e:
+        print(f"DXF reorientation failed: {e}")
+
+    if "step" in wanted:
+        try:
+            with metrics.phase("step_export"):
+                Part.export([unfold_obj], step_path)
+            print(f"STEP export complete. File exists: {os.path.exists(step_path)}")
+        except Exception as e:
+            print(f"STEP export failed: {e}")
+
+    return {
+        "face": attempts[-1]["face"],
+        "attempts": attempts,
+        "raw_dxf_path": raw_dxf_path if os.path.exists(raw_dxf_path) else None,
+        "dxf_path": final_dxf_path if os.path.exists(final_dxf_path) else None,
+        "step_path": step_path if os.path.exists(step_path) else None
+    }
+
+def unfold_step(step_path, k_factor=0.38, output_dir="/app/output", k_factor_standard="ansi",
+                material_path=None, outputs=None, deadline=None):
+    """Unfold a STEP file in its own document, closing the document afterwards"""
+    metrics = UnfoldMetrics()
+    with metrics.phase("step_load"):
+        doc = open_step(step_path)
+    try:
+        return unfold_document(doc, k_factor, output_dir, k_factor_standard, material_path, outputs,
+                               metrics, deadline)
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+def unfold_brep(brep_path, k_factor=0.38, output_dir="/app/output", k_factor_standard="ansi",
+                material_path=None, outputs=None, deadline=None):
+    """Unfold a solid saved as .brep, closing its document afterwards"""
+    metrics = UnfoldMetrics()
+    with metrics.phase("brep_load"):
+        doc = open_brep(brep_path)
+    try:
+        return unfold_document(doc, k_factor, output_dir, k_factor_standard, material_path, outputs,
+                               metrics, deadline)
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+def sweep_document(doc, k_factors, output_dir, k_factor_standard="ansi"):
+    """Unfold the first object of a document once per k-factor.
+
+    The geometry is analyzed once (tangent face graph, thickness, bend
+    geometry, unrolled bend edges); each k-factor then only lays the bends
+    out flat again. Writes output_dir/k_<index>_<k_factor>.dxf for each
+    k-factor, so a k-factor listed twice gets two files, and returns one
+    entry per k-factor, with an "error" instead of a "dxf_path" when that
+    k-factor failed.
+    """
+    obj = doc.Objects[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    metrics = UnfoldMetrics()
+    start = time.perf_counter()
+    analysis = SheetMetalNewUnfolder.UnfoldAnalysis.from_solid(obj, base_face_name(obj), metrics)
+    analysis_s = round(time.perf_counter() - start, 4)
+    print(f"Analyzed {len(analysis.bends)} bends in {analysis_s}s")
+
+    results = []
+    for index, k_factor in enumerate(k_factors):
+        entry = {"k_factor": k_factor}
+        start = time.perf_counter()
+        try:
+            bac = SheetMetalNewUnfolder.BendAllowanceCalculator.from_single_value(k_factor, k_factor_standard)
+            flat = analysis.flat_pattern(bac, with_bend_lines=False)
+            dxf_path = os.path.join(output_dir, f"k_{index}_{k_factor:g}.dxf")
+            write_flat_pattern(dxf_path, flat.face.Edges)
+            box = flat.face.BoundBox
+            entry.update(dxf_path=dxf_path, flat_size=[round(box.XLength, 4), round(box.YLength, 4)])
+        except Exception as e:
+            print(f"Unfolding with k-factor {k_factor} failed: {e}")
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["elapsed_s"] = round(time.perf_counter() - start, 4)
+        results.append(entry)
+    return {
+        "thickness": analysis.thickness,
+        "analysis_s": analysis_s,
+        "metrics": metrics.as_dict(),
+        "results": results
+    }
+
+def sweep_step(step_path, k_factors, output_dir="/app/output", k_factor_standard="ansi"):
+    """sweep_document for a STEP file, closing its document afterwards"""
+    doc = open_step(step_path)
+    try:
+        return sweep_document(doc, k_factors, output_dir, k_factor_standard)
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+def sheet_thickness(solid):
+    """Sheet thickness of a solid, or None when it does not look like sheet metal"""
+    planar = [i for i, f in enumerate(solid.Faces) if f.Surface.TypeId == "Part::GeomPlane"]
+    if not planar:
+        return None
+    root_index = max(planar, key=lambda i: solid.Faces[i].Area)
+    try:
+        thickness = SheetMetalNewUnfolder.EstimateThickness.using_best_method(solid, root_index)
+    except Exception:
+        return None
+    if thickness > MAX_THICKNESS_RATIO * solid.BoundBox.DiagonalLength:
+        return None
+    return thickness
+
+def assembly_solids(doc):
+    """(label, solid) for every solid of the document's Part features"""
+    found = []
+    for obj in doc.Objects:
+        if not obj.isDerivedFrom("Part::Feature"):
+            continue
+        solids = obj.Shape.Solids
+        for n, solid in enumerate(solids):
+            label = obj.Label if len(solids) == 1 else f"{obj.Label}.{n + 1}"
+            found.append((label, solid))
+    return found
+
+def split_assembly(step_path, output_dir):
+    """Save each distinct sheet-metal solid of a STEP file as a .brep file.
+
+    Solids that fail the thickness check are listed under "skipped". Solids
+    with the same geometry hash are saved once, and every label sharing it is
+    listed under that part's "instances".
+    """
+    import Import
+    os.makedirs(output_dir, exist_ok=True)
+    doc = FreeCAD.newDocument()
+    try:
+        Import.insert(step_path, doc.Name)
+        parts = {}
+        skipped = []
+        for label, solid in assembly_solids(doc):
+            thickness = sheet_thickness(solid)
+            if thickness is None:
+                print(f"Skipping {label}: not sheet metal")
+                skipped.append({"label": label, "reason": "not sheet metal"})
+                continue
+            digest = geometry_hash(solid)
+            if digest in parts:
+                parts[digest]["instances"].append(label)
+                continue
+            name = f"part_{len(parts) + 1}"
+            brep_path = os.path.join(output_dir, f"{name}.brep")
+            solid.exportBrep(brep_path)
+            parts[digest] = {
+                "name": name,
+                "hash": digest,
+                "thickness": thickness,
+                "brep_path": brep_path,
+                "instances": [label]
+            }
+        print(f"Found {len(parts)} distinct sheet metal parts, skipped {len(skipped)} solids")
+        return {"parts": list(parts.values()), "skipped": skipped}
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+def unfold_assembly(step_path, k_factor=0.38, output_dir="/app/output", k_factor_standard="ansi",
+                    material_path=None, outputs=None):
+    """Unfold every distinct sheet-metal solid of a STEP file, one after another.
+
+    Each part is written to output_dir/<part name>/. A part that fails gets
+    an "error" entry instead of failing the whole assembly.
+    FreeCADWorkerPool.unfold_assembly does the same across worker processes.
+    """
+    assembly = split_assembly(step_path, os.path.join(output_dir, "solids"))
+    for part in assembly["parts"]:
+        try:
+            part.update(unfold_brep(
+                part["brep_path"], k_factor, os.path.join(output_dir, part["name"]), k_factor_standard,
+                material_path=material_path, outputs=outputs or DEFAULT_OUTPUTS
+            ))
+        except Exception as e:
+            print(f"Unfolding {part['name']} failed: {e}")
+            part["error"] = f"{type(e).__name__}: {e}"
+    return assembly
+
+if __name__ == "__main__":
+    k_factor = float(os.environ.get("K_FACTOR", "0.38"))
+    print(f"Using K-factor: {k_factor}")
+    output_dir = os.environ.get("OUTPUT_DIR", "/app/output")
+    # A material file's k-factor table replaces K_FACTOR
+    material_path = os.environ.get("UNFOLD_MATERIAL")
+
+    # `freecad input.step -c unfold.py` opens the STEP file before running us;
+    # `freecadcmd -c unfold.py input.step` passes it as an argument instead
+    step_args = [arg for arg in sys.argv[1:] if arg.lower().endswith(('.step', '.stp'))]
+    if os.environ.get("K_FACTORS") and step_args:
+        # One DXF per k-factor from a single analysis, listed in sweep.json
+        k_factors = [float(k) for k in os.environ["K_FACTORS"].split(",")]
+        sweep = sweep_step(step_args[0], k_factors, output_dir)
+        with open(os.path.join(output_dir, "sweep.json"), "w") as f:
+            json.dump(sweep, f, indent=2)
+    elif os.environ.get("UNFOLD_ASSEMBLY") == "1" and step_args:
+        # One DXF per solid; the results are listed in assembly.json
+        assembly = unfold_assembly(step_args[0], k_factor, output_dir, material_path=material_path,
+                                   outputs=DEFAULT_OUTPUTS)
+        with open(os.path.join(output_dir, "assembly.json"), "w") as f:
+            json.dump(assembly, f, indent=2)
+    elif FreeCAD.ActiveDocument is None and step_args:
+        unfold_step(step_args[0], k_factor, output_dir, material_path=material_path)
+    else:
+        unfold_document(FreeCAD.ActiveDocument, k_factor, output_dir, material_path=material_path)
 
-exit(0)
\ No newline at end of file
+    exit(0)
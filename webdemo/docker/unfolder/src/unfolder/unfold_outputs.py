@@ -0,0 +1,23 @@
+"""Which files an unfold writes.
+
+Shared by unfold.py inside FreeCAD and by everything that queues unfolds
+(api.py, worker_pool, the MCP server), so they all agree on the default.
+This module does not import FreeCAD.
+"""
+
+import os
+
+# What unfold_document writes for each UNFOLD_OUTPUTS value: the flat DXF,
+# with or without bend lines, and the unbent STEP model. Bend lines are only
+# clipped to the flat pattern, and the unbent solid only built, when wanted.
+OUTPUTS = {
+    "dxf": {"dxf"},
+    "dxf+bendlines": {"dxf", "bendlines"},
+    "step": {"step"},
+    "all": {"dxf", "bendlines", "step"},
+}
+
+# Only the profile unless bend lines are asked for: the nester copies every
+# LINE of a DXF into the cut file whatever its layer, so a bend line in the
+# default DXF would be cut by the laser
+DEFAULT_OUTPUTS = os.environ.get("UNFOLD_OUTPUTS", "dxf")
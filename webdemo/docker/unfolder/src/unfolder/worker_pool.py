@@ -0,0 +1,292 @@
+"""Pool of warm FreeCAD processes for unfolding STEP files.
+
+Starting FreeCAD and importing Part, Draft, importDXF and the sheet metal
+unfolder takes several seconds, which used to be paid on every request. The
+pool keeps `size` FreeCAD processes running freecad_worker.py and sends them
+jobs over a socket pair, so a request only pays for its own geometry work.
+
+Workers are started lazily (or up front with start()), recycled after
+max_jobs_per_worker jobs to bound memory growth, and replaced when they crash
+or exceed the job timeout. The pool is thread safe; callers block until a
+worker is free.
+
+Settings come from the environment unless passed explicitly:
+
+    UNFOLD_WORKERS                 number of worker processes (default 2)
+    UNFOLD_WORKER_MAX_JOBS         jobs before a worker is recycled (default 50)
+    UNFOLD_JOB_TIMEOUT             seconds per job (default 120)
+    UNFOLD_WORKER_STARTUP_TIMEOUT  seconds for a worker to become ready (default 60)
+    FREECAD_WORKER_COMMAND         command running a FreeCAD script (default freecadcmd)
+"""
+
+import os
+import json
+import queue
+import shlex
+import socket
+import atexit
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from unfold_outputs import DEFAULT_OUTPUTS
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'freecad_worker.py')
+
+# FreeCAD prints a lot; send it to our stderr so stdout stays usable
+# for protocols such as MCP's JSON-RPC
+STDERR_FD = 2
+
+# Share of a job's timeout that an unfold's fallback chain may spend on
+# attempts (see fallback.py), leaving the rest for loading and exporting
+DEADLINE_SHARE = 0.75
+
+class UnfoldError(RuntimeError):
+    """An unfold job failed, or its worker crashed or timed out"""
+
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        self.details = details
+
+class _Worker:
+    """One FreeCAD process and the socket it takes jobs on"""
+
+    def __init__(self, command, startup_timeout):
+        parent, child = socket.socketpair()
+        env = {**os.environ, 'FREECAD_WORKER_FD': str(child.fileno())}
+        try:
+            self.process = subprocess.Popen(
+                command,
+                env=env,
+                pass_fds=(child.fileno(),),
+                stdin=subprocess.DEVNULL,
+                stdout=STDERR_FD
+            )
+        except OSError:
+            parent.close()
+            raise
+        finally:
+            child.close()
+
+        self.socket = parent
+        self.reader = parent.makefile('r', encoding='utf-8')
+        self.jobs_done = 0
+        try:
+            self.pid = self._receive(startup_timeout, 'start')['pid']
+        except UnfoldError:
+            self.stop()
+            raise
+
+    def _receive(self, timeout, action):
+        self.socket.settimeout(timeout)
+        try:
+            line = self.reader.readline()
+        except (socket.timeout, OSError):
+            raise UnfoldError(f"FreeCAD worker did not {action} within {timeout}s")
+        if not line:
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                pass
+            raise UnfoldError(f"FreeCAD worker exited during {action} (exit code {self.process.returncode})")
+        return json.loads(line)
+
+    def run(self, op, args, timeout):
+        self.jobs_done += 1
+        job = {'id': self.jobs_done, 'op': op, 'args': args}
+        try:
+            self.socket.sendall((json.dumps(job) + '\n').encode('utf-8'))
+        except OSError:
+            self.process.poll()
+            raise UnfoldError(f"FreeCAD worker is gone (exit code {self.process.returncode})")
+        return self._receive(timeout, f"finish {op}")
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self, timeout=5):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.socket.sendall(b'{"op": "shutdown"}\n')
+            self.process.wait(timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        finally:
+            self.reader.close()
+            self.socket.close()
+
+class FreeCADWorkerPool:
+    def __init__(self, size=None, max_jobs_per_worker=None, job_timeout=None,
+                 startup_timeout=None, command=None, worker_script=WORKER_SCRIPT):
+        self.size = size or int(os.environ.get('UNFOLD_WORKERS', 2))
+        self.max_jobs_per_worker = max_jobs_per_worker or int(os.environ.get('UNFOLD_WORKER_MAX_JOBS', 50))
+        self.job_timeout = job_timeout or float(os.environ.get('UNFOLD_JOB_TIMEOUT', 120))
+        self.startup_timeout = startup_timeout or float(os.environ.get('UNFOLD_WORKER_STARTUP_TIMEOUT', 60))
+        if command is None:
+            command = shlex.split(os.environ.get('FREECAD_WORKER_COMMAND', 'freecadcmd'))
+        self.command = list(command) + [worker_script]
+
+        # Most recently used worker first, so idle workers stay idle
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._closed = False
+        self.stats = {'jobs': 0, 'failures': 0, 'started': 0, 'restarts': 0, 'recycled': 0}
+
+    def start(self):
+        """Start every worker now instead of on first use"""
+        started = []
+        for _ in range(self.size):
+            if self._slots.acquire(blocking=False):
+                started.append(self._spawn())
+        for worker in started:
+            self._idle.put(worker)
+            self._slots.release()
+
+    def deadline(self, timeout=None):
+        """Seconds an unfold's fallback chain may take within a job timeout"""
+        return round(DEADLINE_SHARE * (timeout or self.job_timeout), 3)
+
+    def submit(self, op, timeout=None, **args):
+        """Run one job on a free worker and return the worker's reply.
+
+        Raises UnfoldError when the job fails; the worker is replaced if it
+        crashed or timed out.
+        """
+        if self._closed:
+            raise UnfoldError("Worker pool is closed")
+
+        with self._slots:
+            worker = self._acquire()
+            try:
+                reply = worker.run(op, args, timeout or self.job_timeout)
+            except BaseException:
+                # Crashed, hung or interrupted mid-job: its state is unknown
+                self._discard(worker, graceful=False)
+                with self._lock:
+                    self.stats['failures'] += 1
+                    self.stats['restarts'] += 1
+                raise
+            self._release(worker)
+
+        with self._lock:
+            self.stats['jobs'] += 1
+            if not reply['ok']:
+                self.stats['failures'] += 1
+        if not reply['ok']:
+            raise UnfoldError(reply['error'], reply.get('traceback'))
+        return reply
+
+    def unfold(self, step_path, k_factor=0.38, output_dir='/app/output', k_factor_standard='ansi', timeout=None,
+               material_path=None, outputs=None):
+        """Unfold a STEP file; returns the output paths plus elapsed_s.
+
+        material_path names a .json/.csv k-factor table that replaces k_factor.
+        outputs selects the files to write (see unfold_outputs.OUTPUTS).
+        """
+        args = {'material_path': material_path} if material_path else {}
+        reply = self.submit('unfold', timeout, step_path=step_path, k_factor=k_factor,
+                            output_dir=output_dir, k_factor_standard=k_factor_standard,
+                            outputs=outputs or DEFAULT_OUTPUTS, deadline=self.deadline(timeout), **args)
+        return {**reply['result'], 'elapsed_s': reply['elapsed_s']}
+
+    def sweep(self, step_path, k_factors, output_dir='/app/output', k_factor_standard='ansi', timeout=None):
+        """Unfold a STEP file once per k-factor from a single analysis of its
+        geometry (see unfold.sweep_document); returns its results plus elapsed_s"""
+        reply = self.submit('sweep', timeout, step_path=step_path, k_factors=list(k_factors),
+                            output_dir=output_dir, k_factor_standard=k_factor_standard)
+        return {**reply['result'], 'elapsed_s': reply['elapsed_s']}
+
+    def unfold_assembly(self, step_path, k_factor=0.38, output_dir='/app/output', k_factor_standard='ansi', timeout=None,
+                        material_path=None, outputs=None):
+        """Unfold every distinct sheet-metal solid of a STEP file in parallel.
+
+        One worker splits the file into solids (see unfold.split_assembly);
+        the parts are then unfolded across the pool, each into
+        output_dir/<part name>/. A part that fails gets an 'error' entry
+        instead of failing the whole assembly.
+        """
+        split = self.submit('split_assembly', timeout, step_path=step_path,
+                            output_dir=os.path.join(output_dir, 'solids'))
+        args = {'material_path': material_path} if material_path else {}
+
+        def unfold_part(part):
+            try:
+                reply = self.submit('unfold_brep', timeout, brep_path=part['brep_path'], k_factor=k_factor,
+                                    output_dir=os.path.join(output_dir, part['name']),
+                                    k_factor_standard=k_factor_standard,
+                                    outputs=outputs or DEFAULT_OUTPUTS,
+                                    deadline=self.deadline(timeout), **args)
+            except UnfoldError as e:
+                return {**part, 'error': str(e), 'details': e.details}
+            return {**part, **reply['result'], 'elapsed_s': reply['elapsed_s']}
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            parts = list(executor.map(unfold_part, split['result']['parts']))
+        return {**split['result'], 'parts': parts, 'split_s': split['elapsed_s']}
+
+    def _spawn(self):
+        worker = _Worker(self.command, self.startup_timeout)
+        with self._lock:
+            self._workers.add(worker)
+            self.stats['started'] += 1
+        return worker
+
+    def _acquire(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return self._spawn()
+            if worker.alive:
+                return worker
+            # Died while idle
+            self._discard(worker, graceful=False)
+
+    def _release(self, worker):
+        if self._closed or worker.jobs_done >= self.max_jobs_per_worker:
+            if not self._closed:
+                with self._lock:
+                    self.stats['recycled'] += 1
+            self._discard(worker)
+        else:
+            self._idle.put(worker)
+
+    def _discard(self, worker, graceful=True):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(timeout=5 if graceful else 0)
+
+    def status(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'workers': len(self._workers),
+                'idle': self._idle.qsize(),
+                **self.stats
+            }
+
+    def close(self):
+        """Stop all workers; jobs that are running finish first"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(worker)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Process-wide pool, created on first use and closed at exit"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FreeCADWorkerPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,188 @@
+import pytest
+import os
+import sys
+import json
+
+# Add the unfolder service root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import api
+from worker_pool import UnfoldError
+
+
+class FakePool:
+    """Stands in for the FreeCAD worker pool"""
+
+    def __init__(self):
+        self.calls = []
+        self.outputs = []
+        self.materials = []
+
+    def unfold(self, step_path, k_factor=0.38, output_dir='/app/output', timeout=None, outputs=None,
+               material_path=None):
+        self.calls.append(step_path)
+        self.outputs.append(outputs)
+        self.materials.append(material_path)
+        if b'broken' in open(step_path, 'rb').read():
+            raise UnfoldError('RuntimeError: no bends found')
+        os.makedirs(output_dir, exist_ok=True)
+        dxf_path = os.path.join(output_dir, 'largest_face.dxf')
+        with open(dxf_path, 'w') as f:
+            f.write(f'flat {k_factor}')
+        metrics = {'total_s': 0.01, 'phases': {'face_graph': 0.004}, 'counts': {'bends': 2}}
+        return {'dxf_path': dxf_path, 'step_path': None, 'metrics': metrics, 'elapsed_s': 0.01}
+
+    def unfold_assembly(self, step_path, k_factor=0.38, output_dir='/app/output', timeout=None,
+                        material_path=None, outputs=None):
+        parts = [
+            {'name': 'part_1', 'instances': ['Bracket', 'Bracket001'], 'thickness': 2.0},
+            {'name': 'part_2', 'instances': ['Cover'], 'thickness': 1.5,
+             'error': 'RuntimeError: no bends found'},
+        ]
+        for part in parts:
+            if 'error' not in part:
+                part.update(self.unfold(step_path, k_factor, os.path.join(output_dir, part['name']),
+                                        outputs=outputs, material_path=material_path))
+        return {'parts': parts, 'skipped': [{'label': 'Bolt', 'reason': 'not sheet metal'}]}
+
+    def sweep(self, step_path, k_factors, output_dir='/app/output', timeout=None):
+        results = []
+        for index, k_factor in enumerate(k_factors):
+            if k_factor > 1:
+                results.append({'k_factor': k_factor, 'error': 'ValueError: k-factor out of range'})
+                continue
+            os.makedirs(output_dir, exist_ok=True)
+            dxf_path = os.path.join(output_dir, f'k_{index}_{k_factor:g}.dxf')
+            with open(dxf_path, 'w') as f:
+                f.write(f'flat {k_factor}')
+            results.append({'k_factor': k_factor, 'dxf_path': dxf_path, 'flat_size': [100 + k_factor, 50]})
+        self.calls.append(step_path)
+        return {'thickness': 2.0, 'analysis_s': 0.5, 'results': results}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(api, 'get_pool', lambda: pool)
+    monkeypatch.setattr(api, 'USE_WORKER_POOL', True)
+    monkeypatch.setattr(api, 'BATCH_DIR', str(tmp_path / 'batches'))
+    monkeypatch.setenv('UNFOLD_CACHE', '0')
+    api.app.config['TESTING'] = True
+    with api.app.test_client() as client:
+        client.pool = pool
+        yield client
+
+
+def make_step(path, content=b'ISO-10303-21;'):
+    path.write_bytes(content)
+    return path.as_uri()
+
+
+def test_batch_unfold_manifest(client, tmp_path):
+    """Test a batch reports per-file status and serves the unfolded DXFs"""
+    (tmp_path / 'other').mkdir()
+    urls = [
+        make_step(tmp_path / 'bracket.step'),
+        make_step(tmp_path / 'other' / 'bracket.step'),
+        make_step(tmp_path / 'broken.step', b'broken'),
+        (tmp_path / 'missing.step').as_uri(),
+    ]
+
+    response = client.post('/unfold/batch', json={'urls': urls, 'k_factor': 0.4})
+    manifest = response.get_json()
+
+    assert response.status_code == 200
+    assert manifest['total'] == 4
+    assert manifest['succeeded'] == 2
+    assert [f['status'] for f in manifest['files']] == ['ok', 'ok', 'failed', 'download_failed']
+    # Duplicate names get a suffix instead of overwriting each other
+    assert [f['filename'] for f in manifest['files'][:2]] == ['bracket.dxf', 'bracket_2.dxf']
+    assert 'no bends found' in manifest['files'][2]['error']
+    assert set(manifest['files'][0]['timings']) == {'download_s', 'unfold_s'}
+    assert manifest['files'][0]['metrics']['phases'] == {'face_graph': 0.004}
+    assert len(client.pool.calls) == 3
+
+    dxf = client.get(manifest['files'][1]['dxf_url'])
+    assert dxf.status_code == 200
+    assert dxf.data == b'flat 0.4'
+
+
+def test_assembly_unfold_manifest(client, tmp_path):
+    """Test an assembly returns one DXF per distinct part with its quantity"""
+    url = make_step(tmp_path / 'frame.step')
+
+    response = client.post('/unfold/assembly', json={'url': url})
+    manifest = response.get_json()
+
+    assert response.status_code == 200
+    assert manifest['succeeded'] == 1
+    assert manifest['skipped'][0]['label'] == 'Bolt'
+    first, second = manifest['parts']
+    assert first['quantity'] == 2
+    assert first['filename'] == 'frame_part_1.dxf'
+    assert second['status'] == 'failed'
+    assert 'no bends found' in second['error']
+    assert client.get(first['dxf_url']).data == b'flat 0.38'
+    assert client.pool.outputs == ['dxf']
+
+
+def test_unfold_outputs(client, tmp_path):
+    """Test /unfold asks for the DXF alone unless bend lines are requested"""
+    url = make_step(tmp_path / 'bracket.step')
+
+    response = client.get('/unfold', query_string={'url': url})
+    assert response.status_code == 200
+    assert response.data == b'flat 0.38'
+    response = client.get('/unfold', query_string={'url': url, 'outputs': 'dxf+bendlines'})
+    assert response.status_code == 200
+    assert client.pool.outputs == ['dxf', 'dxf+bendlines']
+    assert json.loads(response.headers['X-Unfold-Metrics'])['counts'] == {'bends': 2}
+    # /unfold only returns the DXF, so a STEP-only unfold is refused
+    assert client.get('/unfold', query_string={'url': url, 'outputs': 'step'}).status_code == 400
+
+
+def test_unfold_material(client, tmp_path, monkeypatch):
+    """Test material files are picked by name from UNFOLD_MATERIAL_DIR, or from UNFOLD_MATERIAL"""
+    materials = tmp_path / 'materials'
+    materials.mkdir()
+    (materials / 'steel.json').write_text('{}')
+    (materials / 'aluminium.csv').write_text('')
+    monkeypatch.setenv('UNFOLD_MATERIAL_DIR', str(materials))
+    url = make_step(tmp_path / 'bracket.step')
+
+    assert client.get('/unfold', query_string={'url': url, 'material': 'steel.json'}).status_code == 200
+    monkeypatch.setenv('UNFOLD_MATERIAL', str(materials / 'aluminium.csv'))
+    assert client.get('/unfold', query_string={'url': url}).status_code == 200
+    assert client.pool.materials == [str(materials / 'steel.json'), str(materials / 'aluminium.csv')]
+
+    for material in ('copper.json', '../steel.json', 'steel.txt'):
+        assert client.get('/unfold', query_string={'url': url, 'material': material}).status_code == 400
+    assert client.post('/unfold/batch', json={'urls': [url], 'material': 'copper.json'}).status_code == 400
+
+
+def test_sweep_manifest(client, tmp_path):
+    """Test a k-factor sweep analyzes the file once and returns one DXF per k-factor"""
+    url = make_step(tmp_path / 'bracket.step')
+
+    response = client.post('/unfold/sweep', json={'url': url, 'k_factors': [0.3, '0.45', 2, 0.30]})
+    manifest = response.get_json()
+
+    assert response.status_code == 200
+    assert len(client.pool.calls) == 1
+    # the repeated k-factor is unfolded once
+    assert manifest['total'] == 3
+    assert manifest['succeeded'] == 2
+    assert manifest['thickness'] == 2.0
+    first, second, third = manifest['files']
+    assert first['filename'] == 'bracket_k0.3.dxf'
+    assert second['flat_size'] == [100.45, 50]
+    assert third['status'] == 'failed'
+    assert client.get(second['dxf_url']).data == b'flat 0.45'
+    assert client.post('/unfold/sweep', json={'url': url, 'k_factors': []}).status_code == 400
+    assert client.post('/unfold/sweep', json={'url': url, 'k_factors': ['abc']}).status_code == 400
+
+
+def test_batch_unfold_rejects_bad_body(client):
+    """Test the batch endpoint validates its JSON body"""
+    assert client.post('/unfold/batch', json={}).status_code == 400
+    assert client.post('/unfold/batch', json={'urls': ['x'], 'k_factor': 'abc'}).status_code == 400
@@ -0,0 +1,103 @@
+import pytest
+import os
+import sys
+import math
+from types import SimpleNamespace
+
+import ezdxf
+
+# Add src/unfolder to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'unfolder'))
+
+from dxf_writer import arc_through, edge_to_entity, write_flat_pattern
+
+
+def point(x, y):
+    return SimpleNamespace(x=x, y=y, z=0.0)
+
+
+def line_edge(start, end):
+    """Stands in for a FreeCAD line edge"""
+    return SimpleNamespace(
+        Curve=SimpleNamespace(TypeId='Part::GeomLine'),
+        firstVertex=lambda: SimpleNamespace(Point=point(*start)),
+        lastVertex=lambda: SimpleNamespace(Point=point(*end)),
+    )
+
+
+def arc_edge(center, radius, start_angle, end_angle):
+    """Stands in for a FreeCAD circle edge running from start_angle to end_angle"""
+    def at(angle):
+        return point(center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle))
+
+    first, last = math.radians(start_angle), math.radians(end_angle)
+    return SimpleNamespace(
+        Curve=SimpleNamespace(TypeId='Part::GeomCircle', Center=point(*center), Radius=radius),
+        Length=abs(last - first) * radius,
+        ParameterRange=(first, last),
+        valueAt=at,
+        firstVertex=lambda: SimpleNamespace(Point=at(first)),
+        lastVertex=lambda: SimpleNamespace(Point=at(last)),
+    )
+
+
+def test_arcs_are_written_counter_clockwise():
+    """Test a clockwise arc is swapped to run counter-clockwise like DXF expects"""
+    assert arc_through((0, 0), 1, (1, 0), (0, 1), (-1, 0)) == ('arc', (0, 0), 1, 0.0, 180.0)
+    assert arc_through((0, 0), 1, (-1, 0), (0, 1), (1, 0)) == ('arc', (0, 0), 1, 0.0, 180.0)
+    assert arc_through((0, 0), 1, (1, 0), (0, -1), (-1, 0)) == ('arc', (0, 0), 1, 180.0, 0.0)
+
+
+def test_edge_to_entity():
+    """Test lines, arcs and full circles are recognised"""
+    assert edge_to_entity(line_edge((0, 0), (5, 0))) == ('line', (0, 0), (5, 0))
+    assert edge_to_entity(arc_edge((0, 0), 2, 0, 360)) == ('circle', (0, 0), 2)
+    kind, center, radius, start, end = edge_to_entity(arc_edge((1, 1), 2, 90, 0))
+    assert (kind, center, radius) == ('arc', (1, 1), 2)
+    assert (start, end) == pytest.approx((0, 90), abs=1e-9)
+
+    unsupported = line_edge((0, 0), (1, 1))
+    unsupported.Curve.TypeId = 'Part::GeomBSplineCurve'
+    with pytest.raises(ValueError):
+        edge_to_entity(unsupported)
+
+
+def test_flat_pattern_written_in_xy_plane(tmp_path):
+    """Test a slotted plate with a hole round-trips through ezdxf"""
+    edges = [
+        line_edge((0, 0), (10, 0)),
+        line_edge((10, 0), (10, 5)),
+        arc_edge((10, 7), 2, -90, 90),
+        line_edge((10, 9), (10, 20)),
+        line_edge((10, 20), (0, 20)),
+        line_edge((0, 20), (0, 0)),
+        arc_edge((5, 15), 1.5, 0, 360),
+    ]
+    bends = [line_edge((0, 10), (10, 10))]
+    path = str(tmp_path / 'flat.dxf')
+
+    write_flat_pattern(path, edges, bends)
+    msp = ezdxf.readfile(path).modelspace()
+
+    assert sorted(e.dxftype() for e in msp.query('*[layer=="0"]')) == ['ARC', 'CIRCLE'] + ['LINE'] * 5
+    assert len(msp.query('LINE[layer=="BEND"]')) == 1
+    assert all(e.dxf.start.z == 0 for e in msp.query('LINE'))
+    arc = msp.query('ARC')[0]
+    assert (arc.dxf.start_angle, arc.dxf.end_angle) == pytest.approx((270, 90))
+
+
+def test_flat_pattern_without_bend_lines(tmp_path):
+    """Test a flat pattern written without bend lines has nothing on the BEND layer"""
+    edges = [
+        line_edge((0, 0), (10, 0)),
+        line_edge((10, 0), (10, 20)),
+        line_edge((10, 20), (0, 20)),
+        line_edge((0, 20), (0, 0)),
+    ]
+    path = str(tmp_path / 'flat.dxf')
+
+    write_flat_pattern(path, edges)
+    msp = ezdxf.readfile(path).modelspace()
+
+    assert len(msp.query('*[layer=="BEND"]')) == 0
+    assert len(msp.query('LINE')) == 4
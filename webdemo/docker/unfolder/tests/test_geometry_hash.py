@@ -0,0 +1,94 @@
+import pytest
+import os
+import sys
+import math
+import time
+from types import SimpleNamespace
+
+# Add src/unfolder to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'unfolder'))
+
+from geometry_hash import geometry_hash
+
+
+def point(x, y, z):
+    return SimpleNamespace(x=x, y=y, z=z)
+
+
+def plate_with_hole(hole, length=100.0, width=50.0, thickness=2.0, radius=5.0, move=lambda p: p):
+    """Stands in for a FreeCAD solid: a plate with a round hole at hole,
+    every point passed through move to place it"""
+    def edge(length, x, y, z):
+        return SimpleNamespace(Length=length, CenterOfMass=point(*move((x, y, z))))
+
+    def face(area, surface, x, y, z):
+        return SimpleNamespace(
+            Area=area, Surface=SimpleNamespace(TypeId=surface), CenterOfMass=point(*move((x, y, z)))
+        )
+
+    edges = []
+    for z in (0.0, thickness):
+        edges += [
+            edge(length, length / 2, 0.0, z), edge(length, length / 2, width, z),
+            edge(width, 0.0, width / 2, z), edge(width, length, width / 2, z),
+            edge(2 * math.pi * radius, hole[0], hole[1], z),
+        ]
+    for x, y in ((0.0, 0.0), (length, 0.0), (0.0, width), (length, width)):
+        edges.append(edge(thickness, x, y, thickness / 2))
+    # the hole's seam
+    edges.append(edge(thickness, hole[0] + radius, hole[1], thickness / 2))
+
+    plate_area = length * width
+    hole_area = math.pi * radius ** 2
+    center = [(plate_area * c - hole_area * h) / (plate_area - hole_area) for c, h in zip((length / 2, width / 2), hole)]
+    faces = [face(plate_area - hole_area, 'Part::GeomPlane', *center, z) for z in (0.0, thickness)]
+    faces += [
+        face(length * thickness, 'Part::GeomPlane', length / 2, 0.0, thickness / 2),
+        face(length * thickness, 'Part::GeomPlane', length / 2, width, thickness / 2),
+        face(width * thickness, 'Part::GeomPlane', 0.0, width / 2, thickness / 2),
+        face(width * thickness, 'Part::GeomPlane', length, width / 2, thickness / 2),
+        face(2 * math.pi * radius * thickness, 'Part::GeomCylinder', hole[0], hole[1], thickness / 2),
+    ]
+    return SimpleNamespace(
+        Volume=(plate_area - hole_area) * thickness,
+        Area=sum(f.Area for f in faces),
+        CenterOfMass=point(*move((*center, thickness / 2))),
+        Faces=faces,
+        Edges=edges,
+        Vertexes=[None] * 10,
+    )
+
+
+def test_hole_position_changes_hash():
+    """Test plates that differ only in where their hole is hash differently"""
+    assert geometry_hash(plate_with_hole((20.0, 25.0))) != geometry_hash(plate_with_hole((50.0, 25.0)))
+    assert geometry_hash(plate_with_hole((20.0, 25.0))) != geometry_hash(plate_with_hole((20.0, 15.0)))
+
+
+def test_placed_copies_hash_equal():
+    """Test a moved, turned or mirrored copy of a plate hashes like the plate"""
+    digest = geometry_hash(plate_with_hole((20.0, 25.0)))
+    a = math.radians(30)
+
+    def turn(p):
+        x, y, z = p
+        return (x * math.cos(a) - y * math.sin(a) + 300.0, x * math.sin(a) + y * math.cos(a) - 40.0, z + 7.0)
+
+    assert geometry_hash(plate_with_hole((20.0, 25.0), move=turn)) == digest
+    assert geometry_hash(plate_with_hole((20.0, 25.0), move=lambda p: (-p[0], p[1], p[2]))) == digest
+
+
+def test_many_edges_hash_quickly():
+    """Test a perforated panel's worth of edges is hashed in one pass, not pairwise"""
+    edges = [
+        SimpleNamespace(Length=1.0 + i % 7, CenterOfMass=point(i % 100, i // 100, 0.0))
+        for i in range(8000)
+    ]
+    solid = SimpleNamespace(
+        Volume=1.0, Area=1.0, CenterOfMass=point(50.0, 40.0, 0.0),
+        Faces=[], Edges=edges, Vertexes=[None] * 8000,
+    )
+
+    start = time.perf_counter()
+    geometry_hash(solid)
+    assert time.perf_counter() - start < 1.0
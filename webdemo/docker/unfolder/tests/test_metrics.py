@@ -0,0 +1,52 @@
+import pytest
+import os
+import sys
+import time
+
+# Add src/unfolder to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'unfolder'))
+
+from metrics import UnfoldMetrics, read_metrics
+
+
+def test_phases_accumulate_in_order():
+    """Test a phase entered twice adds up, and phases keep their first-run order"""
+    metrics = UnfoldMetrics()
+    with metrics.phase('face_graph'):
+        time.sleep(0.01)
+    with metrics.phase('thickness'):
+        pass
+    with metrics.phase('face_graph'):
+        time.sleep(0.01)
+    metrics.count('bends', 3)
+    metrics.count('bends')
+    metrics.count('splines_converted', 0)
+
+    result = metrics.as_dict()
+    assert list(result['phases']) == ['face_graph', 'thickness']
+    assert result['phases']['face_graph'] >= 0.02
+    assert result['counts'] == {'bends': 4, 'splines_converted': 0}
+    assert result['total_s'] >= result['phases']['face_graph']
+
+
+def test_failed_phase_is_timed():
+    """Test a phase that raises is still recorded"""
+    metrics = UnfoldMetrics()
+    with pytest.raises(RuntimeError):
+        with metrics.phase('unroll_cylinders'):
+            raise RuntimeError('no bends found')
+    assert 'unroll_cylinders' in metrics.as_dict()['phases']
+
+
+def test_sidecar_round_trip(tmp_path):
+    """Test the metrics written next to the DXF read back unchanged"""
+    metrics = UnfoldMetrics()
+    with metrics.phase('dxf_export'):
+        pass
+    metrics.count('faces', 12)
+
+    path = metrics.write(str(tmp_path))
+
+    assert os.path.basename(path) == 'unfold_metrics.json'
+    assert read_metrics(str(tmp_path))['counts'] == {'faces': 12}
+    assert read_metrics(str(tmp_path / 'missing')) is None
@@ -0,0 +1,88 @@
+import pytest
+import os
+import sys
+import math
+
+import ezdxf
+
+# Add src/unfolder to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'unfolder'))
+
+from orientdxf import group_loops, transform_entities
+
+
+def test_connected_entities_grouped_transitively():
+    """Test chains of lines, arcs and polylines form one loop, in any order"""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    # A 10 x 5 slot outline: two lines, two half circles, drawn out of order
+    msp.add_line((0, 0), (10, 0))
+    msp.add_line((10, 5), (0, 5))
+    msp.add_arc((10, 2.5), 2.5, -90, 90)
+    msp.add_arc((0, 2.5), 2.5, 90, 270)
+    # A closed polyline and a circle are loops by themselves
+    msp.add_lwpolyline([(20, 0), (25, 0), (25, 5)], close=True)
+    msp.add_circle((5, 2.5), 1)
+    # An open polyline and a spline joined end to end
+    msp.add_lwpolyline([(30, 0), (35, 0), (35, 5)])
+    msp.add_spline([(35, 5), (33, 7), (30, 0)])
+    # A lone line is not a loop
+    msp.add_line((50, 50), (60, 60))
+
+    loops = sorted(group_loops(msp), key=lambda loop: loop['bbox'].extmin.x)
+
+    assert [loop['entity_count'] for loop in loops] == [4, 1, 1, 2]
+    slot = loops[0]['bbox']
+    # The arcs bulge past their endpoints
+    assert slot.extmin.x == pytest.approx(-2.5)
+    assert slot.extmax.x == pytest.approx(12.5)
+
+
+def test_near_coincident_endpoints_across_cells():
+    """Test endpoints within tolerance join even when they hash to neighbouring cells"""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    # 1.0000004 and 1.0000006 round to different 1e-6 cells
+    msp.add_line((0, 0), (1, 1.0000004))
+    msp.add_line((1, 1.0000006), (0, 0))
+
+    assert [loop['entity_count'] for loop in group_loops(msp, tolerance=1e-6)] == [2]
+
+
+def test_large_outline_is_one_loop():
+    """Test a polygon with thousands of edges is grouped in one pass"""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    n = 5000
+    points = [(math.cos(2 * math.pi * i / n) * 100, math.sin(2 * math.pi * i / n) * 100) for i in range(n)]
+    for i in range(n):
+        msp.add_line(points[i], points[(i + 1) % n])
+
+    loops = group_loops(msp)
+
+    assert len(loops) == 1
+    assert loops[0]['entity_count'] == n
+
+
+def test_transform_rotates_outline_into_xy_plane(tmp_path):
+    """Test a flat pattern drawn in the XZ plane ends up in the XY plane"""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    msp.add_line((0, 0, 0), (10, 0, 0))
+    msp.add_line((10, 0, 0), (10, 0, 5))
+    msp.add_line((10, 0, 5), (0, 0, 5))
+    msp.add_line((0, 0, 5), (0, 0, 0))
+    # A hole in the same plane, whose circle lies in its own coordinate system
+    msp.add_circle((5, 2.5, 0), 1).transform(ezdxf.math.Matrix44.x_rotate(math.pi / 2))
+    source = str(tmp_path / 'raw.dxf')
+    target = str(tmp_path / 'flat.dxf')
+    doc.saveas(source)
+
+    transform_entities(source, target)
+
+    msp = ezdxf.readfile(target).modelspace()
+    for line in msp.query('LINE'):
+        assert line.dxf.start.z == pytest.approx(0, abs=1e-9)
+        assert line.dxf.end.z == pytest.approx(0, abs=1e-9)
+    circle = msp.query('CIRCLE')[0]
+    assert all(point.z == pytest.approx(0, abs=1e-9) for point in circle.vertices([0, 90]))
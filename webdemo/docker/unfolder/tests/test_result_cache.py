@@ -0,0 +1,120 @@
+import pytest
+import os
+import sys
+
+# Add src/unfolder to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'unfolder'))
+
+from result_cache import UnfoldCache, BrepCache
+
+
+def make_result(directory, dxf_text='flat', step_text='unbent'):
+    """Write fake unfold outputs and return the result dict pointing at them"""
+    os.makedirs(directory, exist_ok=True)
+    dxf_path = os.path.join(directory, 'largest_face.dxf')
+    step_path = os.path.join(directory, 'unbend_model.step')
+    with open(dxf_path, 'w') as f:
+        f.write(dxf_text)
+    with open(step_path, 'w') as f:
+        f.write(step_text)
+    return {'dxf_path': dxf_path, 'step_path': step_path, 'face': 'Face3', 'elapsed_s': 2.5,
+            'metrics': {'total_s': 2.5, 'phases': {}, 'counts': {}}}
+
+
+@pytest.fixture
+def step_file(tmp_path):
+    path = tmp_path / 'part.step'
+    path.write_bytes(b'ISO-10303-21; fake part')
+    return str(path)
+
+
+def test_key_depends_on_content_and_settings(tmp_path, step_file):
+    """Test the key changes with the STEP bytes and every unfold setting"""
+    cache = UnfoldCache(str(tmp_path / 'cache'))
+    key = cache.key(step_file, 0.38)
+
+    assert cache.key(step_file, '0.38') == key
+    assert cache.key(step_file, 0.4) != key
+    assert cache.key(step_file, 0.38, k_factor_standard='din') != key
+    assert cache.key(step_file, 0.38, root_face='Face1') != key
+    assert cache.key(step_file, 0.38, outputs='all') != key
+
+    material = tmp_path / 'steel.json'
+    material.write_text('{"k_factor_standard": "ansi", "radius_ratios": [1], "k_factors": [0.4]}')
+    material_key = cache.key(step_file, 0.38, material_path=str(material))
+    assert material_key != key
+    material.write_text('{"k_factor_standard": "ansi", "radius_ratios": [1], "k_factors": [0.42]}')
+    assert cache.key(step_file, 0.38, material_path=str(material)) != material_key
+
+    copy = tmp_path / 'renamed.step'
+    copy.write_bytes(open(step_file, 'rb').read())
+    assert cache.key(str(copy), 0.38) == key
+
+    copy.write_bytes(b'ISO-10303-21; other part')
+    assert cache.key(str(copy), 0.38) != key
+
+
+def test_put_then_get_copies_outputs(tmp_path, step_file):
+    """Test a stored result is copied back into the requested directory"""
+    cache = UnfoldCache(str(tmp_path / 'cache'))
+    key = cache.key(step_file, 0.38)
+    assert cache.get(key, str(tmp_path / 'miss')) is None
+
+    cache.put(key, make_result(str(tmp_path / 'run')))
+    result = cache.get(key, str(tmp_path / 'hit'))
+
+    assert result['cached'] is True
+    assert result['face'] == 'Face3'
+    # Timings belong to the run that stored the entry
+    assert 'metrics' not in result
+    assert result['dxf_path'] == str(tmp_path / 'hit' / 'largest_face.dxf')
+    assert open(result['dxf_path']).read() == 'flat'
+    assert open(result['step_path']).read() == 'unbent'
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    """Test eviction keeps the cache under its size limit, oldest use first"""
+    cache = UnfoldCache(str(tmp_path / 'cache'))
+    payload = 'x' * 200
+
+    cache.put('a' * 64, make_result(str(tmp_path / 'a'), payload, payload))
+    # Room for two entries but not three
+    cache.max_bytes = int(cache.entries()[0][1] * 2.5)
+    cache.put('b' * 64, make_result(str(tmp_path / 'b'), payload, payload))
+    # Backdate 'b' and use 'a', so 'b' is the least recently used entry
+    past = os.path.getmtime(cache._entry_dir('b' * 64) + '/meta.json') - 10
+    os.utime(cache._entry_dir('b' * 64) + '/meta.json', (past, past))
+    assert cache.get('a' * 64, str(tmp_path / 'out')) is not None
+
+    cache.put('c' * 64, make_result(str(tmp_path / 'c'), payload, payload))
+
+    assert cache.get('b' * 64, str(tmp_path / 'out')) is None
+    assert cache.get('a' * 64, str(tmp_path / 'out')) is not None
+    assert cache.get('c' * 64, str(tmp_path / 'out')) is not None
+    assert sum(size for _, size, _ in cache.entries()) <= cache.max_bytes
+
+
+def test_brep_cache_store_and_lookup(tmp_path):
+    """Test shapes are stored by digest and evicted least recently used first"""
+    cache = BrepCache(str(tmp_path / 'brep'))
+    assert cache.lookup('a' * 64) is None
+
+    def writer(text):
+        def write(path):
+            with open(path, 'w') as f:
+                f.write(text)
+        return write
+
+    path = cache.store('a' * 64, writer('x' * 100))
+    assert cache.lookup('a' * 64) == path
+    assert open(path).read() == 'x' * 100
+
+    cache.max_bytes = 250
+    past = os.path.getmtime(path) - 10
+    os.utime(path, (past, past))
+    cache.store('b' * 64, writer('y' * 100))
+    cache.store('c' * 64, writer('z' * 100))
+
+    assert cache.lookup('a' * 64) is None
+    assert cache.lookup('b' * 64) is not None
+    assert cache.lookup('c' * 64) is not None
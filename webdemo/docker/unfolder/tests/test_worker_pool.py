@@ -0,0 +1,153 @@
+import pytest
+import os
+import sys
+import textwrap
+
+# Add src/unfolder to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'unfolder'))
+
+from worker_pool import FreeCADWorkerPool, UnfoldError
+from unfold_outputs import OUTPUTS
+
+# Speaks the freecad_worker.py protocol without needing FreeCAD
+FAKE_WORKER = textwrap.dedent('''
+    import os, sys, json, time, socket
+
+    connection = socket.socket(fileno=int(os.environ["FREECAD_WORKER_FD"]))
+    reader = connection.makefile("r")
+    writer = connection.makefile("w")
+
+    def send(message):
+        writer.write(json.dumps(message) + "\\n")
+        writer.flush()
+
+    send({"ready": True, "pid": os.getpid()})
+    for line in reader:
+        job = json.loads(line)
+        op = job.get("op")
+        if op == "shutdown":
+            break
+        if op == "crash":
+            os._exit(3)
+        if op == "sleep":
+            time.sleep(job["args"]["seconds"])
+        if op == "split_assembly":
+            parts = [{"name": name, "brep_path": name + ".brep", "instances": [name]}
+                     for name in ("part_1", "part_2", "bad_part")]
+            skipped = [{"label": "Bolt", "reason": "not sheet metal"}]
+            send({"id": job["id"], "ok": True, "result": {"parts": parts, "skipped": skipped}, "elapsed_s": 0.0})
+            continue
+        if op == "unfold_brep":
+            time.sleep(0.2)
+            if "bad" in job["args"]["brep_path"]:
+                op = "fail"
+        if op == "fail":
+            send({"id": job["id"], "ok": False, "error": "ValueError: bad part", "elapsed_s": 0.0})
+            continue
+        send({"id": job["id"], "ok": True, "result": {"pid": os.getpid(), **job["args"]}, "elapsed_s": 0.0})
+''')
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    script = tmp_path / 'fake_worker.py'
+    script.write_text(FAKE_WORKER)
+    pools = []
+
+    def make(**kwargs):
+        pool = FreeCADWorkerPool(command=[sys.executable], worker_script=str(script), **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_worker_is_reused(make_pool):
+    """Test consecutive jobs run on the same warm worker"""
+    pool = make_pool(size=1)
+    first = pool.submit('echo', value=1)
+    second = pool.submit('echo', value=2)
+
+    assert first['result']['value'] == 1
+    assert first['result']['pid'] == second['result']['pid']
+    assert pool.stats['started'] == 1
+
+
+def test_worker_recycled_after_max_jobs(make_pool):
+    """Test a worker is replaced after max_jobs_per_worker jobs"""
+    pool = make_pool(size=1, max_jobs_per_worker=2)
+    pids = [pool.submit('echo')['result']['pid'] for _ in range(3)]
+
+    assert pids[0] == pids[1] != pids[2]
+    assert pool.stats['recycled'] == 1
+
+
+def test_crashed_worker_is_restarted(make_pool):
+    """Test a crash fails only its own job and the next job gets a new worker"""
+    pool = make_pool(size=1)
+    pid = pool.submit('echo')['result']['pid']
+
+    with pytest.raises(UnfoldError, match='exited'):
+        pool.submit('crash')
+
+    assert pool.submit('echo')['result']['pid'] != pid
+    assert pool.stats['restarts'] == 1
+
+
+def test_job_timeout_kills_worker(make_pool):
+    """Test a hung job times out and its worker is replaced"""
+    pool = make_pool(size=1)
+
+    with pytest.raises(UnfoldError, match='within'):
+        pool.submit('sleep', timeout=0.2, seconds=30)
+
+    assert pool.submit('echo', value='ok')['result']['value'] == 'ok'
+    assert pool.status()['workers'] == 1
+
+
+def test_failed_job_keeps_worker(make_pool):
+    """Test an error reported by the worker does not cost a restart"""
+    pool = make_pool(size=1)
+    pid = pool.submit('echo')['result']['pid']
+
+    with pytest.raises(UnfoldError, match='bad part'):
+        pool.submit('fail')
+
+    assert pool.submit('echo')['result']['pid'] == pid
+    assert pool.stats['restarts'] == 0
+
+
+def test_assembly_parts_unfolded_in_parallel(make_pool, tmp_path):
+    """Test assembly parts run on separate workers and fail independently"""
+    pool = make_pool(size=2)
+    assembly = pool.unfold_assembly('assembly.step', output_dir=str(tmp_path))
+    parts = {part['name']: part for part in assembly['parts']}
+
+    assert assembly['skipped'][0]['label'] == 'Bolt'
+    assert parts['part_1']['output_dir'] == str(tmp_path / 'part_1')
+    assert parts['part_1']['pid'] != parts['part_2']['pid']
+    assert 'bad part' in parts['bad_part']['error']
+    assert pool.stats['restarts'] == 0
+
+
+def test_unfold_deadline_leaves_room_in_job_timeout(make_pool):
+    """Test unfold jobs give the fallback chain a deadline within the job timeout"""
+    pool = make_pool(size=1, job_timeout=40)
+
+    assert pool.unfold('part.step')['deadline'] == 30
+    assert pool.unfold('part.step', timeout=8)['deadline'] == 6
+
+
+def test_default_outputs_have_no_bend_lines(make_pool, tmp_path):
+    """Test unfolds ask for a profile-only DXF unless told otherwise, as the
+    nester cuts every line of it"""
+    pool = make_pool(size=1)
+    outputs = pool.unfold('part.step')['outputs']
+    assembly = pool.unfold_assembly('assembly.step', output_dir=str(tmp_path))
+
+    assert outputs == 'dxf'
+    assert 'bendlines' not in OUTPUTS[outputs]
+    assert {part.get('outputs') for part in assembly['parts'] if 'error' not in part} == {'dxf'}
+    assert pool.unfold('part.step', outputs='dxf+bendlines')['outputs'] == 'dxf+bendlines'